@@ -9,6 +9,17 @@ app = Celery('astrid_tech')
 app.config_from_object('django.conf:settings')
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
 
+app.conf.beat_schedule = {
+    'publish-scheduled-entries': {
+        'task': 'blog.tasks.publish_scheduled_entries',
+        'schedule': getattr(settings, 'BLOG_PUBLISH_INTERVAL', 60),
+    },
+    'purge-deleted-entries': {
+        'task': 'blog.tasks.purge_deleted_entries',
+        'schedule': getattr(settings, 'BLOG_PURGE_INTERVAL', 60 * 60),
+    },
+}
+
 
 @app.task(bind=True)
 def debug_task(self):
@@ -0,0 +1,77 @@
+"""
+Building representations straight from .values() rows, for read paths where DRF's per-object serialization dominates.
+
+A serializer's readable fields are turned into a plan once: for every field, in output order, a function from the raw
+database value to exactly what the field's to_representation() would return. Most fields return database values
+unchanged, so only dates, datetimes and UUIDs do any work, and anything without a known shortcut falls back to the
+field itself.
+"""
+from datetime import timezone
+from typing import Callable, List, Tuple, Dict, Any, Iterable
+
+from django.conf import settings
+from django.utils.timezone import get_current_timezone_name
+from rest_framework import fields, relations, ISO_8601
+from rest_framework.settings import api_settings
+
+Converter = Callable[[Any], Any]
+RepresentationPlan = List[Tuple[str, Converter]]
+
+
+def identity(value):
+    return value
+
+
+def utc_datetime_representation(value) -> str:
+    """DateTimeField.to_representation for ISO 8601 output in UTC."""
+    value = value.astimezone(timezone.utc).isoformat()
+    return value[:-6] + 'Z'
+
+
+def iso_date_representation(value) -> str:
+    return value.isoformat()
+
+
+def is_iso_8601(output_format) -> bool:
+    return isinstance(output_format, str) and output_format.lower() == ISO_8601
+
+
+def field_converter(field: fields.Field) -> Converter:
+    """A function that represents a non-null database value the same way the field does."""
+    if isinstance(field, fields.DateTimeField):
+        iso = is_iso_8601(getattr(field, 'format', api_settings.DATETIME_FORMAT))
+        utc = settings.USE_TZ and getattr(field, 'timezone', None) is None and get_current_timezone_name() == 'UTC'
+        return utc_datetime_representation if iso and utc else field.to_representation
+    if isinstance(field, fields.DateField):
+        iso = is_iso_8601(getattr(field, 'format', api_settings.DATE_FORMAT))
+        return iso_date_representation if iso else field.to_representation
+    if isinstance(field, fields.UUIDField):
+        return str if field.uuid_format == 'hex_verbose' else field.to_representation
+    if isinstance(field, (fields.CharField, fields.IntegerField, fields.BooleanField, fields.ChoiceField)):
+        # Strings, ints and bools come out of the database as they're represented
+        return identity
+    if isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is None:
+        # The row holds the related object's key
+        return identity
+    return field.to_representation
+
+
+def representation_plan(serializer_fields: Dict[str, fields.Field]) -> RepresentationPlan:
+    """The converters for the serializer's readable fields, in output order."""
+    return [(name, field_converter(field)) for name, field in serializer_fields.items() if not field.write_only]
+
+
+def represent_row(row: Dict[str, Any], plan: RepresentationPlan) -> Dict[str, Any]:
+    """
+    Represent a .values() row like the serializer the plan was made from would represent the instance. Null values are
+    left alone, as serializers do.
+    """
+    result = {}
+    for name, convert in plan:
+        value = row[name]
+        result[name] = None if value is None else convert(value)
+    return result
+
+
+def represent_rows(rows: Iterable[Dict[str, Any]], plan: RepresentationPlan) -> List[Dict[str, Any]]:
+    return [represent_row(row, plan) for row in rows]
@@ -0,0 +1,30 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renders the same bytes as JSONRenderer with its default settings, but encodes with orjson. Anything orjson would
+    encode differently, like indented output or types it can't handle, goes through JSONRenderer instead.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if self.ensure_ascii or not self.compact or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            # Datetimes go through the default so that they're formatted like JSONEncoder does
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same as JSONRenderer: these are valid JSON but not valid JavaScript
+        return ret.replace('\u2028'.encode('utf-8'), b'\\u2028').replace('\u2029'.encode('utf-8'), b'\\u2029')
+
+
+def use_orjson(renderers):
+    """Swap JSONRenderer for ORJSONRenderer in a view's renderers."""
+    return [ORJSONRenderer() if type(renderer) is JSONRenderer else renderer for renderer in renderers]
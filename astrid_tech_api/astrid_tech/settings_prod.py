@@ -26,6 +26,15 @@ DATABASES = {
     }
 }
 
+# Shared by every web worker and the Celery workers, so that invalidations reach all of them. Create the table with
+# `manage.py createcachetable` when deploying.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+    }
+}
+
 pre_chain += (add_service_name('astrid_tech_api'),)
 
 LOGGING = {
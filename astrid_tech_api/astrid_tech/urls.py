@@ -6,7 +6,7 @@ from rest_framework.routers import DefaultRouter
 
 import indieauth.views
 from astrid_tech.views import index
-from blog.views import micropub, PublicEntriesViewSet, upload_media
+from blog.views import micropub, PublicEntriesViewSet, upload_media, tag_facets
 from comments.views import CommentViewSet
 from printer3d.views import PrinterViewSet
 
@@ -29,5 +29,7 @@ urlpatterns = \
         path('api/micropub/media', upload_media, name='micropub-media-endpoint'),
         path('api/webmention/', include('webmention.urls')),
         path('3dprinter/', include('printer3d.urls')),
+        path('api/tags/facets', tag_facets, name='tag-facets'),
+        path('api/', include('blog.urls')),
         path('api/', include(router.urls)),
     ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,9 +1,12 @@
 from django.contrib import admin
 
-from blog.models import Entry, Project, Tag, Syndication, Attachment, SyndicationTarget, UploadedFile
+from blog.models import ArchiveDay, Entry, Project, Tag, Syndication, Attachment, SyndicationTarget, UploadedFile, \
+    EntryTombstone
 
+admin.site.register(ArchiveDay)
 admin.site.register(Attachment)
 admin.site.register(Entry)
+admin.site.register(EntryTombstone)
 admin.site.register(Project)
 admin.site.register(Syndication)
 admin.site.register(SyndicationTarget)
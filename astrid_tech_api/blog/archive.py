@@ -0,0 +1,60 @@
+"""
+The archive calendar: how many visible entries there are per day, month and year.
+
+Counts are kept per day in the ArchiveDay summary table. Saving or deleting an entry, or a scheduled publish or delete
+flipping its visibility, recounts the days it was and is on. A recount locks the rows of its days first, so racing
+recounts of a day run one after the other and the last one counts every change committed before it.
+"""
+from itertools import groupby
+from typing import Iterable, List, Dict
+
+from django.db import transaction
+from django.db.models import Count
+
+from blog.models import Entry, ArchiveDay
+
+
+def recount_archive_days(dates: Iterable):
+    """Recount the visible entries on the given dates, in one grouped query while holding their rows."""
+    # Unsaved entries may still hold the datetime their date defaulted to
+    to_date = Entry._meta.get_field('date').to_python
+    dates = {to_date(d) for d in dates if d is not None}
+    if not dates:
+        return
+
+    with transaction.atomic():
+        # Lock in date order, so that recounts of overlapping days can't deadlock
+        ArchiveDay.objects.bulk_create([ArchiveDay(date=d) for d in dates], ignore_conflicts=True)
+        list(ArchiveDay.objects.select_for_update().filter(date__in=dates).order_by('date').values_list('date'))
+
+        counts = dict(
+            Entry.objects_visible()
+                .filter(date__in=dates)
+                .values_list('date')
+                .annotate(count=Count('pk'))
+                .order_by()
+        )
+        for d in sorted(dates):
+            ArchiveDay.objects.filter(date=d).update(visible_count=counts.get(d, 0))
+
+
+def rebuild_archive() -> int:
+    """Regenerate the whole archive from scratch in one grouped query. Returns how many days have entries."""
+    counts = Entry.objects_visible().values_list('date').annotate(count=Count('pk')).order_by()
+    with transaction.atomic():
+        ArchiveDay.objects.all().delete()
+        ArchiveDay.objects.bulk_create(ArchiveDay(date=d, visible_count=count) for d, count in counts)
+    return ArchiveDay.objects.count()
+
+
+def get_archive_calendar() -> List[Dict]:
+    """Visible entry counts nested by year, month and day, newest first."""
+    days = ArchiveDay.objects.filter(visible_count__gt=0).order_by('-date').values_list('date', 'visible_count')
+    years = []
+    for year, year_days in groupby(days, key=lambda row: row[0].year):
+        months = []
+        for month, month_days in groupby(year_days, key=lambda row: row[0].month):
+            month_days = [{'day': d.day, 'count': count} for d, count in month_days]
+            months.append({'month': month, 'count': sum(d['count'] for d in month_days), 'days': month_days})
+        years.append({'year': year, 'count': sum(m['count'] for m in months), 'months': months})
+    return years
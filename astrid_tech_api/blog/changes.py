@@ -0,0 +1,88 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional, List, Iterable
+from urllib.parse import urlencode, parse_qs
+from uuid import UUID
+
+from django.conf import settings
+from django.db.models import QuerySet
+
+from blog.models import Entry, EntryTombstone, utc_now
+
+SYNC_OVERLAP = timedelta(seconds=getattr(settings, 'BLOG_SYNC_OVERLAP_SECONDS', 5))
+"""
+How far before its watermark a token starts looking for changes. updated_date is stamped when a row is saved, not
+when its transaction commits, so a slow transaction can land with a stamp that's already behind a token handed out in
+the meantime. Re-sending a few seconds of changes is harmless since applying them is idempotent.
+"""
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+class SyncToken(NamedTuple):
+    watermark: datetime
+
+    @classmethod
+    def decode(cls, encoded: str) -> 'SyncToken':
+        try:
+            tokens = parse_qs(urlsafe_b64decode(encoded.encode('ascii')).decode('ascii'), keep_blank_values=True)
+            watermark = datetime.fromisoformat(tokens['t'][0])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise InvalidSyncToken(encoded)
+        if watermark.tzinfo is None:
+            raise InvalidSyncToken(encoded)
+        return cls(watermark)
+
+    def encode(self) -> str:
+        return urlsafe_b64encode(urlencode({'t': self.watermark.isoformat()}).encode('ascii')).decode('ascii')
+
+
+class EntryChanges(NamedTuple):
+    updated: 'QuerySet[Entry]'
+    """Entries that are visible now and may have changed since the token."""
+    deleted: List[UUID]
+    """Entries that were visible but aren't anymore, either because they were unpublished or deleted."""
+    token: SyncToken
+    """The token to pass in to get the changes after these ones."""
+
+
+def get_entry_changes(token: Optional[SyncToken], now: datetime) -> EntryChanges:
+    """
+    What changed about the entries since the given token was handed out, or every visible entry if there's no token.
+
+    Scheduled publishes and deletes bump updated_date when they flip an entry's visibility, so every change shows up
+    as a range on the indexed updated_date, and a sync only touches the rows that changed. Entries that stop being
+    visible leave a tombstone, so drafts and scheduled entries that clients never saw aren't reported as deleted.
+    """
+    next_token = SyncToken(now)
+
+    if token is None:
+        return EntryChanges(updated=Entry.objects_visible(), deleted=[], token=next_token)
+
+    since = token.watermark - SYNC_OVERLAP
+    changed = Entry.objects.filter(updated_date__gt=since)
+
+    # Entries that came back since they were hidden are among the updated ones instead
+    deleted = list(
+        EntryTombstone.objects.filter(deleted_date__gt=since)
+            .exclude(uuid__in=Entry.objects_visible().values('uuid'))
+            .values_list('uuid', flat=True)
+    )
+
+    return EntryChanges(updated=changed.filter(visible=True), deleted=deleted, token=next_token)
+
+
+def record_tombstones(uuids: Iterable[UUID], deleted_date: datetime, using=None):
+    """Record that the given entries stopped being visible, replacing the tombstones of earlier times they did."""
+    uuids = list(uuids)
+    if not uuids:
+        return
+    tombstones = EntryTombstone.objects.using(using)
+    tombstones.filter(uuid__in=uuids).delete()
+    tombstones.bulk_create([EntryTombstone(uuid=uuid, deleted_date=deleted_date) for uuid in uuids])
+
+
+def record_tombstone(entry: Entry, using=None):
+    record_tombstones([entry.uuid], utc_now(), using=using)
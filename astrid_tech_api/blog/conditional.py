@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from django.db.models import QuerySet, Max, Count
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class EntryVersion(NamedTuple):
+    """
+    A cheap fingerprint of a set of entries, used to answer conditional GETs without serializing anything.
+
+    Only the ETag validates a set of entries. Entries can leave a set, by being deleted, unpublished or filtered out,
+    without its newest updated_date moving, so Last-Modified is only sent and checked for a single entry.
+    """
+    count: int
+    last_modified: Optional[datetime]
+    single: bool = False
+    """Whether this is the version of a single entry, whose updated_date moves with everything about it."""
+    encoding: str = ''
+    """The content coding of the representation, if any. Encoded bodies differ byte for byte, so they get own ETags."""
+
+    @classmethod
+    def of(cls, qs: 'QuerySet', single: bool = False) -> 'EntryVersion':
+        """Compute the version of the given entries in a single aggregate query."""
+        result = qs.order_by().aggregate(count=Count('pk'), last_modified=Max('updated_date'))
+        return cls(count=result['count'], last_modified=result['last_modified'], single=single)
+
+    @property
+    def etag(self) -> str:
+        stamp = self.last_modified.timestamp() if self.last_modified is not None else 0
+        suffix = f'-{self.encoding}' if self.encoding else ''
+        return quote_etag(f'{self.count}-{stamp:.6f}{suffix}')
+
+    @property
+    def last_modified_timestamp(self) -> Optional[int]:
+        if self.last_modified is None or not self.single:
+            return None
+        return int(self.last_modified.timestamp())
+
+    def not_modified_response(self, request) -> Optional[HttpResponse]:
+        """A 304 (or 412) response if the request's preconditions say the client is up to date, otherwise None."""
+        response = get_conditional_response(request, etag=self.etag, last_modified=self.last_modified_timestamp)
+        if response is not None:
+            self.apply_headers(response)
+        return response
+
+    def apply_headers(self, response: HttpResponse) -> HttpResponse:
+        response['ETag'] = self.etag
+        if self.last_modified_timestamp is not None:
+            response['Last-Modified'] = http_date(self.last_modified_timestamp)
+        return response
@@ -0,0 +1,12 @@
+"""
+Counters kept in the cache, so that they count across every process that shares the backend, as production's does.
+"""
+from django.core.cache import cache
+
+
+def increment_counter(key: str):
+    try:
+        cache.incr(key)
+    except ValueError:  # Not there yet, or evicted
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
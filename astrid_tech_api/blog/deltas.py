@@ -0,0 +1,57 @@
+"""
+Compact encodings of text for the revision history: zlib-compressed snapshots, and zlib-compressed line deltas.
+
+A delta is a JSON list of operations that rebuild the new text out of the previous one. An [start, end] pair copies
+lines start to end of the previous text, and a string is inserted as-is. Lines keep their line endings, so joining
+them gives back the exact text.
+"""
+import json
+import zlib
+from difflib import SequenceMatcher
+from hashlib import sha256
+from typing import List, Union
+
+Operation = Union[List[int], str]
+
+
+def text_hash(text: str) -> str:
+    return sha256(text.encode('utf-8')).hexdigest()
+
+
+def encode_snapshot(text: str) -> bytes:
+    return zlib.compress(text.encode('utf-8'))
+
+
+def decode_snapshot(data: bytes) -> str:
+    return zlib.decompress(data).decode('utf-8')
+
+
+def diff_lines(previous: str, text: str) -> List[Operation]:
+    """The operations that turn previous into text."""
+    a = previous.splitlines(keepends=True)
+    b = text.splitlines(keepends=True)
+    operations = []
+    # Without autojunk, blank lines that make up much of a long post still count as matches
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            operations.append([i1, i2])
+        elif tag in ('replace', 'insert'):
+            operations.append(''.join(b[j1:j2]))
+    return operations
+
+
+def encode_delta(previous: str, text: str) -> bytes:
+    operations = diff_lines(previous, text)
+    return zlib.compress(json.dumps(operations, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def apply_delta(previous: str, data: bytes) -> str:
+    lines = previous.splitlines(keepends=True)
+    parts = []
+    for operation in json.loads(zlib.decompress(data)):
+        if isinstance(operation, str):
+            parts.append(operation)
+        else:
+            start, end = operation
+            parts.extend(lines[start:end])
+    return ''.join(parts)
@@ -0,0 +1,57 @@
+"""
+A read-through cache of serialized entries, keyed by uuid.
+
+Entries are cached as the data PublicEntrySerializer produced for them, along with their updated_date. A cached copy
+is only used if that is still the entry's updated_date, so a copy that a write in another process (or one that raced a
+miss) left behind is never served. Anything that changes an entry's representation also deletes its cache key through
+the signals in blog.signals, and keys expire after ENTRY_DETAIL_CACHE_TIMEOUT, so outdated copies don't linger.
+
+Hits and misses are counted in the cache too. Production uses a shared backend, so the counts cover every process.
+"""
+from datetime import datetime
+from typing import NamedTuple, Optional, Iterable, Dict
+from uuid import UUID
+
+from django.conf import settings
+from django.core.cache import cache
+
+from blog.counters import increment_counter
+
+ENTRY_DETAIL_CACHE_TIMEOUT = getattr(settings, 'BLOG_ENTRY_DETAIL_CACHE_TIMEOUT', 60 * 60)
+HITS_KEY = 'blog:entry-detail:hits'
+MISSES_KEY = 'blog:entry-detail:misses'
+
+
+class CachedEntry(NamedTuple):
+    data: Dict
+    updated_date: datetime
+
+
+def entry_detail_key(uuid) -> str:
+    return f'blog:entry-detail:{uuid}'
+
+
+def get_cached_entry(uuid, updated_date: datetime) -> Optional[CachedEntry]:
+    """The cached copy of the entry, if there is one as of the given updated_date."""
+    cached = cache.get(entry_detail_key(uuid))
+    if cached is not None and cached.updated_date != updated_date:
+        cached = None
+    increment_counter(MISSES_KEY if cached is None else HITS_KEY)
+    return cached
+
+
+def cache_entry(uuid, data: Dict, updated_date: datetime):
+    cache.set(entry_detail_key(uuid), CachedEntry(dict(data), updated_date), timeout=ENTRY_DETAIL_CACHE_TIMEOUT)
+
+
+def invalidate_entries(uuids: Iterable[UUID]):
+    keys = [entry_detail_key(uuid) for uuid in uuids]
+    if keys:
+        cache.delete_many(keys)
+
+
+def entry_cache_stats() -> Dict:
+    counts = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = counts.get(HITS_KEY, 0), counts.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': hits / total if total else None}
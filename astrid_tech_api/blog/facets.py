@@ -0,0 +1,42 @@
+"""
+Counts of visible entries per tag.
+
+The counts are cached, and the signals in blog.signals delete them whenever entries, tags, taggings or visibility
+change. That only reaches every process if they share the cache backend, as production's does. Anywhere else, another
+process's counts can be behind for up to TAG_FACETS_MAX_AGE.
+"""
+from datetime import timedelta
+from typing import List, Dict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from blog.models import Entry
+
+TAG_FACETS_CACHE_KEY = 'blog:tag-facets'
+TAG_FACETS_MAX_AGE = timedelta(seconds=getattr(settings, 'BLOG_TAG_FACETS_MAX_AGE_SECONDS', 10 * 60))
+
+
+def compute_tag_facets() -> List[Dict]:
+    """Count the visible entries for every tag, in one aggregate query over the M2M table."""
+    rows = Entry.tags.through.objects \
+        .filter(entry__visible=True) \
+        .values('tag_id') \
+        .annotate(count=Count('entry_id')) \
+        .order_by('-count', 'tag_id')
+    return [{'tag': row['tag_id'], 'count': row['count']} for row in rows]
+
+
+def get_tag_facets() -> List[Dict]:
+    facets = cache.get(TAG_FACETS_CACHE_KEY)
+    if facets is not None:
+        return facets
+
+    facets = compute_tag_facets()
+    cache.set(TAG_FACETS_CACHE_KEY, facets, timeout=TAG_FACETS_MAX_AGE.total_seconds())
+    return facets
+
+
+def invalidate_tag_facets():
+    cache.delete(TAG_FACETS_CACHE_KEY)
@@ -0,0 +1,207 @@
+"""
+Atom, RSS 2.0, and JSON Feed rendering for entries.
+
+Rendering an item is the expensive part of building a feed, so every item is rendered on its own into a fragment
+that is cached under the entry's uuid and updated_date. Rebuilding a feed after one new post only renders that post;
+every other item comes straight out of the cache, and their bodies aren't even loaded from the database.
+"""
+import json
+from hashlib import md5
+from io import StringIO
+from typing import List, Iterable, Dict
+
+from django.core.cache import cache
+from django.utils.feedgenerator import Rss201rev2Feed, Atom1Feed, rfc3339_date
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from blog.models import Entry, utc_now
+from blog.site import SITE_URL
+
+FEED_TITLE = 'astrid.tech'
+FEED_DESCRIPTION = "Astrid Yu's tech blog"
+FEED_AUTHOR_NAME = 'Astrid Yu'
+FEED_AUTHOR_EMAIL = 'astrid@astrid.tech'
+FEED_LANGUAGE = 'en'
+
+FRAGMENT_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+"""Fragment keys change whenever their entry does, so this only bounds how long stale fragments linger."""
+FRAGMENT_FORMAT = 2
+"""Bump this whenever items are rendered differently, so that fragments cached before aren't used anymore."""
+
+
+def entry_url(entry: Entry) -> str:
+    return SITE_URL + entry.slug
+
+
+def entry_tags(entry: Entry) -> List[str]:
+    return sorted(tag.id for tag in entry.tags.all())
+
+
+def fragment_cache_key(feed_name: str, entry: Entry) -> str:
+    # Tagging an entry doesn't touch updated_date, but tags are rendered as categories, so they're part of the key.
+    tags_digest = md5(','.join(entry_tags(entry)).encode('utf-8')).hexdigest()
+    return f'blog:feed-item:{FRAGMENT_FORMAT}:{feed_name}:{entry.uuid}:{entry.updated_date.isoformat()}:{tags_digest}'
+
+
+class EntryFeed:
+    name: str
+    content_type: str
+
+    def __init__(self, feed_url: str, link: str = SITE_URL, title: str = FEED_TITLE):
+        self.feed_url = feed_url
+        self.link = link
+        self.title = title
+
+    def render_item(self, entry: Entry, content_html: str) -> str:
+        raise NotImplementedError
+
+    def render_document(self, entries: List[Entry], fragments: List[str]) -> str:
+        raise NotImplementedError
+
+    def item_fragments(self, entries: List[Entry]) -> List[str]:
+        keys = {entry.pk: fragment_cache_key(self.name, entry) for entry in entries}
+        fragments = cache.get_many(keys.values())
+
+        missing = [entry for entry in entries if keys[entry.pk] not in fragments]
+        if missing:
+            bodies = dict(Entry.objects.filter(pk__in=[e.pk for e in missing]).values_list('pk', 'content_html'))
+            rendered = {keys[entry.pk]: self.render_item(entry, bodies[entry.pk]) for entry in missing}
+            cache.set_many(rendered, timeout=FRAGMENT_CACHE_TIMEOUT)
+            fragments.update(rendered)
+
+        return [fragments[keys[entry.pk]] for entry in entries]
+
+    def render(self, entries: Iterable[Entry]) -> str:
+        """
+        Render the feed. The entries should have their tags prefetched, and can leave their bodies deferred.
+        """
+        entries = list(entries)
+        return self.render_document(entries, self.item_fragments(entries))
+
+
+class PrerenderedItemsMixin:
+    """Makes a Django feed generator write already-rendered item fragments instead of rendering its items."""
+    fragments = ()
+    latest_date = None
+
+    def write_items(self, handler):
+        for fragment in self.fragments:
+            handler.ignorableWhitespace(fragment)
+
+    def latest_post_date(self):
+        return self.latest_date or utc_now()
+
+
+class PrerenderedRssFeed(PrerenderedItemsMixin, Rss201rev2Feed):
+    pass
+
+
+class ContentAtomFeed(Atom1Feed):
+    """Writes an item's body as its <content>, leaving <summary> to its description."""
+
+    def add_item_elements(self, handler, item):
+        super().add_item_elements(handler, item)
+        if item.get('content') is not None:
+            handler.addQuickElement('content', item['content'], {'type': 'html'})
+
+
+class PrerenderedAtomFeed(PrerenderedItemsMixin, Atom1Feed):
+    pass
+
+
+class XMLEntryFeed(EntryFeed):
+    item_generator_class = None
+    """Renders single items."""
+    document_generator_class = None
+    """Renders the feed around already-rendered items."""
+
+    def generator(self, generator_class):
+        return generator_class(
+            title=self.title,
+            link=self.link,
+            description=FEED_DESCRIPTION,
+            language=FEED_LANGUAGE,
+            author_name=FEED_AUTHOR_NAME,
+            author_email=FEED_AUTHOR_EMAIL,
+            author_link=SITE_URL,
+            feed_url=self.feed_url,
+        )
+
+    def item_body(self, entry: Entry, content_html: str) -> Dict:
+        """The arguments to add_item() that carry the item's body."""
+        return {'description': content_html}
+
+    def render_item(self, entry: Entry, content_html: str) -> str:
+        generator = self.generator(self.item_generator_class)
+        url = entry_url(entry)
+        generator.add_item(
+            title=entry.title or entry.slug,
+            link=url,
+            unique_id=url,
+            pubdate=entry.published_date,
+            updateddate=entry.updated_date,
+            categories=entry_tags(entry),
+            author_name=FEED_AUTHOR_NAME,
+            **self.item_body(entry, content_html),
+        )
+
+        out = StringIO()
+        generator.write_items(SimplerXMLGenerator(out, 'utf-8'))
+        return out.getvalue()
+
+    def render_document(self, entries: List[Entry], fragments: List[str]) -> str:
+        generator = self.generator(self.document_generator_class)
+        generator.fragments = fragments
+        generator.latest_date = max((e.updated_date for e in entries), default=None)
+        return generator.writeString('utf-8')
+
+
+class RssEntryFeed(XMLEntryFeed):
+    name = 'rss'
+    content_type = Rss201rev2Feed.content_type
+    item_generator_class = Rss201rev2Feed
+    document_generator_class = PrerenderedRssFeed
+
+
+class AtomEntryFeed(XMLEntryFeed):
+    name = 'atom'
+    content_type = Atom1Feed.content_type
+    item_generator_class = ContentAtomFeed
+    document_generator_class = PrerenderedAtomFeed
+
+    def item_body(self, entry: Entry, content_html: str) -> Dict:
+        return {'description': entry.description or None, 'content': content_html}
+
+
+class JSONEntryFeed(EntryFeed):
+    """See https://www.jsonfeed.org/version/1.1/"""
+    name = 'json'
+    content_type = 'application/feed+json; charset=utf-8'
+
+    def render_item(self, entry: Entry, content_html: str) -> str:
+        url = entry_url(entry)
+        item = {
+            'id': url,
+            'url': url,
+            'title': entry.title or entry.slug,
+            'content_html': content_html,
+            'date_published': rfc3339_date(entry.published_date),
+            'date_modified': rfc3339_date(entry.updated_date),
+            'tags': entry_tags(entry),
+        }
+        if entry.description:
+            item['summary'] = entry.description
+        return json.dumps(item)
+
+    def render_document(self, entries: List[Entry], fragments: List[str]) -> str:
+        header = json.dumps({
+            'version': 'https://jsonfeed.org/version/1.1',
+            'title': self.title,
+            'home_page_url': self.link,
+            'feed_url': self.feed_url,
+            'description': FEED_DESCRIPTION,
+            'language': FEED_LANGUAGE,
+            'authors': [{'name': FEED_AUTHOR_NAME, 'url': SITE_URL}],
+        })
+        # Splice the cached items into the header object rather than decoding and re-encoding them.
+        return header[:-1] + ', "items": [' + ', '.join(fragments) + ']}'
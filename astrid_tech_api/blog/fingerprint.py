@@ -0,0 +1,63 @@
+"""
+Fingerprinting what an entry says, so that saves which change nothing meaningful can be skipped.
+
+Re-uploading posts or saving an entry from the admin without touching it would otherwise bump updated_date, which
+invalidates caches and ETags and sends the entry down every client's sync feed again for nothing. The fingerprint
+covers the fields an author controls and the entry's tags. Everything else is either derived from them or, like the
+visible flag, checked separately by Entry.save().
+
+Skipped saves are counted in the cache. Production shares its cache backend between processes, so there the count
+covers every process.
+"""
+import json
+from datetime import datetime, date
+from hashlib import sha256
+from typing import Iterable, Tuple, Any
+
+import pytz
+from django.core.cache import cache
+from django.db.models import Field
+
+from blog.counters import increment_counter
+
+FINGERPRINT_FIELDS = (
+    'title',
+    'slug_name',
+    'description',
+    'created_date',
+    'published_date',
+    'deleted_date',
+    'date',
+    'ordinal',
+    'reply_to',
+    'location',
+    'repost_of',
+    'content_type',
+    'content',
+)
+SKIPPED_SAVES_KEY = 'blog:entry-saves:skipped'
+
+
+def _normalize(field: Field, value: Any):
+    """The value as it would come back out of the database, in a form that always encodes the same way."""
+    value = field.to_python(value)
+    if isinstance(value, datetime):
+        return value.astimezone(pytz.utc).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def content_fingerprint(values: Iterable[Tuple[Field, Any]], tags: Iterable[str]) -> str:
+    """A hash of the fields in FINGERPRINT_FIELDS, given along with their values, and the ids of the tags."""
+    canonical = {field.name: _normalize(field, value) for field, value in values}
+    canonical['tags'] = sorted(tags)
+    return sha256(json.dumps(canonical, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def record_skipped_save():
+    increment_counter(SKIPPED_SAVES_KEY)
+
+
+def skipped_save_count() -> int:
+    return cache.get(SKIPPED_SAVES_KEY, 0)
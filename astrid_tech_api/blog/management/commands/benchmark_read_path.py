@@ -0,0 +1,115 @@
+import random
+from datetime import timedelta, date
+from statistics import median
+from time import perf_counter
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from astrid_tech.renderers import ORJSONRenderer
+from blog.models import Entry, Tag, Syndication, Attachment, utc_now
+from blog.serializer import PublicEntrySerializer, public_entry_prefetches, fast_public_entries, fast_entry_columns
+from comments.models import Comment
+from comments.serializers import CommentSerializer, fast_comments
+
+DESCRIPTION = 'A synthetic entry for benchmark_read_path'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark listing entries and comments through the serializers against the fast read path, on ' \
+           'synthetic rows that are rolled back afterwards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000], help='Row counts to time.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs to take the median of.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, rows, repeat, seed, **options):
+        rng = random.Random(seed)
+        with transaction.atomic():
+            self.stdout.write(f'Generating {max(rows)} entries and comments...')
+            self.generate(rng, max(rows))
+
+            for count in rows:
+                entries = Entry.objects.filter(description=DESCRIPTION).order_by('-date', '-ordinal')[:count]
+                self.compare(
+                    f'{count} entries', repeat,
+                    slow=lambda: JSONRenderer().render(
+                        PublicEntrySerializer(entries.prefetch_related(*public_entry_prefetches()), many=True).data
+                    ),
+                    fast=lambda: ORJSONRenderer().render(
+                        fast_public_entries(list(entries.values(*fast_entry_columns())))
+                    ),
+                )
+
+                comments = Comment.objects.filter(slug__startswith='/benchmark-').order_by('-time_authored')[:count]
+                self.compare(
+                    f'{count} comments', repeat,
+                    slow=lambda: JSONRenderer().render(CommentSerializer(comments, many=True).data),
+                    fast=lambda: ORJSONRenderer().render(fast_comments(comments)),
+                )
+
+            transaction.set_rollback(True)
+
+    def compare(self, label, repeat, slow, fast):
+        if slow() != fast():
+            self.stderr.write(self.style.ERROR(f'{label}: the fast read path output differs'))
+
+        slow_time = median(self.time(slow) for _ in range(repeat))
+        fast_time = median(self.time(fast) for _ in range(repeat))
+        self.stdout.write(
+            f'{label}: serializer {slow_time * 1e3:.1f}ms, fast path {fast_time * 1e3:.1f}ms '
+            f'({slow_time / fast_time:.1f}x)'
+        )
+
+    @staticmethod
+    def time(fn) -> float:
+        start = perf_counter()
+        fn()
+        return perf_counter() - start
+
+    @staticmethod
+    def generate(rng: random.Random, count: int):
+        now = utc_now()
+        # Far enough in the past not to collide with the (date, ordinal) of real entries
+        start = date(1900, 1, 1)
+        tags = Tag.objects.bulk_create([Tag(id=f'benchmark-{i}') for i in range(50)])
+        # Synthetic rows don't need rendering, so skip Entry.save() and its signals
+        Entry.objects.bulk_create([
+            Entry(
+                title=f'Entry #{i}',
+                slug_name=f'entry-{i}',
+                description=DESCRIPTION,
+                content='Some words ' * 100,
+                content_html='<p>' + 'Some words ' * 100 + '</p>',
+                date=start + timedelta(days=i // 10),
+                ordinal=i % 10,
+                published_date=now - timedelta(minutes=i),
+                updated_date=now,
+                visible=True,
+            )
+            for i in range(count)
+        ], batch_size=500)
+        # bulk_create doesn't set primary keys on every database
+        entries = list(Entry.objects.filter(description=DESCRIPTION).only('pk'))
+
+        Entry.tags.through.objects.bulk_create([
+            Entry.tags.through(entry_id=entry.pk, tag_id=tag.pk)
+            for entry in entries for tag in rng.sample(tags, rng.randint(0, 4))
+        ], batch_size=500)
+        Syndication.objects.bulk_create([
+            Syndication(entry=entry, location=f'https://example.com/{entry.pk}', status=Syndication.Status.SYNDICATED)
+            for entry in entries if rng.random() < 0.5
+        ], batch_size=500)
+        Attachment.objects.bulk_create([
+            Attachment(entry=entry, index=index, url=f'https://example.com/{entry.pk}-{index}.png',
+                       content_type='photo')
+            for entry in entries for index in range(rng.randint(0, 2))
+        ], batch_size=500)
+        Comment.objects.bulk_create([
+            Comment(slug=f'/benchmark-{i % 100}', ip_addr='127.0.0.1', author_email='someone@example.com',
+                    author_name='Someone', content_md='A comment ' * 10, content_html='<p>A comment</p>',
+                    removed=rng.random() < 0.1)
+            for i in range(count)
+        ], batch_size=500)
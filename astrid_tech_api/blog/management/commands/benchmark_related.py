@@ -0,0 +1,57 @@
+import random
+from itertools import accumulate
+from statistics import median
+from time import perf_counter
+from uuid import uuid4
+
+from django.core.management import BaseCommand
+
+from blog.related import RelatedIndex, RelatedDocument, tokenize
+
+
+class Command(BaseCommand):
+    help = 'Benchmark building, updating and querying the related entries index on a synthetic corpus.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=10000, help='Synthetic entries to index.')
+        parser.add_argument('--lookups', type=int, default=10000, help='Lookups to time.')
+        parser.add_argument('--updates', type=int, default=100, help='Incremental updates to time.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, entries, lookups, updates, seed, **options):
+        rng = random.Random(seed)
+        vocabulary = [f'word{i}' for i in range(20000)]
+        tags = [f'tag{i}' for i in range(200)]
+        # Zipf-ish word popularity, like real text
+        cum_weights = list(accumulate(1 / (i + 1) for i in range(len(vocabulary))))
+
+        def document(uuid):
+            words = rng.choices(vocabulary, cum_weights=cum_weights, k=300)
+            return RelatedDocument(uuid, tokenize(' '.join(words)), rng.sample(tags, rng.randint(1, 5)))
+
+        self.stdout.write(f'Generating {entries} entries...')
+        docs = [document(uuid4()) for _ in range(entries)]
+
+        index = RelatedIndex()
+        start = perf_counter()
+        index.build(docs)
+        self.stdout.write(f'Built the index in {perf_counter() - start:.2f}s')
+
+        uuids = [doc.uuid for doc in docs]
+        times = []
+        for uuid in rng.choices(uuids, k=lookups):
+            start = perf_counter()
+            index.related(uuid)
+            times.append(perf_counter() - start)
+        times.sort()
+        self.stdout.write(
+            f'Lookup: median {median(times) * 1e6:.1f}us, p99 {times[int(len(times) * 0.99)] * 1e6:.1f}us'
+        )
+
+        times = []
+        for uuid in rng.sample(uuids, min(updates, len(uuids))):
+            doc = document(uuid)
+            start = perf_counter()
+            index.update([doc])
+            times.append(perf_counter() - start)
+        self.stdout.write(f'Incremental update: median {median(times) * 1e3:.2f}ms, max {max(times) * 1e3:.2f}ms')
@@ -0,0 +1,25 @@
+import os
+
+from django.core.management import BaseCommand
+
+from blog.static_export import export_static
+
+
+class Command(BaseCommand):
+    help = 'Export the visible entries, tag indexes and feeds as static files, rewriting only what changed since ' \
+           'the last export into the directory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help='Directory to export into.')
+        parser.add_argument('--chunk-size', type=int, default=200, help='Entries to serialize per chunk.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Exporting processes to use. 1 exports in-process.')
+        parser.add_argument('--all', action='store_true',
+                            help='Serialize everything, ignoring the last export. Unchanged files still aren\'t '
+                                 'rewritten.')
+
+    def handle(self, *args, output_dir, chunk_size, workers, all, **options):
+        stats = export_static(output_dir, workers=workers, chunk_size=chunk_size, full=all)
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported to {output_dir}: {stats.written} written, {stats.unchanged} unchanged, {stats.removed} removed'
+        ))
@@ -0,0 +1,11 @@
+from django.core.management import BaseCommand
+
+from blog.archive import rebuild_archive
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the archive calendar summary table from scratch.'
+
+    def handle(self, *args, **options):
+        days = rebuild_archive()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the archive with {days} days of entries'))
@@ -0,0 +1,80 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Iterator
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from blog.detail_cache import invalidate_entries
+from blog.models import Entry, utc_now
+from blog.rendering import render_content, RENDERER_VERSION
+
+
+def render_chunk(rows: List[Tuple[int, str, str]]) -> List[Tuple[int, str]]:
+    return [(pk, render_content(content_type, content)) for pk, content_type, content in rows]
+
+
+class Command(BaseCommand):
+    help = 'Re-render the stored HTML of entries that were rendered with an older renderer version.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200, help='Entries to render per chunk.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Rendering processes to use. 1 renders in-process.')
+        parser.add_argument('--all', action='store_true', help='Re-render every entry, even up-to-date ones.')
+
+    def handle(self, *args, chunk_size, workers, all, **options):
+        qs = Entry.objects.all()
+        if not all:
+            qs = qs.filter(Q(content_html_version__isnull=True) | ~Q(content_html_version=RENDERER_VERSION))
+
+        # Snapshot the keys up front so that writing rendered chunks back can't disturb what we're iterating over.
+        pks = list(qs.order_by('pk').values_list('pk', flat=True))
+        chunks = self.load_chunks(pks, chunk_size)
+
+        if workers == 1:
+            total = self.store(map(render_chunk, chunks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                total = self.store(self.render_in_parallel(executor, chunks, max_in_flight=workers * 2))
+
+        self.stdout.write(self.style.SUCCESS(f'Re-rendered {total} entries with renderer version {RENDERER_VERSION}'))
+
+    @staticmethod
+    def load_chunks(pks: List[int], chunk_size: int) -> Iterator[List[Tuple[int, str, str]]]:
+        for i in range(0, len(pks), chunk_size):
+            chunk_pks = pks[i:i + chunk_size]
+            yield list(Entry.objects.filter(pk__in=chunk_pks).values_list('pk', 'content_type', 'content'))
+
+    @staticmethod
+    def render_in_parallel(executor, chunks, max_in_flight):
+        """Render chunks in the pool, keeping only a bounded number of them in memory at once."""
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(executor.submit(render_chunk, chunk))
+            if len(in_flight) >= max_in_flight:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+    def store(self, rendered_chunks) -> int:
+        total = 0
+        for rendered in rendered_chunks:
+            now = utc_now()
+            with transaction.atomic():
+                for pk, html in rendered:
+                    # The rendered representation changed, so consumers keyed on updated_date need to see it.
+                    Entry.objects.filter(pk=pk).update(
+                        content_html=html,
+                        content_html_version=RENDERER_VERSION,
+                        updated_date=now
+                    )
+            # Updating rows directly skips the signals, so drop cached details ourselves, once they're committed
+            invalidate_entries(
+                Entry.objects.filter(pk__in=[pk for pk, _ in rendered]).values_list('uuid', flat=True)
+            )
+            total += len(rendered)
+            self.stdout.write(f'Re-rendered {total} entries')
+        return total
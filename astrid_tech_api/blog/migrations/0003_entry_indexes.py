@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-17 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_auto_20210626_0722'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['published_date', 'deleted_date'], name='blog_entry_visibility_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(condition=models.Q(('deleted_date__isnull', True)), fields=['published_date'], name='blog_entry_undeleted_idx'),
+        ),
+    ]
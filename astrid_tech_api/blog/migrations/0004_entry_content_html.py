@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-17 03:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_entry_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='content_html',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='content_html_version',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations
+
+POSTGRES_FORWARDS = [
+    """
+    ALTER TABLE blog_entry ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'C')
+    ) STORED
+    """,
+    'CREATE INDEX blog_entry_search_idx ON blog_entry USING gin (search_vector)',
+]
+
+POSTGRES_BACKWARDS = [
+    'DROP INDEX blog_entry_search_idx',
+    'ALTER TABLE blog_entry DROP COLUMN search_vector',
+]
+
+SQLITE_FORWARDS = [
+    "CREATE VIRTUAL TABLE blog_entry_fts USING fts5(title, description, content, tokenize='porter unicode61')",
+    """
+    INSERT INTO blog_entry_fts (rowid, title, description, content)
+    SELECT id, coalesce(title, ''), coalesce(description, ''), content FROM blog_entry
+    """,
+]
+
+SQLITE_BACKWARDS = [
+    'DROP TABLE blog_entry_fts',
+]
+
+
+def run_for_vendor(postgres_sql, sqlite_sql):
+    def run(apps, schema_editor):
+        statements = {
+            'postgresql': postgres_sql,
+            'sqlite': sqlite_sql,
+        }.get(schema_editor.connection.vendor, [])
+        for sql in statements:
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_entry_content_html'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARDS, SQLITE_FORWARDS),
+            run_for_vendor(POSTGRES_BACKWARDS, SQLITE_BACKWARDS),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-17 03:39
+
+import blog.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_entry_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntryTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(editable=False, unique=True)),
+                ('deleted_date', models.DateTimeField(db_index=True, default=blog.models.utc_now)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='entry',
+            name='updated_date',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['deleted_date'], name='blog_entry_deleted_idx'),
+        ),
+    ]
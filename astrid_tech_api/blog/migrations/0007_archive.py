@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-17 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_entry_changes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveDay',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+                ('visible_count', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
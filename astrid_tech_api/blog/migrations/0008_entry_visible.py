@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-17 03:42
+
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+from django.db.models import Q, Count
+
+
+def materialize_visibility(apps, schema_editor):
+    Entry = apps.get_model('blog', 'Entry')
+    ArchiveDay = apps.get_model('blog', 'ArchiveDay')
+    now = datetime.now(timezone.utc)
+
+    Entry.objects.filter(
+        Q(published_date__isnull=False) & Q(published_date__lte=now) &
+        (Q(deleted_date__isnull=True) | Q(deleted_date__gt=now))
+    ).update(visible=True)
+
+    counts = Entry.objects.filter(visible=True).values_list('date').annotate(count=Count('pk')).order_by()
+    ArchiveDay.objects.all().delete()
+    ArchiveDay.objects.bulk_create(ArchiveDay(date=d, visible_count=count) for d, count in counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='visible',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['visible', 'date', 'ordinal'], name='blog_entry_visible_idx'),
+        ),
+        migrations.RunPython(materialize_visibility, migrations.RunPython.noop),
+    ]
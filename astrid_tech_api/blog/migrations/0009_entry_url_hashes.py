@@ -0,0 +1,60 @@
+# Generated by Django 3.2.25 on 2026-10-17 03:55
+
+from hashlib import sha256
+from urllib.parse import urlsplit, urlunsplit
+
+from django.db import migrations, models
+
+
+# Copies of blog.urlhash as of this migration, so that it keeps doing the same thing when that module changes
+def normalize_url(url):
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or 'https'
+    if scheme == 'http':
+        scheme = 'https'
+
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, 80, 443) else f'{host}:{port}'
+
+    return urlunsplit((scheme, netloc, parts.path.rstrip('/'), parts.query, ''))
+
+
+def url_hash(url):
+    if not url:
+        return None
+    digest = sha256(normalize_url(url).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big', signed=True)
+
+
+def hash_urls(apps, schema_editor):
+    Entry = apps.get_model('blog', 'Entry')
+    rows = Entry.objects.exclude(reply_to__isnull=True, repost_of__isnull=True).values_list('pk', 'reply_to', 'repost_of')
+    for pk, reply_to, repost_of in list(rows):
+        Entry.objects.filter(pk=pk).update(reply_to_hash=url_hash(reply_to), repost_of_hash=url_hash(repost_of))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_entry_visible'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='reply_to_hash',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='repost_of_hash',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(hash_urls, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 3.2.25 on 2026-10-17 04:20
+import json
+from collections import defaultdict
+from datetime import datetime, date
+from hashlib import sha256
+
+import pytz
+from django.db import migrations, models
+
+# Copies of blog.fingerprint as of this migration, so that it keeps doing the same thing when that module changes
+FINGERPRINT_FIELDS = (
+    'title',
+    'slug_name',
+    'description',
+    'created_date',
+    'published_date',
+    'deleted_date',
+    'date',
+    'ordinal',
+    'reply_to',
+    'location',
+    'repost_of',
+    'content_type',
+    'content',
+)
+
+
+def _normalize(field, value):
+    value = field.to_python(value)
+    if isinstance(value, datetime):
+        return value.astimezone(pytz.utc).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def content_fingerprint(values, tags):
+    canonical = {field.name: _normalize(field, value) for field, value in values}
+    canonical['tags'] = sorted(tags)
+    return sha256(json.dumps(canonical, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def fingerprint_entries(apps, schema_editor):
+    Entry = apps.get_model('blog', 'Entry')
+    fields = [Entry._meta.get_field(name) for name in FINGERPRINT_FIELDS]
+
+    tags = defaultdict(list)
+    for entry_id, tag_id in Entry.tags.through.objects.values_list('entry_id', 'tag_id'):
+        tags[entry_id].append(tag_id)
+
+    for row in list(Entry.objects.values('pk', *FINGERPRINT_FIELDS)):
+        fingerprint = content_fingerprint(((field, row[field.name]) for field in fields), tags[row['pk']])
+        Entry.objects.filter(pk=row['pk']).update(content_fingerprint=fingerprint)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_entry_url_hashes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='content_fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(fingerprint_entries, migrations.RunPython.noop),
+    ]
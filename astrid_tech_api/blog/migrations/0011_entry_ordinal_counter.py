@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-17 04:45
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def seed_counters(apps, schema_editor):
+    Entry = apps.get_model('blog', 'Entry')
+    EntryOrdinalCounter = apps.get_model('blog', 'EntryOrdinalCounter')
+    ordinals = Entry.objects.values_list('date').annotate(max_ordinal=Max('ordinal')).order_by()
+    EntryOrdinalCounter.objects.bulk_create(
+        (EntryOrdinalCounter(date=date, next_ordinal=max_ordinal + 1) for date, max_ordinal in ordinals),
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_entry_content_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntryOrdinalCounter',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+                ('next_ordinal', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
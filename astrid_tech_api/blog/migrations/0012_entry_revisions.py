@@ -0,0 +1,62 @@
+# Generated by Django 3.2.25 on 2026-10-17 05:10
+
+import zlib
+from hashlib import sha256
+
+import blog.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Copies of blog.deltas as of this migration, so that it keeps doing the same thing when that module changes
+def text_hash(text):
+    return sha256(text.encode('utf-8')).hexdigest()
+
+
+def encode_snapshot(text):
+    return zlib.compress(text.encode('utf-8'))
+
+
+def snapshot_entries(apps, schema_editor):
+    """Start every entry's history with a snapshot of its current content."""
+    Entry = apps.get_model('blog', 'Entry')
+    EntryRevision = apps.get_model('blog', 'EntryRevision')
+    rows = Entry.objects.values_list('pk', 'content', 'content_type', 'updated_date').iterator()
+    EntryRevision.objects.bulk_create(
+        (
+            EntryRevision(
+                entry_id=pk, number=1, snapshot_number=1, created_date=updated_date, content_type=content_type,
+                size=len(content), content_hash=text_hash(content), data=encode_snapshot(content),
+            )
+            for pk, content, content_type, updated_date in rows
+        ),
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_entry_ordinal_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntryRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.IntegerField()),
+                ('snapshot_number', models.IntegerField()),
+                ('created_date', models.DateTimeField(default=blog.models.utc_now)),
+                ('content_type', models.CharField(max_length=127)),
+                ('size', models.IntegerField()),
+                ('content_hash', models.CharField(max_length=64)),
+                ('data', models.BinaryField()),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='blog.entry')),
+            ],
+            options={
+                'unique_together': {('entry', 'number')},
+            },
+        ),
+        migrations.RunPython(snapshot_entries, migrations.RunPython.noop),
+    ]
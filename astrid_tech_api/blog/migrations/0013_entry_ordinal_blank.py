@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-17 05:30
+
+import blog.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_entry_revisions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='entry',
+            name='ordinal',
+            field=models.IntegerField(blank=True, default=blog.models.default_entry_ordinal),
+        ),
+    ]
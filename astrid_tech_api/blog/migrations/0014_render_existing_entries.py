@@ -0,0 +1,70 @@
+# Generated by Django 3.2.25 on 2026-10-17 05:45
+from datetime import datetime
+
+import bleach
+import markdown
+import pytz
+from django.db import migrations
+from django.db.models import Q
+from django.utils.html import escape, linebreaks
+
+# A copy of blog.rendering as of this migration, so that it keeps doing the same thing when that module changes
+RENDERER_VERSION = 2
+
+ALLOWED_TAGS = [
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'dd', 'del', 'div', 'dl', 'dt', 'em', 'figcaption', 'figure',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol', 'p', 'pre', 'span', 'strong', 'sub', 'sup',
+    'table', 'tbody', 'td', 'th', 'thead', 'tr', 'ul',
+]
+ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title'],
+    'abbr': ['title'],
+    'code': ['class'],
+    'img': ['src', 'alt', 'title'],
+    'td': ['colspan', 'rowspan'],
+    'th': ['colspan', 'rowspan'],
+}
+ALLOWED_PROTOCOLS = ['http', 'https', 'mailto']
+
+
+def sanitize_html(html):
+    return bleach.clean(html, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, protocols=ALLOWED_PROTOCOLS, strip=True)
+
+
+def render_content(content_type, content):
+    if content_type == 'text/markdown':
+        return sanitize_html(markdown.markdown(content))
+    if content_type == 'text/html':
+        return sanitize_html(content)
+    if content_type == 'text/plain':
+        return linebreaks(content, autoescape=True)
+    return escape(content)
+
+
+def render_entries(apps, schema_editor):
+    """
+    Render the entries that were never rendered, which 0004 left with empty content_html, and the ones rendered before
+    their HTML was sanitized.
+    """
+    Entry = apps.get_model('blog', 'Entry')
+    now = datetime.now(pytz.utc)
+    rows = Entry.objects \
+        .filter(Q(content_html_version__isnull=True) | Q(content_html_version__lt=RENDERER_VERSION)) \
+        .values_list('pk', 'content_type', 'content')
+    for pk, content_type, content in list(rows):
+        Entry.objects.filter(pk=pk).update(
+            content_html=render_content(content_type, content),
+            content_html_version=RENDERER_VERSION,
+            updated_date=now,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_entry_ordinal_blank'),
+    ]
+
+    operations = [
+        migrations.RunPython(render_entries, migrations.RunPython.noop),
+    ]
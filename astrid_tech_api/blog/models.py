@@ -2,9 +2,14 @@ from datetime import datetime, timezone
 from uuid import uuid4
 
 import pytz
+from django.db import transaction, IntegrityError
 from django.db.models import Model, TextField, CharField, UUIDField, IntegerField, DateTimeField, URLField, \
     ManyToManyField, ForeignKey, CASCADE, DateField, Max, TextChoices, BooleanField, RESTRICT, Q, QuerySet, FileField, \
-    ImageField
+    ImageField, Index, BigIntegerField, F, BinaryField
+
+from blog.fingerprint import content_fingerprint, record_skipped_save, FINGERPRINT_FIELDS
+from blog.rendering import render_content, RENDERER_VERSION
+from blog.urlhash import url_hash
 
 
 class SyndicationTarget(Model):
@@ -49,8 +54,16 @@ class UploadedFile(Model):
         unique_together = ('uuid', 'name')
 
 
+def format_entry_slug(date, ordinal, slug_name=None):
+    slug = f'/{date.year}/{date.month:02}/{date.day:02}/{ordinal}'
+    if slug_name:
+        slug += '/' + slug_name
+    return slug
+
+
 def default_entry_ordinal():
-    return Entry.get_next_ordinal()
+    """Ordinals are allocated by Entry.save(), once the entry's date is final."""
+    return None
 
 
 def utc_now():
@@ -61,18 +74,16 @@ class Entry(Model):
     @staticmethod
     def get_next_ordinal(date=None):
         """
-        Next ordinal for the given date, or None if no ordinal.
+        Next ordinal that would be allocated for the given date, without taking it.
         """
         if date is None:
-            date = datetime.utcnow()
+            date = utc_now()
+        return EntryOrdinalCounter.peek(date)
 
-        result = Entry.objects.filter(
-            date__exact=date.astimezone(pytz.utc)  # On the given date
-        ).aggregate(Max('ordinal'))['ordinal__max']  # Take the biggest ordinal
-
-        if result is None:
-            return 0  # First post of the date
-        return result + 1
+    @staticmethod
+    def max_ordinal(date):
+        """The biggest ordinal of any entry on the given date, or None if there are none."""
+        return Entry.objects.filter(date=date).aggregate(Max('ordinal'))['ordinal__max']
 
     uuid = UUIDField(unique=True, default=uuid4, editable=False)
 
@@ -84,15 +95,15 @@ class Entry(Model):
     """When this entry was originally created. Usually the same as the published date."""
     published_date = DateTimeField(default=utc_now, null=True, blank=True)
     """When this entry was, or will be, published."""
-    updated_date = DateTimeField(auto_now=True)
+    updated_date = DateTimeField(auto_now=True, db_index=True)
     """When this entry was last updated."""
     deleted_date = DateTimeField(null=True, blank=True)
     """When this entry was deleted or is scheduled to be deleted, or None if it is not deleted."""
 
     date = DateField(default=utc_now)
     """The date used in the slug."""
-    ordinal = IntegerField(null=False, default=default_entry_ordinal)
-    """The ordinal entry for the day."""
+    ordinal = IntegerField(null=False, blank=True, default=default_entry_ordinal)
+    """The ordinal entry for the day. Left blank, it is allocated when the entry is first saved."""
 
     reply_to = URLField(blank=True, null=True)
     """What this is in reply to."""
@@ -100,6 +111,10 @@ class Entry(Model):
     """What location this was created from, or related to."""
     repost_of = URLField(blank=True, null=True)
     """What this is a repost of."""
+    reply_to_hash = BigIntegerField(null=True, blank=True, editable=False, db_index=True)
+    """url_hash of reply_to, for finding the entries that reply to a URL."""
+    repost_of_hash = BigIntegerField(null=True, blank=True, editable=False, db_index=True)
+    """url_hash of repost_of, for finding the entries that repost a URL."""
     tags = ManyToManyField(Tag, blank=True)
     """Tags this entry is associated with."""
 
@@ -107,14 +122,99 @@ class Entry(Model):
     """The content type, as a mimetype."""
     content = TextField(blank=True, default='')
     """The content of this entry."""
+    content_html = TextField(blank=True, default='')
+    """The content of this entry, rendered into HTML when it was saved."""
+    content_html_version = IntegerField(null=True, blank=True, editable=False)
+    """The RENDERER_VERSION content_html was rendered with, or None if it was never rendered."""
+    content_fingerprint = CharField(max_length=64, blank=True, default='', editable=False)
+    """The blog.fingerprint hash of this entry as of its last write, for skipping saves that change nothing."""
+
+    visible = BooleanField(default=False, editable=False)
+    """
+    Whether this entry is publicly visible right now. Set from published_date and deleted_date when saved, and flipped
+    by the publish_scheduled_entries task when a scheduled publish or delete passes.
+    """
 
     @staticmethod
-    def objects_visible_at(dt) -> 'QuerySet[Entry]':
-        return Entry.objects.filter(
+    def visible_at_q(dt) -> Q:
+        return (
             Q(published_date__isnull=False) & Q(published_date__lte=dt) &
             (Q(deleted_date__isnull=True) | Q(deleted_date__gt=dt))
         )
 
+    @staticmethod
+    def objects_visible_at(dt) -> 'QuerySet[Entry]':
+        return Entry.objects.filter(Entry.visible_at_q(dt))
+
+    @staticmethod
+    def objects_visible() -> 'QuerySet[Entry]':
+        """Entries that are visible right now, according to the materialized visible flag."""
+        return Entry.objects.filter(visible=True)
+
+    def render_content(self):
+        self.content_html = render_content(self.content_type, self.content)
+        self.content_html_version = RENDERER_VERSION
+
+    def update_url_hashes(self):
+        self.reply_to_hash = url_hash(self.reply_to)
+        self.repost_of_hash = url_hash(self.repost_of)
+
+    def compute_fingerprint(self, tags=None) -> str:
+        """The fingerprint of this entry, with the given tag ids, or with its tags in the database if not given."""
+        if tags is None:
+            tags = [] if self.pk is None else self.tags.values_list('id', flat=True)
+        return content_fingerprint(
+            ((self._meta.get_field(name), getattr(self, name)) for name in FINGERPRINT_FIELDS),
+            tags
+        )
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.ordinal is None:
+            self.ordinal = EntryOrdinalCounter.allocate(self.date)
+            ordinal_allocated = True
+        else:
+            ordinal_allocated = False
+
+        fingerprinted = update_fields is None or bool(set(FINGERPRINT_FIELDS) & set(update_fields))
+        if fingerprinted:
+            fingerprint = self.compute_fingerprint()
+            # Saves of existing entries that only touch fingerprinted fields write nothing if none of them changed, as
+            # long as the derived fields don't need updating either
+            if not self._state.adding \
+                    and fingerprint == self.content_fingerprint \
+                    and (update_fields is None or set(update_fields) <= set(FINGERPRINT_FIELDS)) \
+                    and self.content_html_version == RENDERER_VERSION \
+                    and self.visible == self.is_visible_at(utc_now()):
+                record_skipped_save()
+                return
+            self.content_fingerprint = fingerprint
+
+        # Ordinals picked by hand must not be handed out again by the counter
+        if not ordinal_allocated and \
+                (update_fields is None or self._state.adding or {'date', 'ordinal'} & set(update_fields)):
+            EntryOrdinalCounter.reserve(self.date, self.ordinal)
+
+        if update_fields is None:
+            self.render_content()
+            self.update_url_hashes()
+            self.visible = self.is_visible_at(utc_now())
+        else:
+            update_fields = set(update_fields)
+            if {'content', 'content_type'} & update_fields:
+                self.render_content()
+                update_fields |= {'content_html', 'content_html_version'}
+            if {'published_date', 'deleted_date'} & update_fields:
+                self.visible = self.is_visible_at(utc_now())
+                update_fields.add('visible')
+            if {'reply_to', 'repost_of'} & update_fields:
+                self.update_url_hashes()
+                update_fields |= {'reply_to_hash', 'repost_of_hash'}
+            if fingerprinted:
+                update_fields.add('content_fingerprint')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
     def set_all_dates(self, dt: datetime):
         """Helper to set all the date fields to the given date. Mostly useful for testing and little else."""
         self.date = dt.astimezone(timezone.utc)
@@ -125,19 +225,17 @@ class Entry(Model):
 
     @property
     def slug(self):
-        slug = f'/{self.date.year}/{self.date.month:02}/{self.date.day:02}/{self.ordinal}'
-        if self.slug_name:
-            slug += '/' + self.slug_name
-        return slug
+        return format_entry_slug(self.date, self.ordinal, self.slug_name)
 
     def is_visible_at(self, date):
+        """The same check as visible_at_q, on this instance."""
         date = date.astimezone(pytz.utc)
-        if self.published_date is not None and self.published_date.astimezone(pytz.utc) <= date:
-            return True
-        return self.deleted_date is None or self.deleted_date.astimezone(pytz.utc) >= date
+        if self.published_date is None or self.published_date.astimezone(pytz.utc) > date:
+            return False
+        return self.deleted_date is None or self.deleted_date.astimezone(pytz.utc) > date
 
     def is_visible(self):
-        return self.is_visible_at(datetime.now())
+        return self.is_visible_at(utc_now())
 
     def __str__(self):
         if self.title:
@@ -146,6 +244,137 @@ class Entry(Model):
 
     class Meta:
         unique_together = ('date', 'ordinal')
+        indexes = [
+            # Covers the published/deleted range checks in objects_visible_at
+            Index(fields=['published_date', 'deleted_date'], name='blog_entry_visibility_idx'),
+            # Most entries are never deleted, so the common branch only needs the published date
+            Index(fields=['published_date'], condition=Q(deleted_date__isnull=True), name='blog_entry_undeleted_idx'),
+            # Lets the changes feed find entries whose scheduled deletion passed since the last sync
+            Index(fields=['deleted_date'], name='blog_entry_deleted_idx'),
+            # Read paths filter on the visible flag and list newest first
+            Index(fields=['visible', 'date', 'ordinal'], name='blog_entry_visible_idx'),
+        ]
+
+
+class EntryTombstone(Model):
+    """
+    Records that a visible entry was hidden or removed from the database, so that clients syncing changes can learn
+    it's gone.
+    """
+    uuid = UUIDField(unique=True, editable=False)
+    """The UUID of the entry that went away."""
+    deleted_date = DateTimeField(default=utc_now, db_index=True)
+    """When the entry last went away."""
+
+    def __str__(self):
+        return str(self.uuid)
+
+
+class ArchiveDay(Model):
+    """
+    How many entries are visible on a given date. A summary table maintained by blog.archive, so that the archive
+    calendar doesn't need to go through every entry.
+    """
+    date = DateField(primary_key=True)
+    """The entry date this row counts."""
+    visible_count = IntegerField(default=0)
+    """How many visible entries have this date."""
+
+    def __str__(self):
+        return f'{self.date}: {self.visible_count}'
+
+
+class EntryOrdinalCounter(Model):
+    """
+    The next ordinal to hand out on a given date, so that allocating one is a single-row update instead of a MAX() over
+    the date's entries.
+
+    A counter is created the first time an ordinal is allocated on its date, starting after the biggest ordinal already
+    there. Allocating locks the row until the surrounding transaction ends, so concurrent allocations on the same date
+    queue up behind each other and never get the same ordinal, while other dates aren't affected. Ordinals of entries
+    that fail to save are skipped rather than reused.
+    """
+    date = DateField(primary_key=True)
+    """The entry date this row counts."""
+    next_ordinal = IntegerField(default=0)
+    """The ordinal the next entry on this date gets."""
+
+    @staticmethod
+    def to_date(value):
+        # Unsaved entries may still hold the datetime their date defaulted to
+        return Entry._meta.get_field('date').to_python(value)
+
+    @classmethod
+    def allocate(cls, date) -> int:
+        """Take the next ordinal on the given date."""
+        date = cls.to_date(date)
+        # Nothing to roll back to if this fails, so joining an outer transaction doesn't need a savepoint
+        with transaction.atomic(savepoint=False):
+            if not cls.objects.filter(date=date).update(next_ordinal=F('next_ordinal') + 1):
+                first = cls._seed(date)
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(date=date, next_ordinal=first + 1)
+                    return first
+                except IntegrityError:  # Another allocation created the counter first
+                    cls.objects.filter(date=date).update(next_ordinal=F('next_ordinal') + 1)
+            # Our update holds the row lock, so nobody else can have moved the counter since
+            return cls.objects.filter(date=date).values_list('next_ordinal', flat=True).get() - 1
+
+    @classmethod
+    def reserve(cls, date, ordinal: int):
+        """Make sure the counter on the given date is past the given ordinal."""
+        cls.objects.filter(date=cls.to_date(date), next_ordinal__lte=ordinal).update(next_ordinal=ordinal + 1)
+
+    @classmethod
+    def peek(cls, date) -> int:
+        """The ordinal the next allocation on the given date would get."""
+        date = cls.to_date(date)
+        result = cls.objects.filter(date=date).values_list('next_ordinal', flat=True).first()
+        if result is None:
+            return cls._seed(date)
+        return result
+
+    @staticmethod
+    def _seed(date) -> int:
+        result = Entry.max_ordinal(date)
+        if result is None:
+            return 0  # First post of the date
+        return result + 1
+
+    def __str__(self):
+        return f'{self.date}: {self.next_ordinal}'
+
+
+class EntryRevision(Model):
+    """
+    A revision of an entry's content, recorded by blog.revisions whenever the content changes. The content itself is
+    in data, in one of the blog.deltas encodings.
+    """
+    entry = ForeignKey(Entry, on_delete=CASCADE, related_name='revisions')
+    number = IntegerField()
+    """Which revision of the entry this is, counting up from 1."""
+    snapshot_number = IntegerField()
+    """The revision holding the snapshot this one's chain of deltas starts from. Its own number if it's a snapshot."""
+    created_date = DateTimeField(default=utc_now)
+    content_type = CharField(max_length=127)
+    """The content type of the entry at this revision."""
+    size = IntegerField()
+    """The length of the content at this revision, in characters."""
+    content_hash = CharField(max_length=64)
+    """The blog.deltas.text_hash of the content at this revision."""
+    data = BinaryField()
+    """The content as a compressed snapshot if this is a snapshot, or else as a delta against the previous revision."""
+
+    @property
+    def is_snapshot(self):
+        return self.number == self.snapshot_number
+
+    def __str__(self):
+        return f'{self.entry_id} #{self.number}'
+
+    class Meta:
+        unique_together = ('entry', 'number')
 
 
 class Attachment(Model):
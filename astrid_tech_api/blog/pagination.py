@@ -0,0 +1,148 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date
+from typing import Optional, NamedTuple, Tuple
+from urllib.parse import urlencode, parse_qs
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+class EntryCursor(NamedTuple):
+    date: date
+    ordinal: int
+    reverse: bool
+
+
+def entry_key(entry) -> Tuple[date, int]:
+    """The (date, ordinal) of an entry, or of a .values() row of one."""
+    if isinstance(entry, dict):
+        return entry['date'], entry['ordinal']
+    return entry.date, entry.ordinal
+
+
+class EntryKeysetPagination(BasePagination):
+    """
+    Opaque cursor pagination over entries, keyed on the unique (date, ordinal) pair.
+
+    Every page is a range scan starting right after the (date, ordinal) of the previous page, so deep pages cost the
+    same as the first one and entries inserted while a client is paging never shift the pages it has yet to read.
+
+    Pagination is opt-in: it only kicks in when the client sends a cursor or a page size, so existing consumers
+    keep receiving the plain list.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 20
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        if cursor is None:
+            queryset = queryset.order_by('-date', '-ordinal')
+        elif cursor.reverse:
+            queryset = queryset.filter(
+                Q(date__gt=cursor.date) | Q(date=cursor.date, ordinal__gt=cursor.ordinal)
+            ).order_by('date', 'ordinal')
+        else:
+            queryset = queryset.filter(
+                Q(date__lt=cursor.date) | Q(date=cursor.date, ordinal__lt=cursor.ordinal)
+            ).order_by('-date', '-ordinal')
+
+        # Fetch one more than we need to see whether there is anything beyond this page.
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if cursor is not None and cursor.reverse:
+            self.page.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_previous = cursor is not None
+            self.has_next = has_more
+
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def decode_cursor(self, request) -> Optional[EntryCursor]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            tokens = parse_qs(urlsafe_b64decode(encoded.encode('ascii')).decode('ascii'), keep_blank_values=True)
+            return EntryCursor(
+                date=date.fromisoformat(tokens['d'][0]),
+                ordinal=int(tokens['o'][0]),
+                reverse=tokens.get('r', ['0'])[0] == '1',
+            )
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor: EntryCursor) -> str:
+        tokens = {'d': cursor.date.isoformat(), 'o': cursor.ordinal}
+        if cursor.reverse:
+            tokens['r'] = '1'
+        encoded = urlsafe_b64encode(urlencode(tokens).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(EntryCursor(*entry_key(self.page[-1]), reverse=False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(EntryCursor(*entry_key(self.page[0]), reverse=True))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class EntrySearchPagination(PageNumberPagination):
+    """
+    Search results are ordered by relevance rather than by (date, ordinal), so they're paged by page number instead.
+    Nobody reads that deep into search results anyways.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
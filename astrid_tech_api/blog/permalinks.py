@@ -0,0 +1,35 @@
+"""
+Resolving entry permalinks (/yyyy/mm/dd/ordinal/slug-name) to entries.
+
+The date and ordinal pick the entry out through their index. The slug name is only there for readers, so a stale one
+still resolves, and callers redirect to the current one.
+"""
+import re
+from datetime import date
+from typing import NamedTuple, Optional
+
+from blog.models import Entry
+
+_PATH = re.compile(r'^/?(\d{4})/(\d{1,2})/(\d{1,2})/(\d+)(?:/([^/]+))?/?$')
+
+
+class EntryPath(NamedTuple):
+    date: date
+    ordinal: int
+    slug_name: Optional[str]
+
+    @classmethod
+    def parse(cls, path: str) -> Optional['EntryPath']:
+        match = _PATH.match(path)
+        if match is None:
+            return None
+        year, month, day, ordinal, slug_name = match.groups()
+        try:
+            return cls(date(int(year), int(month), int(day)), int(ordinal), slug_name)
+        except ValueError:
+            return None
+
+
+def resolve_entry_path(qs, path: EntryPath) -> Optional[Entry]:
+    """Find the entry in qs that the path points to through the (date, ordinal) index, whatever its slug name."""
+    return qs.filter(date=path.date, ordinal=path.ordinal).first()
@@ -0,0 +1,63 @@
+"""
+Hard-deleting entries whose deletion passed more than DELETED_ENTRY_RETENTION ago.
+
+Soft-deleted entries are kept around for a while so that a deletion can be undone, then purged along with their
+attachments and syndications. Purging goes in batches of at most PURGE_BATCH_SIZE entries, each in its own short
+transaction, so the entry table is never locked for longer than it takes to delete one batch. Batches are found through
+the deleted_date index, and rows another transaction is holding are skipped until the next run rather than waited on.
+
+Purged entries go through the usual post_delete signals, so each one leaves a tombstone for the changes feed and drops
+out of the search index, permalinks and caches.
+"""
+from datetime import timedelta, datetime
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from structlog import get_logger
+
+from blog.models import Entry
+
+logger = get_logger(__name__)
+
+DELETED_ENTRY_RETENTION = timedelta(days=getattr(settings, 'BLOG_DELETED_ENTRY_RETENTION_DAYS', 30))
+"""How long entries are kept after their deleted_date before they're purged."""
+PURGE_BATCH_SIZE = getattr(settings, 'BLOG_PURGE_BATCH_SIZE', 100)
+"""The most entries deleted in one transaction."""
+
+
+def expired_entries(now: datetime):
+    return Entry.objects.filter(deleted_date__lt=now - DELETED_ENTRY_RETENTION)
+
+
+def purge_batch(now: datetime, batch_size: int) -> int:
+    """Purge up to batch_size expired entries in one transaction, and return how many were purged."""
+    with transaction.atomic():
+        pks = list(
+            expired_entries(now)
+                .select_for_update(skip_locked=True)
+                .order_by('deleted_date')
+                .values_list('pk', flat=True)[:batch_size]
+        )
+        if pks:
+            Entry.objects.filter(pk__in=pks).delete()
+    return len(pks)
+
+
+def purge_expired_entries(now: datetime, batch_size: Optional[int] = None, max_batches: Optional[int] = None) -> int:
+    """
+    Purge expired entries batch by batch until none are left, or until max_batches batches were purged. Returns how
+    many entries were purged.
+    """
+    if batch_size is None:
+        batch_size = PURGE_BATCH_SIZE
+
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        purged = purge_batch(now, batch_size)
+        total += purged
+        batches += 1
+        if purged < batch_size:
+            break
+    return total
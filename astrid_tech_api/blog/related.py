@@ -0,0 +1,327 @@
+"""
+Related entries, by shared tags and similar text.
+
+Two entries are scored by the tags they share, each weighted by one over how many entries have it like the frontend's
+resistor similarity, plus the cosine similarity of their TF-IDF vectors. Each entry's top RELATED_COUNT neighbors are
+kept precomputed, so a lookup is just reading a list.
+
+The index is sparse throughout: inverted posting lists from each tag and term to the entries that have it, turned into
+NumPy arrays on demand. Scoring one entry against all the others is a single bincount over the postings of its tags
+and terms, so changing an entry only rescores that entry and the entries that listed it, never all pairs. The IDF
+weights of untouched entries aren't recomputed when the corpus changes, so they drift a little until the index is
+rebuilt, which happens whenever a process starts.
+
+Each process keeps its own index, brought up to date through the same watermark the changes feed uses. Writes in this
+process mark it stale so they show up on the next lookup; writes elsewhere show up within REFRESH_INTERVAL.
+"""
+import re
+from collections import Counter, defaultdict
+from datetime import datetime
+from threading import RLock
+from time import monotonic
+from typing import NamedTuple, Dict, List, Optional, Iterable, Tuple, Set, Sequence
+from uuid import UUID
+
+import numpy as np
+from django.conf import settings
+
+from blog.changes import SyncToken, get_entry_changes
+from blog.models import Entry, utc_now
+
+RELATED_COUNT = getattr(settings, 'BLOG_RELATED_COUNT', 10)
+"""How many related entries to keep for each entry."""
+REFRESH_INTERVAL = getattr(settings, 'BLOG_RELATED_REFRESH_SECONDS', 60)
+"""How often, at most, to check the database for entries changed by other processes."""
+MAX_TERMS = 64
+"""Only an entry's highest weighted terms are kept, which bounds how many postings scoring it touches."""
+TEXT_WEIGHT = 1.0
+"""How much text similarity counts for relative to shared tags."""
+
+_WORD = re.compile(r'[^\W\d_]{3,}')
+
+_EMPTY_ROWS = np.zeros(0, dtype=np.int64)
+_EMPTY_SCORES = np.zeros(0, dtype=np.float64)
+
+
+def tokenize(*texts: Optional[str]) -> Counter:
+    return Counter(word for text in texts if text for word in _WORD.findall(text.lower()))
+
+
+class RelatedDocument(NamedTuple):
+    uuid: UUID
+    terms: Counter
+    tags: Sequence[str]
+
+
+class RelatedIndex:
+    def __init__(self, k: int = RELATED_COUNT):
+        self.k = k
+        self.lock = RLock()
+        self.clear()
+
+    def clear(self):
+        self.row_of: Dict[UUID, int] = {}
+        self.uuids: List[Optional[UUID]] = []
+        self.free_rows: List[int] = []
+
+        self.vocabulary: Dict[str, int] = {}
+        self.doc_freq = np.zeros(0, dtype=np.int64)
+        self.doc_count = 0
+
+        # Per row
+        self.doc_terms: List[np.ndarray] = []
+        self.doc_vectors: List[Tuple[np.ndarray, np.ndarray]] = []
+        self.doc_tags: List[Tuple[str, ...]] = []
+        self.neighbors: List[Tuple[np.ndarray, np.ndarray]] = []
+        self.listed_by: List[Set[int]] = []
+
+        # Inverted postings, and their array forms
+        self.term_postings: Dict[int, Dict[int, float]] = {}
+        self.tag_postings: Dict[str, Dict[int, None]] = {}
+        self._term_arrays: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._tag_arrays: Dict[str, np.ndarray] = {}
+
+    def __len__(self):
+        return len(self.row_of)
+
+    def build(self, documents: Iterable[RelatedDocument]):
+        """Index the given documents from scratch."""
+        with self.lock:
+            self.clear()
+            pending = []
+            for doc in documents:
+                row = self._allocate(doc.uuid)
+                pending.append((row, doc, self._count_terms(row, doc.terms)))
+            # Weigh terms only once every document's been counted, so that they all see the same IDF
+            for row, doc, term_ids in pending:
+                self._index_vector(row, term_ids, doc.terms)
+                self._index_tags(row, doc.tags)
+            for row in self.row_of.values():
+                self._rank_neighbors(row)
+
+    def update(self, documents: Iterable[RelatedDocument] = (), removed: Iterable[UUID] = ()):
+        """Add or replace the given documents and drop the removed ones, rescoring only the entries affected."""
+        with self.lock:
+            for uuid in removed:
+                row = self.row_of.pop(uuid, None)
+                if row is None:
+                    continue
+                affected = set(self.listed_by[row])
+                self._unindex(row)
+                self._set_neighbors(row, _EMPTY_ROWS, _EMPTY_SCORES)
+                self.uuids[row] = None
+                self.free_rows.append(row)
+                for other in affected:
+                    self._rank_neighbors(other)
+
+            for doc in documents:
+                row = self.row_of.get(doc.uuid)
+                if row is None:
+                    row = self._allocate(doc.uuid)
+                    affected = set()
+                else:
+                    affected = set(self.listed_by[row])
+                    self._unindex(row)
+                self._index_vector(row, self._count_terms(row, doc.terms), doc.terms)
+                self._index_tags(row, doc.tags)
+
+                scores = self._scores(row)
+                self._set_neighbors(row, *self._top(scores))
+                # Entries that listed this one may have a better candidate now that its score changed
+                for other in affected - {row}:
+                    self._rank_neighbors(other)
+                # Similarity is symmetric, so everyone else only needs to consider this one entry
+                for other in np.flatnonzero(scores > 0).tolist():
+                    if other not in affected:
+                        self._offer(other, row, scores[other])
+
+    def related(self, uuid: UUID) -> List[Tuple[UUID, float]]:
+        """The entries most related to the given one, most related first, with their scores."""
+        with self.lock:
+            row = self.row_of.get(uuid)
+            if row is None:
+                return []
+            rows, scores = self.neighbors[row]
+            return [(self.uuids[r], s) for r, s in zip(rows.tolist(), scores.tolist())]
+
+    def _allocate(self, uuid: UUID) -> int:
+        if self.free_rows:
+            row = self.free_rows.pop()
+            self.uuids[row] = uuid
+        else:
+            row = len(self.uuids)
+            self.uuids.append(uuid)
+            self.doc_terms.append(_EMPTY_ROWS)
+            self.doc_vectors.append((_EMPTY_ROWS, _EMPTY_SCORES))
+            self.doc_tags.append(())
+            self.neighbors.append((_EMPTY_ROWS, _EMPTY_SCORES))
+            self.listed_by.append(set())
+        self.row_of[uuid] = row
+        return row
+
+    def _count_terms(self, row: int, terms: Counter) -> np.ndarray:
+        ids = np.fromiter((self.vocabulary.setdefault(t, len(self.vocabulary)) for t in terms), dtype=np.int64,
+                          count=len(terms))
+        if len(self.vocabulary) > len(self.doc_freq):
+            self.doc_freq = np.concatenate([
+                self.doc_freq, np.zeros(max(len(self.vocabulary), 2 * len(self.doc_freq)) - len(self.doc_freq),
+                                        dtype=np.int64)
+            ])
+        self.doc_freq[ids] += 1
+        self.doc_count += 1
+        self.doc_terms[row] = ids
+        return ids
+
+    def _index_vector(self, row: int, ids: np.ndarray, terms: Counter):
+        tf = np.fromiter(terms.values(), dtype=np.float64, count=len(terms))
+        idf = np.log((1 + self.doc_count) / (1 + self.doc_freq[ids]))
+        weights = (1 + np.log(tf)) * idf if len(ids) else _EMPTY_SCORES
+
+        if len(ids) > MAX_TERMS:
+            keep = np.argpartition(weights, -MAX_TERMS)[-MAX_TERMS:]
+            ids, weights = ids[keep], weights[keep]
+        nonzero = weights > 0
+        ids, weights = ids[nonzero], weights[nonzero]
+        norm = np.linalg.norm(weights)
+        if norm > 0:
+            weights = weights / norm
+
+        self.doc_vectors[row] = (ids, weights)
+        for term, weight in zip(ids.tolist(), weights.tolist()):
+            self.term_postings.setdefault(term, {})[row] = weight
+            self._term_arrays.pop(term, None)
+
+    def _index_tags(self, row: int, tags: Sequence[str]):
+        self.doc_tags[row] = tuple(set(tags))
+        for tag in self.doc_tags[row]:
+            self.tag_postings.setdefault(tag, {})[row] = None
+            self._tag_arrays.pop(tag, None)
+
+    def _unindex(self, row: int):
+        self.doc_freq[self.doc_terms[row]] -= 1
+        self.doc_count -= 1
+        self.doc_terms[row] = _EMPTY_ROWS
+
+        for term in self.doc_vectors[row][0].tolist():
+            postings = self.term_postings[term]
+            del postings[row]
+            if not postings:
+                del self.term_postings[term]
+            self._term_arrays.pop(term, None)
+        self.doc_vectors[row] = (_EMPTY_ROWS, _EMPTY_SCORES)
+
+        for tag in self.doc_tags[row]:
+            postings = self.tag_postings[tag]
+            del postings[row]
+            if not postings:
+                del self.tag_postings[tag]
+            self._tag_arrays.pop(tag, None)
+        self.doc_tags[row] = ()
+
+    def _term_rows(self, term: int) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._term_arrays.get(term)
+        if arrays is None:
+            postings = self.term_postings[term]
+            arrays = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float64, count=len(postings)),
+            )
+            self._term_arrays[term] = arrays
+        return arrays
+
+    def _tag_rows(self, tag: str) -> np.ndarray:
+        rows = self._tag_arrays.get(tag)
+        if rows is None:
+            postings = self.tag_postings[tag]
+            rows = self._tag_arrays[tag] = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+        return rows
+
+    def _scores(self, row: int) -> np.ndarray:
+        """How related every row is to the given one, as a sparse matrix-vector product over the postings."""
+        all_rows, all_weights = [], []
+        for tag in self.doc_tags[row]:
+            rows = self._tag_rows(tag)
+            all_rows.append(rows)
+            all_weights.append(np.full(len(rows), 1 / len(rows)))
+
+        ids, weights = self.doc_vectors[row]
+        for term, weight in zip(ids.tolist(), weights.tolist()):
+            rows, term_weights = self._term_rows(term)
+            all_rows.append(rows)
+            all_weights.append(term_weights * (weight * TEXT_WEIGHT))
+
+        if not all_rows:
+            return np.zeros(len(self.uuids))
+        scores = np.bincount(np.concatenate(all_rows), weights=np.concatenate(all_weights), minlength=len(self.uuids))
+        scores[row] = 0
+        return scores
+
+    def _top(self, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > self.k:
+            candidates = candidates[np.argpartition(scores[candidates], -self.k)[-self.k:]]
+        # Best first, ties broken by row so that results are stable
+        top = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return top, scores[top]
+
+    def _set_neighbors(self, row: int, rows: np.ndarray, scores: np.ndarray):
+        for old in self.neighbors[row][0].tolist():
+            self.listed_by[old].discard(row)
+        self.neighbors[row] = (rows, scores)
+        for new in rows.tolist():
+            self.listed_by[new].add(row)
+
+    def _rank_neighbors(self, row: int):
+        self._set_neighbors(row, *self._top(self._scores(row)))
+
+    def _offer(self, row: int, candidate: int, score: float):
+        """Put candidate in row's neighbors if it scores well enough to be there."""
+        rows, scores = self.neighbors[row]
+        if len(rows) >= self.k and score <= scores[-1]:
+            return
+        rows, scores = np.append(rows, candidate), np.append(scores, score)
+        order = np.lexsort((rows, -scores))[:self.k]
+        self._set_neighbors(row, rows[order], scores[order])
+
+
+def load_documents(qs) -> Iterable[RelatedDocument]:
+    tags = defaultdict(list)
+    for uuid, tag in Entry.tags.through.objects.filter(entry__in=qs).values_list('entry__uuid', 'tag_id'):
+        tags[uuid].append(tag)
+    for uuid, title, description, content in qs.values_list('uuid', 'title', 'description', 'content').iterator():
+        yield RelatedDocument(uuid, tokenize(title, description, content), tags[uuid])
+
+
+class EntryRelatedIndex(RelatedIndex):
+    """A RelatedIndex of the visible entries, kept up to date from the database."""
+
+    def clear(self):
+        super().clear()
+        self.watermark: Optional[datetime] = None
+        self.last_checked = float('-inf')
+
+    def mark_stale(self):
+        self.last_checked = float('-inf')
+
+    def refresh(self):
+        if monotonic() - self.last_checked < REFRESH_INTERVAL:
+            return
+
+        with self.lock:
+            if monotonic() - self.last_checked < REFRESH_INTERVAL:  # Someone else refreshed while we waited
+                return
+            now = utc_now()
+            if self.watermark is None:
+                self.build(load_documents(Entry.objects_visible()))
+            else:
+                changes = get_entry_changes(SyncToken(self.watermark), now)
+                self.update(load_documents(changes.updated), removed=changes.deleted)
+            self.watermark = now
+            self.last_checked = monotonic()
+
+    def related(self, uuid: UUID) -> List[Tuple[UUID, float]]:
+        self.refresh()
+        return super().related(uuid)
+
+
+related_index = EntryRelatedIndex()
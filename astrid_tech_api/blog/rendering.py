@@ -0,0 +1,37 @@
+import bleach
+import markdown
+from django.utils.html import escape, linebreaks
+
+RENDERER_VERSION = 2
+"""Bump this whenever render_content's output changes, so that stored HTML gets re-rendered."""
+
+ALLOWED_TAGS = [
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'dd', 'del', 'div', 'dl', 'dt', 'em', 'figcaption', 'figure',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol', 'p', 'pre', 'span', 'strong', 'sub', 'sup',
+    'table', 'tbody', 'td', 'th', 'thead', 'tr', 'ul',
+]
+ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title'],
+    'abbr': ['title'],
+    'code': ['class'],
+    'img': ['src', 'alt', 'title'],
+    'td': ['colspan', 'rowspan'],
+    'th': ['colspan', 'rowspan'],
+}
+ALLOWED_PROTOCOLS = ['http', 'https', 'mailto']
+
+
+def sanitize_html(html: str) -> str:
+    """Strip everything but the tags, attributes and link protocols that entries are allowed to use."""
+    return bleach.clean(html, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, protocols=ALLOWED_PROTOCOLS, strip=True)
+
+
+def render_content(content_type: str, content: str) -> str:
+    """Render entry content of the given mimetype into sanitized HTML."""
+    if content_type == 'text/markdown':
+        return sanitize_html(markdown.markdown(content))
+    if content_type == 'text/html':
+        return sanitize_html(content)
+    if content_type == 'text/plain':
+        return linebreaks(content, autoescape=True)
+    return escape(content)
@@ -0,0 +1,91 @@
+"""
+Finding local entries that reply to or repost a URL, and threading local replies under a local entry.
+
+reply_to and repost_of are looked up through indexed hashes of their normalized URLs. A local entry can be linked to
+with or without its slug name, so replies to it are found by the hashes of both spellings. Threads are fetched one
+level at a time, so a thread costs one query per level rather than one per reply.
+"""
+from typing import List, Dict, Optional, Iterator
+from uuid import UUID
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+
+from blog.models import Entry, format_entry_slug
+from blog.permalinks import EntryPath
+from blog.site import SITE_URL
+from blog.urlhash import url_hash, normalize_url
+
+REPLY_THREAD_DEPTH = getattr(settings, 'BLOG_REPLY_THREAD_DEPTH', 5)
+"""How many levels of local replies entry details include."""
+
+REPLY_FIELDS = ['uuid', 'title', 'date', 'ordinal', 'slug_name', 'published_date']
+
+
+def entry_url_hashes(date, ordinal, slug_name) -> List[int]:
+    """The hashes of every URL a local entry can be linked to by."""
+    urls = [SITE_URL + format_entry_slug(date, ordinal)]
+    if slug_name:
+        urls.append(SITE_URL + format_entry_slug(date, ordinal, slug_name))
+    return [url_hash(url) for url in urls]
+
+
+def local_entry_path(url: Optional[str]) -> Optional[EntryPath]:
+    """The entry path the URL points to, if it points to an entry on this site."""
+    if not url:
+        return None
+    site = normalize_url(SITE_URL)
+    normalized = normalize_url(url)
+    if not normalized.startswith(site + '/'):
+        return None
+    return EntryPath.parse(normalized[len(site):])
+
+
+def entries_referencing(qs: QuerySet, url: str) -> QuerySet:
+    """The entries that reply to or repost the given URL."""
+    h = url_hash(url)
+    return qs.filter(Q(reply_to_hash=h) | Q(repost_of_hash=h))
+
+
+def reply_thread(entry: Entry, depth: int = REPLY_THREAD_DEPTH) -> List[Dict]:
+    """The visible local replies to the entry, each with its own replies nested under it, oldest first."""
+    roots = []
+    # Maps the hash of a URL of each entry on the current level to where its replies go
+    level = {h: roots for h in entry_url_hashes(entry.date, entry.ordinal, entry.slug_name)}
+    seen = {entry.uuid}
+
+    for _ in range(depth):
+        if not level:
+            break
+        rows = Entry.objects_visible() \
+            .filter(reply_to_hash__in=list(level)) \
+            .order_by('date', 'ordinal') \
+            .values(*REPLY_FIELDS, 'reply_to_hash')
+
+        next_level = {}
+        for row in rows:
+            if row['uuid'] in seen:  # Reply loops are silly, but possible
+                continue
+            seen.add(row['uuid'])
+            node = {**row, 'replies': []}
+            level[node.pop('reply_to_hash')].append(node)
+            for h in entry_url_hashes(row['date'], row['ordinal'], row['slug_name']):
+                next_level[h] = node['replies']
+        level = next_level
+
+    return roots
+
+
+def local_ancestors(reply_to: Optional[str], depth: int = REPLY_THREAD_DEPTH) -> Iterator[UUID]:
+    """The local entries whose threads an entry replying to the given URL shows up in, nearest first."""
+    seen = set()
+    for _ in range(depth):
+        path = local_entry_path(reply_to)
+        if path is None:
+            return
+        parent = Entry.objects.filter(date=path.date, ordinal=path.ordinal).values_list('uuid', 'reply_to').first()
+        if parent is None or parent[0] in seen:
+            return
+        seen.add(parent[0])
+        yield parent[0]
+        reply_to = parent[1]
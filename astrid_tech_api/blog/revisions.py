@@ -0,0 +1,88 @@
+"""
+The revision history of entry content.
+
+Whenever an entry's content changes, an EntryRevision is recorded. Most revisions only store a compressed delta
+against the revision before them. One in every REVISION_SNAPSHOT_INTERVAL revisions stores the whole content as a
+compressed snapshot instead. So does any revision whose delta would be no smaller than its snapshot. Reconstructing a
+revision takes its snapshot plus at most REVISION_SNAPSHOT_INTERVAL - 1 deltas, fetched together in one query.
+
+Deltas are taken against the content the entry was loaded with. If that isn't what the latest revision holds, for
+instance because the content was changed through QuerySet.update(), the new revision is a snapshot.
+"""
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.functions import Length
+
+from blog.deltas import text_hash, encode_snapshot, decode_snapshot, encode_delta, apply_delta
+from blog.models import Entry, EntryRevision
+
+REVISION_SNAPSHOT_INTERVAL = getattr(settings, 'BLOG_REVISION_SNAPSHOT_INTERVAL', 20)
+"""The most revisions in a chain of deltas, counting the snapshot it starts from."""
+
+REVISION_FIELDS = ['number', 'created_date', 'content_type', 'size', 'content_hash', 'snapshot_number']
+
+
+def record_revision(entry: Entry, previous_content: Optional[str]) -> Optional[EntryRevision]:
+    """
+    Record the entry's current content as a new revision, given the content it had before, or None if that isn't known.
+    Returns the revision, or None if the latest revision already has this content.
+    """
+    with transaction.atomic():
+        # Lock the entry's row, so that concurrent saves number their revisions one after the other
+        list(Entry.objects.select_for_update().filter(pk=entry.pk).values_list('pk'))
+        return _record_revision(entry, previous_content)
+
+
+def _record_revision(entry: Entry, previous_content: Optional[str]) -> Optional[EntryRevision]:
+    content = entry.content or ''
+    content_hash = text_hash(content)
+    latest = EntryRevision.objects.filter(entry=entry).order_by('-number') \
+        .only('number', 'snapshot_number', 'content_type', 'content_hash').first()
+    if latest is not None and latest.content_hash == content_hash and latest.content_type == entry.content_type:
+        return None
+
+    revision = EntryRevision(
+        entry=entry,
+        number=1 if latest is None else latest.number + 1,
+        content_type=entry.content_type,
+        size=len(content),
+        content_hash=content_hash,
+        data=encode_snapshot(content),
+    )
+    revision.snapshot_number = revision.number
+    if latest is not None \
+            and revision.number - latest.snapshot_number < REVISION_SNAPSHOT_INTERVAL \
+            and previous_content is not None \
+            and text_hash(previous_content) == latest.content_hash:
+        delta = encode_delta(previous_content, content)
+        if len(delta) < len(revision.data):
+            revision.data = delta
+            revision.snapshot_number = latest.snapshot_number
+
+    revision.save()
+    return revision
+
+
+def list_revisions(entry: Entry) -> QuerySet:
+    """The entry's revisions newest first, as dicts of REVISION_FIELDS and stored_size, without loading any content."""
+    return EntryRevision.objects.filter(entry=entry).order_by('-number') \
+        .values(*REVISION_FIELDS, stored_size=Length('data'))
+
+
+def reconstruct_revision(entry: Entry, number: int) -> Optional[str]:
+    """The entry's content as of the given revision, or None if there's no such revision."""
+    snapshot_number = EntryRevision.objects.filter(entry=entry, number=number) \
+        .values_list('snapshot_number', flat=True).first()
+    if snapshot_number is None:
+        return None
+
+    chain = EntryRevision.objects.filter(entry=entry, number__range=(snapshot_number, number)) \
+        .order_by('number').values_list('data', flat=True)
+    snapshot, *deltas = chain
+    content = decode_snapshot(snapshot)
+    for delta in deltas:
+        content = apply_delta(content, delta)
+    return content
@@ -0,0 +1,89 @@
+"""
+Full-text search over entries.
+
+On Postgres, entries carry a stored, generated ``search_vector`` tsvector column with a GIN index, so the database
+keeps it up to date by itself. SQLite (development and tests) has no tsvector, so a ``blog_entry_fts`` FTS5 shadow
+table is kept up to date from Entry's save and delete signals instead. Both are created by the blog migrations rather
+than declared on the model, which is why the queries here are raw SQL. Other databases fall back to matching every
+word with icontains, without ranking.
+
+The SQLite shadow table only follows writes that go through Entry.save() and delete(). QuerySet.update() and
+bulk_create() send no signals, so the paths that use them, like touching retagged entries or flipping visibility, must
+leave title, description and content alone. Writes that do change those have to call index_entry() themselves.
+"""
+import re
+from functools import reduce
+from operator import and_
+
+from django.db import connections
+from django.db.models import QuerySet, FloatField, BooleanField, Q, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'blog_entry_fts'
+
+_WORD = re.compile(r'\w+')
+
+
+def to_fts5_query(query: str) -> str:
+    """Turn free-form user input into an FTS5 query that ANDs every word, so that stray syntax can't break it."""
+    return ' '.join(f'"{word}"' for word in _WORD.findall(query))
+
+
+def search_entries(qs: QuerySet, query: str) -> QuerySet:
+    """Filter entries to the ones matching the query, ranked by relevance and then newest first."""
+    table = qs.model._meta.db_table
+    vendor = connections[qs.db].vendor
+
+    if vendor == 'postgresql':
+        tsquery = "websearch_to_tsquery('english', %s)"
+        qs = qs.filter(
+            RawSQL(f'{table}.search_vector @@ {tsquery}', (query,), output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f'ts_rank({table}.search_vector, {tsquery})', (query,), output_field=FloatField())
+        )
+    elif vendor == 'sqlite':
+        match = to_fts5_query(query)
+        if not match:
+            return qs.none()
+        qs = qs.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+        ).annotate(
+            # bm25() is lower for better matches. Weights are for title, description, and content respectively.
+            search_rank=RawSQL(
+                f'SELECT -bm25({FTS_TABLE}, 10.0, 5.0, 1.0) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {table}.id',
+                (match,),
+                output_field=FloatField()
+            )
+        )
+    else:
+        words = _WORD.findall(query)
+        if not words:
+            return qs.none()
+        qs = qs.filter(reduce(and_, (
+            Q(title__icontains=word) | Q(description__icontains=word) | Q(content__icontains=word)
+            for word in words
+        ))).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    return qs.order_by('-search_rank', '-date', '-ordinal')
+
+
+def index_entry(entry):
+    """Bring the SQLite shadow table up to date with the given entry. Postgres maintains its index by itself."""
+    connection = connections[entry._state.db or 'default']
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [entry.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description, content) VALUES (%s, %s, %s, %s)',
+            [entry.pk, entry.title or '', entry.description or '', entry.content or '']
+        )
+
+
+def unindex_entry(entry_pk, using='default'):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [entry_pk])
@@ -0,0 +1,95 @@
+"""
+Short codes for the aay.tw link shortener.
+
+An entry's short code is 'e' followed by the NewBase60 encoding of epoch_days * 60 + ordinal, which is what
+aay_tw_shortener decodes and what the frontend prints. Only the first 60 entries of a day have one.
+"""
+from datetime import date, timedelta
+from typing import Optional, NamedTuple, Dict
+
+from django.core.cache import cache
+
+from blog.conditional import EntryVersion
+from blog.models import Entry, format_entry_slug
+
+SXG_ALPHABET = '0123456789ABCDEFGHJKLMNPQRSTUVWXYZ_abcdefghijkmnopqrstuvwxyz'
+SXG_VALUES = {c: i for i, c in enumerate(SXG_ALPHABET)}
+SXG_VALUES.update({'I': 1, 'l': 1, 'O': 0})  # Common typos, as in Tantek's reference implementation
+
+EPOCH = date(1970, 1, 1)
+MAX_CODE_LENGTH = 12
+ORDINALS_PER_DAY = 60
+
+MANIFEST_CACHE_TIMEOUT = 24 * 60 * 60
+"""Manifests are cached under their version's ETag, so this only bounds how long old ones linger."""
+
+
+def num_to_sxg(n: int) -> str:
+    if n == 0:
+        return '0'
+    digits = []
+    while n > 0:
+        n, digit = divmod(n, 60)
+        digits.append(SXG_ALPHABET[digit])
+    return ''.join(reversed(digits))
+
+
+def sxg_to_num(sxg: str) -> Optional[int]:
+    n = 0
+    for c in sxg:
+        digit = SXG_VALUES.get(c)
+        if digit is None:
+            return None
+        n = n * 60 + digit
+    return n
+
+
+class EntryShortCode(NamedTuple):
+    date: date
+    ordinal: int
+
+    @classmethod
+    def parse(cls, code: str) -> Optional['EntryShortCode']:
+        if not 1 < len(code) <= MAX_CODE_LENGTH or code[0] != 'e':
+            return None
+        n = sxg_to_num(code[1:])
+        if n is None:
+            return None
+
+        days, ordinal = divmod(n, ORDINALS_PER_DAY)
+        try:
+            return cls(EPOCH + timedelta(days=days), ordinal)
+        except OverflowError:
+            return None
+
+    def __str__(self):
+        return 'e' + num_to_sxg((self.date - EPOCH).days * ORDINALS_PER_DAY + self.ordinal)
+
+
+def entry_short_code(entry_date: date, ordinal: int) -> Optional[str]:
+    """The short code of the entry at the given date and ordinal, if it can have one."""
+    if not 0 <= ordinal < ORDINALS_PER_DAY or entry_date < EPOCH:
+        return None
+    return str(EntryShortCode(entry_date, ordinal))
+
+
+def build_short_code_manifest() -> Dict[str, str]:
+    """Map the short code of every visible entry to its slug, in one pass over the visible index."""
+    rows = Entry.objects_visible() \
+        .filter(ordinal__gte=0, ordinal__lt=ORDINALS_PER_DAY, date__gte=EPOCH) \
+        .order_by('date', 'ordinal') \
+        .values_list('date', 'ordinal', 'slug_name')
+    return {
+        str(EntryShortCode(d, ordinal)): format_entry_slug(d, ordinal, slug_name)
+        for d, ordinal, slug_name in rows
+    }
+
+
+def get_short_code_manifest(version: EntryVersion) -> Dict[str, str]:
+    """The manifest for the given version of the visible entries, built at most once per version."""
+    key = f'blog:short-code-manifest:{version.etag}'
+    manifest = cache.get(key)
+    if manifest is None:
+        manifest = build_short_code_manifest()
+        cache.set(key, manifest, timeout=MANIFEST_CACHE_TIMEOUT)
+    return manifest
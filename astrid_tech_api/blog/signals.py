@@ -0,0 +1,187 @@
+from django.db.models import Prefetch
+from django.db.models.signals import post_save, post_delete, m2m_changed, post_init, pre_delete
+from django.dispatch import receiver
+
+from blog import search
+from blog.related import related_index
+from blog.replies import local_ancestors
+from blog.revisions import record_revision
+from blog.archive import recount_archive_days
+from blog.changes import record_tombstone
+from blog.detail_cache import invalidate_entries
+from blog.facets import invalidate_tag_facets
+from blog.fingerprint import FINGERPRINT_FIELDS
+from blog.models import Entry, Tag, Syndication, Attachment, utc_now
+from blog.visibility import entry_visibility_changed
+
+
+@receiver(post_save, sender=Entry)
+def index_saved_entry(sender, instance: Entry, **kwargs):
+    search.index_entry(instance)
+
+
+@receiver(post_delete, sender=Entry)
+def unindex_deleted_entry(sender, instance: Entry, using, **kwargs):
+    search.unindex_entry(instance.pk, using=using)
+
+
+@receiver(post_delete, sender=Entry)
+def record_deleted_entry_tombstone(sender, instance: Entry, using, **kwargs):
+    # Hidden entries got their tombstone when they were hidden, if they were ever visible at all
+    if instance.visible:
+        record_tombstone(instance, using=using)
+
+
+@receiver(post_save, sender=Entry)
+def record_hidden_entry_tombstone(sender, instance: Entry, using, **kwargs):
+    if instance._loaded_visible and not instance.visible:
+        record_tombstone(instance, using=using)
+    instance._loaded_visible = instance.visible
+
+
+@receiver(post_init, sender=Entry)
+def remember_loaded_entry_date(sender, instance: Entry, **kwargs):
+    # Read straight from __dict__ so that deferred fields aren't loaded just for this
+    instance._archive_loaded_date = instance.__dict__.get('date')
+    instance._loaded_reply_to = instance.__dict__.get('reply_to')
+    instance._loaded_content = instance.__dict__.get('content'), instance.__dict__.get('content_type')
+    instance._loaded_visible = instance.__dict__.get('visible')
+
+
+@receiver(post_save, sender=Entry)
+def recount_saved_entry_archive(sender, instance: Entry, **kwargs):
+    recount_archive_days({instance._archive_loaded_date, instance.date})
+    instance._archive_loaded_date = instance.date
+
+
+@receiver(post_delete, sender=Entry)
+def recount_deleted_entry_archive(sender, instance: Entry, **kwargs):
+    recount_archive_days({instance.date})
+
+
+@receiver(entry_visibility_changed, sender=Entry)
+def recount_flipped_entry_archive(sender, dates, **kwargs):
+    recount_archive_days(dates)
+
+
+@receiver(post_save, sender=Entry)
+@receiver(post_delete, sender=Entry)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(m2m_changed, sender=Entry.tags.through)
+@receiver(entry_visibility_changed, sender=Entry)
+def invalidate_tag_facets_on_change(sender, **kwargs):
+    invalidate_tag_facets()
+
+
+@receiver(post_save, sender=Entry)
+@receiver(post_delete, sender=Entry)
+def invalidate_saved_entry_detail(sender, instance: Entry, **kwargs):
+    invalidate_entries([instance.uuid])
+
+
+@receiver(post_save, sender=Syndication)
+@receiver(post_delete, sender=Syndication)
+@receiver(post_save, sender=Attachment)
+@receiver(post_delete, sender=Attachment)
+def invalidate_parent_entry_detail(sender, instance, **kwargs):
+    invalidate_entries(Entry.objects.filter(pk=instance.entry_id).values_list('uuid', flat=True))
+
+
+@receiver(post_save, sender=Syndication)
+@receiver(post_delete, sender=Syndication)
+@receiver(post_save, sender=Attachment)
+@receiver(post_delete, sender=Attachment)
+def touch_parent_entry(sender, instance, **kwargs):
+    # Syndications and attachments are part of the entry's representation, so validators and syncs need to see them
+    Entry.objects.filter(pk=instance.entry_id).update(updated_date=utc_now())
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)  # Deleting a tag removes it from entries without sending m2m_changed
+def invalidate_tagged_entry_details(sender, instance: Tag, **kwargs):
+    invalidate_entries(Entry.objects.filter(tags=instance).values_list('uuid', flat=True))
+
+
+@receiver(m2m_changed, sender=Entry.tags.through)
+def invalidate_retagged_entry_details(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:  # entry.tags.add(...) and friends
+        if action == 'post_clear' or action.startswith('post_') and pk_set:
+            invalidate_entries([instance.uuid])
+    elif action == 'pre_clear':  # tag.entry_set.clear(), while we can still tell which entries had the tag
+        invalidate_entries(Entry.objects.filter(tags=instance).values_list('uuid', flat=True))
+    elif action.startswith('post_') and pk_set:  # tag.entry_set.add(...) and friends
+        invalidate_entries(Entry.objects.filter(pk__in=pk_set).values_list('uuid', flat=True))
+
+
+@receiver(entry_visibility_changed, sender=Entry)
+def invalidate_flipped_entry_details(sender, pks, **kwargs):
+    invalidate_entries(Entry.objects.filter(pk__in=pks).values_list('uuid', flat=True))
+
+
+def touch_entries(qs, without_tag=None):
+    """Bump the updated_date of retagged entries, and refingerprint them with their new tags."""
+    now = utc_now()
+    entries = qs.only('pk', *FINGERPRINT_FIELDS).prefetch_related(Prefetch('tags', queryset=Tag.objects.only('id')))
+    for entry in entries:
+        tags = [tag.id for tag in entry.tags.all() if tag.id != without_tag]
+        Entry.objects.filter(pk=entry.pk).update(updated_date=now, content_fingerprint=entry.compute_fingerprint(tags))
+
+
+@receiver(m2m_changed, sender=Entry.tags.through)
+def touch_retagged_entries(sender, instance, action, reverse, pk_set, **kwargs):
+    # Tags are part of an entry's representation, so consumers keyed on updated_date need to see retagging
+    if not reverse:
+        # Adding only tags the entry already has still sends post_add, with an empty pk_set
+        if action == 'post_clear' or action.startswith('post_') and pk_set:
+            touch_entries(Entry.objects.filter(pk=instance.pk))
+    elif action == 'pre_clear':  # The tag is about to be gone from all of these
+        touch_entries(Entry.objects.filter(tags=instance), without_tag=instance.pk)
+    elif action.startswith('post_') and pk_set:
+        touch_entries(Entry.objects.filter(pk__in=pk_set))
+
+
+@receiver(post_save, sender=Entry)
+@receiver(post_delete, sender=Entry)
+@receiver(m2m_changed, sender=Entry.tags.through)
+@receiver(entry_visibility_changed, sender=Entry)
+def mark_related_index_stale(sender, **kwargs):
+    related_index.mark_stale()
+
+
+def touch_thread_ancestors(uuids):
+    """Bump the updated_date of entries whose reply threads changed, since entry details include their threads."""
+    if uuids:
+        Entry.objects.filter(uuid__in=uuids).update(updated_date=utc_now())
+
+
+@receiver(post_save, sender=Entry)
+@receiver(post_delete, sender=Entry)
+def invalidate_reply_thread_details(sender, instance: Entry, **kwargs):
+    # The entries this one replies to, directly or not, include it in their threads
+    ancestors = set(local_ancestors(instance.reply_to))
+    if instance._loaded_reply_to != instance.reply_to:
+        ancestors.update(local_ancestors(instance._loaded_reply_to))
+        instance._loaded_reply_to = instance.reply_to
+    touch_thread_ancestors(ancestors)
+    invalidate_entries(ancestors)
+
+
+@receiver(entry_visibility_changed, sender=Entry)
+def invalidate_flipped_reply_thread_details(sender, pks, **kwargs):
+    ancestors = set()
+    for reply_to in Entry.objects.filter(pk__in=pks, reply_to_hash__isnull=False).values_list('reply_to', flat=True):
+        ancestors.update(local_ancestors(reply_to))
+    touch_thread_ancestors(ancestors)
+    invalidate_entries(ancestors)
+
+
+@receiver(post_save, sender=Entry)
+def record_saved_entry_revision(sender, instance: Entry, created, update_fields, **kwargs):
+    if update_fields is not None and not {'content', 'content_type'} & set(update_fields):
+        return
+    content = instance.__dict__.get('content'), instance.__dict__.get('content_type')
+    if created or content != instance._loaded_content:
+        loaded_content, _ = instance._loaded_content
+        record_revision(instance, None if created else loaded_content)
+        instance._loaded_content = content
@@ -0,0 +1,6 @@
+"""
+Where the public site lives, for building links to its pages.
+"""
+from django.conf import settings
+
+SITE_URL = getattr(settings, 'BLOG_SITE_URL', 'https://astrid.tech')
@@ -0,0 +1,117 @@
+"""
+Sitemaps of every visible entry, split into shards by date.
+
+The protocol caps a sitemap at 50,000 URLs, so the entries are split into shards, each covering a contiguous range of
+dates with at most SHARD_SIZE entries, and a sitemap index lists the shards. The boundaries come from the per-day
+counts in ArchiveDay, so finding them never touches the entries themselves.
+
+A shard is generated by streaming (date, ordinal, slug name, updated date) rows, and cached gzipped under the
+version of its date range. It is only regenerated when an entry in that range changes.
+"""
+import gzip
+from datetime import date, datetime
+from typing import List, NamedTuple, Optional, Iterator, Tuple
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q, QuerySet, Max
+
+from blog.conditional import EntryVersion
+from blog.models import Entry, ArchiveDay, format_entry_slug
+from blog.site import SITE_URL
+
+SHARD_SIZE = getattr(settings, 'BLOG_SITEMAP_SHARD_SIZE', 50000)
+SHARD_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+"""Shard keys change whenever their entries do, so this only bounds how long stale shards linger."""
+STREAM_CHUNK_SIZE = 2000
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+class SitemapShard(NamedTuple):
+    start: date
+    """The first date in this shard."""
+    end: Optional[date]
+    """The first date after this shard, or None if this is the last one."""
+
+    def filter(self, qs: QuerySet) -> QuerySet:
+        qs = qs.filter(date__gte=self.start)
+        if self.end is not None:
+            qs = qs.filter(date__lt=self.end)
+        return qs
+
+    def entries(self) -> QuerySet:
+        return self.filter(Entry.objects_visible())
+
+    def version(self) -> EntryVersion:
+        return EntryVersion.of(self.entries())
+
+
+def sitemap_shards() -> List[SitemapShard]:
+    """Split the visible entries into date ranges of at most SHARD_SIZE entries, oldest first."""
+    starts = []
+    in_shard = 0
+    days = ArchiveDay.objects.filter(visible_count__gt=0).order_by('date').values_list('date', 'visible_count')
+    for day, count in days.iterator():
+        if not starts or in_shard + count > SHARD_SIZE:
+            starts.append(day)
+            in_shard = 0
+        in_shard += count
+    return [SitemapShard(start, end) for start, end in zip(starts, starts[1:] + [None])]
+
+
+def find_shard(start: date) -> Optional[SitemapShard]:
+    return next((shard for shard in sitemap_shards() if shard.start == start), None)
+
+
+def w3c_datetime(dt: datetime) -> str:
+    return dt.isoformat(timespec='seconds')
+
+
+def shard_lines(shard: SitemapShard) -> Iterator[str]:
+    yield XML_HEADER
+    yield f'<urlset xmlns="{SITEMAP_NS}">\n'
+    rows = shard.entries() \
+        .order_by('date', 'ordinal') \
+        .values_list('date', 'ordinal', 'slug_name', 'updated_date') \
+        .iterator(chunk_size=STREAM_CHUNK_SIZE)
+    for entry_date, ordinal, slug_name, updated_date in rows:
+        loc = escape(SITE_URL + format_entry_slug(entry_date, ordinal, slug_name))
+        yield f'<url><loc>{loc}</loc><lastmod>{w3c_datetime(updated_date)}</lastmod></url>\n'
+    yield '</urlset>\n'
+
+
+def get_shard_gzipped(shard: SitemapShard, version: EntryVersion) -> bytes:
+    """The gzipped sitemap of the shard, generated at most once per version of its entries."""
+    key = f'blog:sitemap:{shard.start}:{shard.end}:{version.etag}'
+    content = cache.get(key)
+    if content is None:
+        content = gzip.compress(''.join(shard_lines(shard)).encode('utf-8'))
+        cache.set(key, content, timeout=SHARD_CACHE_TIMEOUT)
+    return content
+
+
+def shard_versions(shards: List[SitemapShard]) -> List[Tuple[SitemapShard, Optional[datetime]]]:
+    """The last time each shard changed, in one aggregate query."""
+    if not shards:
+        return []
+    result = Entry.objects_visible().aggregate(**{
+        f'shard_{i}': Max('updated_date', filter=Q(date__gte=shard.start) & (
+            Q(date__lt=shard.end) if shard.end is not None else Q()
+        ))
+        for i, shard in enumerate(shards)
+    })
+    return [(shard, result[f'shard_{i}']) for i, shard in enumerate(shards)]
+
+
+def render_index(shard_urls: List[Tuple[str, Optional[datetime]]]) -> str:
+    lines = [XML_HEADER, f'<sitemapindex xmlns="{SITEMAP_NS}">\n']
+    for url, lastmod in shard_urls:
+        line = f'<sitemap><loc>{escape(url)}</loc>'
+        if lastmod is not None:
+            line += f'<lastmod>{w3c_datetime(lastmod)}</lastmod>'
+        lines.append(line + '</sitemap>\n')
+    lines.append('</sitemapindex>\n')
+    return ''.join(lines)
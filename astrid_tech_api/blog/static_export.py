@@ -0,0 +1,302 @@
+"""
+Exporting the visible entries, tag indexes and feeds as static files for the frontend build to read, instead of it
+pulling every entry over HTTP.
+
+The output directory is laid out like the API:
+
+    entries/<yyyy>/<mm>/<dd>/<ordinal>.json    An entry as the export endpoint serializes it
+    tags/<tag>.json                            A tag and the entries tagged with it, newest first
+    feeds/{rss.xml,atom.xml,feed.json}         The site feeds
+    feeds/tags/<tag>/...                       The tag feeds
+    manifest.json                              What the last export wrote
+
+Exports are incremental. The manifest records the key each file was exported at, the updated_date for entries and the
+version of the entries in them for feeds, along with the hash of its content. Entries and feeds are only serialized
+again when their key moved, files are only rewritten when their content actually changed, and files of entries that
+are no longer visible are removed. Entries are serialized, encoded and written by chunk in a process pool, whose
+workers load the entries of their chunk themselves.
+
+Tags whose ids can't be used as a file name, like ones containing a slash, are left out of the export.
+"""
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha256
+from typing import List, Tuple, Dict, Optional, Iterator, NamedTuple, Union
+
+from django.db import connections
+from django.db.models import Prefetch, Count, Max
+from rest_framework.utils.encoders import JSONEncoder
+
+from blog.conditional import EntryVersion
+from blog.feeds import RssEntryFeed, AtomEntryFeed, JSONEntryFeed, FEED_TITLE
+from blog.models import Entry, Tag, format_entry_slug
+from blog.serializer import PublicEntrySerializer, public_entry_prefetches
+from blog.site import SITE_URL
+from blog.views.feeds import FEED_LIMIT
+
+EXPORT_FORMAT = 2
+"""Bump this whenever the files change shape, so that the next export rewrites all of them."""
+MANIFEST_NAME = 'manifest.json'
+SCAN_CHUNK_SIZE = 2000
+
+FEED_FILES = {
+    RssEntryFeed: 'rss.xml',
+    AtomEntryFeed: 'atom.xml',
+    JSONEntryFeed: 'feed.json',
+}
+
+FileContent = Union[str, dict]
+
+
+class ExportStats(NamedTuple):
+    written: int
+    unchanged: int
+    removed: int
+
+
+def entry_export_path(date, ordinal: int) -> str:
+    return 'entries' + format_entry_slug(date, ordinal) + '.json'
+
+
+def is_safe_file_name(name: str) -> bool:
+    """Whether the name can be used as a single path segment without leaving the directory it's in."""
+    return name not in ('', '.', '..') and not any(c in name for c in ('/', '\\', '\0'))
+
+
+def output_path(out_dir: str, path: str) -> str:
+    """The full path of a file in the output directory. Raises ValueError if it isn't inside the directory."""
+    out_dir = os.path.realpath(out_dir)
+    full_path = os.path.realpath(os.path.join(out_dir, path))
+    if os.path.commonpath([out_dir, full_path]) != out_dir:
+        raise ValueError(f'{path} is outside of {out_dir}')
+    return full_path
+
+
+def encode_file(content: FileContent) -> bytes:
+    if isinstance(content, str):
+        return content.encode('utf-8')
+    return json.dumps(content, cls=JSONEncoder, ensure_ascii=False).encode('utf-8')
+
+
+def write_files(out_dir: str, files: List[Tuple[str, FileContent]], hashes: Dict[str, str]) -> \
+        List[Tuple[str, str, bool]]:
+    """
+    Encode the files and write the ones whose hash isn't the known one. Returns the path and hash of every file, and
+    whether it was written.
+    """
+    results = []
+    for path, content in files:
+        data = encode_file(content)
+        digest = sha256(data).hexdigest()
+        full_path = output_path(out_dir, path)
+        written = hashes.get(path) != digest or not os.path.exists(full_path)
+        if written:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            # Write aside and move into place, so that an interrupted export never leaves a truncated file behind
+            with open(full_path + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(full_path + '.tmp', full_path)
+        results.append((path, digest, written))
+    return results
+
+
+def serialize_entries(pks: List[int]) -> List[Tuple[str, FileContent]]:
+    entries = Entry.objects.filter(pk__in=pks).prefetch_related(*public_entry_prefetches())
+    return [(entry_export_path(entry.date, entry.ordinal), PublicEntrySerializer(entry).data) for entry in entries]
+
+
+def export_entry_chunk(out_dir: str, pks: List[int], hashes: Dict[str, str]) -> List[Tuple[str, str, bool]]:
+    return write_files(out_dir, serialize_entries(pks), hashes)
+
+
+def start_worker():
+    # Forked workers inherit the parent's database connections. Using or closing those would disturb the parent, so
+    # drop them and let the worker open its own.
+    for connection in connections.all():
+        connection.connection = None
+
+
+def export_in_parallel(executor, out_dir: str, chunks, max_in_flight: int):
+    """Export chunks in the pool, keeping only a bounded number of them in flight at once."""
+    in_flight = deque()
+    for pks, hashes in chunks:
+        in_flight.append(executor.submit(export_entry_chunk, out_dir, pks, hashes))
+        if len(in_flight) >= max_in_flight:
+            yield in_flight.popleft().result()
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+class ExportManifest:
+    def __init__(self, files: Optional[Dict[str, Dict]] = None):
+        self.files = files if files is not None else {}
+        """Maps the path of every exported file to its key and the hash of its content."""
+
+    @classmethod
+    def load(cls, out_dir: str) -> 'ExportManifest':
+        """The manifest of the last export into the directory, or an empty one if there is no usable one."""
+        try:
+            with open(os.path.join(out_dir, MANIFEST_NAME), encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if data.get('format') != EXPORT_FORMAT:
+            return cls()
+        return cls(data['files'])
+
+    def save(self, out_dir: str):
+        path = os.path.join(out_dir, MANIFEST_NAME)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'format': EXPORT_FORMAT, 'files': self.files}, f)
+        os.replace(path + '.tmp', path)
+
+
+class StaticExporter:
+    def __init__(self, out_dir: str, previous: ExportManifest, full: bool = False):
+        self.out_dir = out_dir
+        self.previous = previous
+        self.full = full
+        self.manifest = ExportManifest()
+        self.written = 0
+        self.unchanged = 0
+
+    def keep_if_fresh(self, path: str, key: str) -> bool:
+        """Carry the file over from the previous export if it was exported at the same key and is still there."""
+        if self.full:
+            return False
+        previous = self.previous.files.get(path)
+        if previous is None or previous['key'] != key or not os.path.exists(output_path(self.out_dir, path)):
+            return False
+        self.manifest.files[path] = previous
+        self.unchanged += 1
+        return True
+
+    def known_hashes(self, paths) -> Dict[str, str]:
+        return {path: self.previous.files[path]['sha256'] for path in paths if path in self.previous.files}
+
+    def record(self, results: List[Tuple[str, str, bool]], keys: Dict[str, Optional[str]]):
+        for path, digest, written in results:
+            self.manifest.files[path] = {'key': keys[path], 'sha256': digest}
+            if written:
+                self.written += 1
+            else:
+                self.unchanged += 1
+
+    def write(self, files: List[Tuple[str, FileContent]], keys: Dict[str, Optional[str]]):
+        self.record(write_files(self.out_dir, files, self.known_hashes(keys)), keys)
+
+    def export_entries(self, workers: int, chunk_size: int):
+        keys = {}
+        stale = []
+        paths = {}
+        rows = Entry.objects_visible() \
+            .order_by('date', 'ordinal') \
+            .values_list('pk', 'date', 'ordinal', 'updated_date') \
+            .iterator(chunk_size=SCAN_CHUNK_SIZE)
+        for pk, date, ordinal, updated_date in rows:
+            path = entry_export_path(date, ordinal)
+            key = updated_date.isoformat()
+            if not self.keep_if_fresh(path, key):
+                keys[path] = key
+                stale.append(pk)
+                paths[pk] = path
+
+        chunks = self.chunk_entries(stale, paths, chunk_size)
+        # Starting a pool costs more than a no-op export, so only start one when there's something to write
+        if workers == 1 or not stale:
+            for pks, hashes in chunks:
+                self.record(export_entry_chunk(self.out_dir, pks, hashes), keys)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=start_worker) as executor:
+                for result in export_in_parallel(executor, self.out_dir, chunks, max_in_flight=workers * 2):
+                    self.record(result, keys)
+
+    def chunk_entries(self, pks: List[int], paths: Dict[int, str], chunk_size: int) -> \
+            Iterator[Tuple[List[int], Dict[str, str]]]:
+        for i in range(0, len(pks), chunk_size):
+            chunk = pks[i:i + chunk_size]
+            yield chunk, self.known_hashes(paths[pk] for pk in chunk)
+
+    def export_tags(self):
+        tags = {
+            tag['id']: {**tag, 'entries': []}
+            for tag in Tag.objects.order_by('id').values('id', 'name', 'color', 'background_color', 'description')
+        }
+        rows = Entry.objects_visible() \
+            .filter(tags__isnull=False) \
+            .order_by('-date', '-ordinal') \
+            .values('tags__id', 'uuid', 'title', 'date', 'ordinal', 'slug_name')
+        for row in rows:
+            tags[row.pop('tags__id')]['entries'].append(row)
+
+        files = [(f'tags/{tag_id}.json', tag) for tag_id, tag in tags.items() if is_safe_file_name(tag_id)]
+        self.write(files, {path: None for path, _ in files})
+
+    def export_feeds(self):
+        visible = Entry.objects_visible()
+        self.export_feed_set('feeds', visible, SITE_URL, FEED_TITLE, EntryVersion.of(visible))
+
+        tag_versions = visible \
+            .filter(tags__isnull=False) \
+            .order_by() \
+            .values('tags__id') \
+            .annotate(count=Count('pk'), last_modified=Max('updated_date'))
+        for row in tag_versions:
+            tag = row['tags__id']
+            if not is_safe_file_name(tag):
+                continue
+            self.export_feed_set(
+                f'feeds/tags/{tag}',
+                visible.filter(tags__id=tag),
+                f'{SITE_URL}/t/{tag}',
+                f'{FEED_TITLE} #{tag}',
+                EntryVersion(row['count'], row['last_modified'])
+            )
+
+    def export_feed_set(self, prefix: str, qs, link: str, title: str, version: EntryVersion):
+        """Export every kind of feed of the given entries, unless they're unchanged since the last export."""
+        stale = [
+            (feed_class, f'{prefix}/{name}') for feed_class, name in FEED_FILES.items()
+            if not self.keep_if_fresh(f'{prefix}/{name}', version.etag)
+        ]
+        if not stale:
+            return
+
+        entries = list(
+            qs.defer('content', 'content_html')
+                .prefetch_related(Prefetch('tags', queryset=Tag.objects.only('id')))
+                .order_by('-date', '-ordinal')[:FEED_LIMIT]
+        )
+        files = [
+            (path, feed_class(feed_url=f'{SITE_URL}/{path}', link=link, title=title).render(entries))
+            for feed_class, path in stale
+        ]
+        self.write(files, {path: version.etag for path, _ in files})
+
+    def remove_stale(self) -> int:
+        """Remove the files of the previous export that this one didn't produce."""
+        removed = 0
+        for path in self.previous.files.keys() - self.manifest.files.keys():
+            try:
+                os.remove(output_path(self.out_dir, path))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+def export_static(out_dir: str, workers: int = 1, chunk_size: int = 200, full: bool = False) -> ExportStats:
+    """
+    Export into the directory, only serializing and rewriting what changed since the last export into it. If full is
+    set, everything is serialized again, but unchanged files still aren't rewritten.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    exporter = StaticExporter(out_dir, ExportManifest.load(out_dir), full)
+    exporter.export_entries(workers, chunk_size)
+    exporter.export_tags()
+    exporter.export_feeds()
+    removed = exporter.remove_stale()
+    exporter.manifest.save(out_dir)
+    return ExportStats(written=exporter.written, unchanged=exporter.unchanged, removed=removed)
@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from structlog import get_logger
+
+from blog.models import utc_now
+from blog.purge import purge_expired_entries, PURGE_BATCH_SIZE
+from blog.visibility import flip_due_entries, next_visibility_change
+
+logger = get_logger(__name__)
+
+PUBLISH_INTERVAL = timedelta(seconds=getattr(settings, 'BLOG_PUBLISH_INTERVAL', 60))
+"""How often beat runs publish_scheduled_entries."""
+PURGE_MAX_BATCHES = getattr(settings, 'BLOG_PURGE_MAX_BATCHES', 50)
+"""The most batches purge_deleted_entries purges in one run."""
+
+
+@shared_task
+def publish_scheduled_entries():
+    """
+    Flip the visibility of entries whose scheduled publish or delete passed.
+
+    Beat runs this every PUBLISH_INTERVAL as a safety net. To flip entries at the moment they are due rather than up
+    to an interval late, each run also queues a run for the next scheduled change if it falls before the next tick.
+    """
+    now = utc_now()
+    flipped = flip_due_entries(now)
+    if flipped:
+        logger.info('Flipped entry visibility', count=len(flipped))
+
+    next_change = next_visibility_change(now)
+    if next_change is not None and next_change < now + PUBLISH_INTERVAL:
+        publish_scheduled_entries.apply_async(eta=next_change)
+
+
+@shared_task
+def purge_deleted_entries():
+    """
+    Hard-delete entries whose retention after deletion ran out.
+
+    Each run purges at most PURGE_MAX_BATCHES batches so that a backlog can't hog a worker, and queues another run right
+    away if it stopped because of that limit.
+    """
+    purged = purge_expired_entries(utc_now(), max_batches=PURGE_MAX_BATCHES)
+    if purged:
+        logger.info('Purged deleted entries', count=purged)
+
+    if purged >= PURGE_MAX_BATCHES * PURGE_BATCH_SIZE:
+        purge_deleted_entries.apply_async()
@@ -1,3 +1,23 @@
+from .test_archive import *
+from .test_changes import *
+from .test_detail_cache import *
 from .test_entry import *
 from .test_entry_api import *
+from .test_entry_indexes import *
+from .test_export import *
+from .test_feeds import *
+from .test_fingerprint import *
 from .test_micropub import *
+from .test_ordinals import *
+from .test_permalinks import *
+from .test_purge import *
+from .test_rendering import *
+from .test_revisions import *
+from .test_related import *
+from .test_replies import *
+from .test_search import *
+from .test_shortcodes import *
+from .test_sitemaps import *
+from .test_static_export import *
+from .test_tags import *
+from .test_visibility import *
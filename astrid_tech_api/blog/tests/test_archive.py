@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+from io import StringIO
+
+import pytz
+from django.core.management import call_command
+from django.db import connections
+from django.test import TransactionTestCase, skipUnlessDBFeature
+from freezegun import freeze_time
+from rest_framework.test import APITestCase
+
+from blog.models import Entry, ArchiveDay, utc_now
+from blog.visibility import flip_due_entries
+
+create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
+retrieve_on = datetime(2021, 6, 18, 5, 6, tzinfo=pytz.utc)
+
+
+class ArchiveCalendarAPI(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        dates = [date(2020, 12, 31), date(2021, 6, 1), date(2021, 6, 1), date(2021, 6, 17)]
+        self.entries = [
+            Entry.objects.create(title=f'Entry #{i}', date=d, ordinal=i)
+            for i, d in enumerate(dates)
+        ]
+
+    def get_archive(self):
+        response = self.client.get('/api/entries/archive/')
+        self.assertEqual(200, response.status_code)
+        return response.json()
+
+    def day_counts(self):
+        return dict(ArchiveDay.objects.filter(visible_count__gt=0).values_list('date', 'visible_count'))
+
+    @freeze_time(retrieve_on)
+    def test_nested_counts(self):
+        self.assertEqual([
+            {'year': 2021, 'count': 3, 'months': [
+                {'month': 6, 'count': 3, 'days': [{'day': 17, 'count': 1}, {'day': 1, 'count': 2}]},
+            ]},
+            {'year': 2020, 'count': 1, 'months': [
+                {'month': 12, 'count': 1, 'days': [{'day': 31, 'count': 1}]},
+            ]},
+        ], self.get_archive())
+
+    @freeze_time(retrieve_on)
+    def test_signals_maintain_counts(self):
+        Entry.objects.create(title='New', date=date(2021, 6, 17), ordinal=10)
+        self.entries[0].delete()
+        moved = Entry.objects.get(pk=self.entries[1].pk)
+        moved.date = date(2021, 5, 5)
+        moved.save()
+
+        self.assertEqual({date(2021, 5, 5): 1, date(2021, 6, 1): 1, date(2021, 6, 17): 2}, self.day_counts())
+
+    def test_scheduled_publish_and_delete(self):
+        with freeze_time(create_on):
+            Entry.objects.create(title='Later', date=date(2021, 7, 1), ordinal=0,
+                                 published_date=create_on + timedelta(hours=1))
+            self.entries[3].deleted_date = create_on + timedelta(hours=1)
+            self.entries[3].save()
+        self.assertNotIn(date(2021, 7, 1), self.day_counts())
+
+        with freeze_time(create_on + timedelta(hours=2)):
+            flip_due_entries(utc_now())
+
+        counts = self.day_counts()
+        self.assertEqual(1, counts[date(2021, 7, 1)])
+        self.assertNotIn(date(2021, 6, 17), counts)
+
+    @freeze_time(retrieve_on)
+    def test_read_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.get_archive()
+
+    @freeze_time(retrieve_on)
+    def test_rebuild_command(self):
+        ArchiveDay.objects.all().delete()
+        ArchiveDay.objects.create(date=date(1999, 1, 1), visible_count=5)
+
+        call_command('rebuild_archive', stdout=StringIO())
+
+        self.assertEqual(
+            {date(2020, 12, 31): 1, date(2021, 6, 1): 2, date(2021, 6, 17): 1},
+            self.day_counts()
+        )
+
+
+class ArchiveRecountStressTests(TransactionTestCase):
+    threads = 8
+    per_thread = 10
+    day = date(2021, 6, 18)
+
+    def create_entries(self, worker: int):
+        try:
+            for i in range(self.per_thread):
+                Entry.objects.create(title=f'Worker {worker} entry {i}', date=self.day)
+        finally:
+            connections.close_all()
+
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_parallel_recounts_keep_last_count(self):
+        with ThreadPoolExecutor(self.threads) as pool:
+            list(pool.map(self.create_entries, range(self.threads)))
+
+        self.assertEqual(self.threads * self.per_thread, ArchiveDay.objects.get(date=self.day).visible_count)
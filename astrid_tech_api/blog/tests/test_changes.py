@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+
+import pytz
+from freezegun import freeze_time
+from rest_framework.test import APITestCase
+
+from blog.changes import SYNC_OVERLAP
+from blog.models import Entry, EntryTombstone, utc_now
+from blog.visibility import flip_due_entries
+
+create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
+sync_on = datetime(2021, 6, 18, 6, 0, tzinfo=pytz.utc)
+change_on = datetime(2021, 6, 18, 7, 0, tzinfo=pytz.utc)
+resync_on = datetime(2021, 6, 18, 8, 0, tzinfo=pytz.utc)
+
+
+class EntryChangesAPI(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        self.unchanged = Entry.objects.create(title='Unchanged', ordinal=0)
+        self.edited = Entry.objects.create(title='Edited', ordinal=1)
+        self.hard_deleted = Entry.objects.create(title='Hard deleted', ordinal=2)
+        self.unpublished = Entry.objects.create(title='Unpublished', ordinal=3)
+        self.scheduled = Entry.objects.create(title='Scheduled', ordinal=4,
+                                              published_date=change_on + timedelta(minutes=30))
+        self.expiring = Entry.objects.create(title='Expiring', ordinal=5,
+                                             deleted_date=change_on + timedelta(minutes=30))
+
+    def sync(self, token=None):
+        params = {'since': token} if token else {}
+        response = self.client.get('/api/entries/changes/', params)
+        self.assertEqual(200, response.status_code)
+        return response.json()
+
+    def test_no_token_returns_every_visible_entry(self):
+        with freeze_time(sync_on):
+            body = self.sync()
+
+        self.assertEqual(
+            {'Unchanged', 'Edited', 'Hard deleted', 'Unpublished', 'Expiring'},
+            {entry['title'] for entry in body['entries']}
+        )
+        self.assertEqual([], body['deleted'])
+        self.assertTrue(body['token'])
+
+    def test_returns_only_changes_since_token(self):
+        with freeze_time(sync_on):
+            token = self.sync()['token']
+
+        with freeze_time(change_on):
+            self.edited.title = 'Edited again'
+            self.edited.save()
+            self.hard_deleted.delete()
+            self.unpublished.published_date = None
+            self.unpublished.save()
+            created = Entry.objects.create(title='Created', ordinal=6)
+        with freeze_time(change_on + timedelta(minutes=30)):
+            flip_due_entries(utc_now())
+
+        with freeze_time(resync_on):
+            body = self.sync(token)
+
+        self.assertEqual(
+            {'Edited again', 'Scheduled', 'Created'},
+            {entry['title'] for entry in body['entries']}
+        )
+        self.assertEqual(
+            {str(self.hard_deleted.uuid), str(self.unpublished.uuid), str(self.expiring.uuid)},
+            set(body['deleted'])
+        )
+        self.assertIn(str(created.uuid), {entry['uuid'] for entry in body['entries']})
+
+    def test_entries_that_were_never_visible_are_not_deleted(self):
+        with freeze_time(sync_on):
+            token = self.sync()['token']
+
+        with freeze_time(change_on):
+            draft = Entry.objects.create(title='Draft', ordinal=6, published_date=None)
+            draft.title = 'Still a draft'
+            draft.save()
+            Entry.objects.create(title='Far future', ordinal=7, published_date=resync_on + timedelta(days=1))
+            self.scheduled.delete()
+            draft.delete()
+
+        with freeze_time(resync_on):
+            body = self.sync(token)
+
+        self.assertEqual([], body['entries'])
+        self.assertEqual([], body['deleted'])
+
+    def test_republished_entry_is_not_deleted(self):
+        with freeze_time(sync_on):
+            token = self.sync()['token']
+
+        with freeze_time(change_on):
+            published_date = self.edited.published_date
+            self.edited.published_date = None
+            self.edited.save()
+            self.edited.published_date = published_date
+            self.edited.save()
+
+        with freeze_time(resync_on):
+            body = self.sync(token)
+
+        self.assertEqual(['Edited'], [entry['title'] for entry in body['entries']])
+        self.assertEqual([], body['deleted'])
+
+    def test_nothing_changed(self):
+        with freeze_time(sync_on):
+            token = self.sync()['token']
+
+        with freeze_time(sync_on + SYNC_OVERLAP + timedelta(minutes=1)):
+            body = self.sync(token)
+
+        self.assertEqual([], body['entries'])
+        self.assertEqual([], body['deleted'])
+
+    def test_changes_just_before_token_are_resent(self):
+        with freeze_time(sync_on):
+            token = self.sync()['token']
+        # Saved with a stamp from before the token was handed out, like a transaction that committed late
+        with freeze_time(sync_on - SYNC_OVERLAP / 2):
+            self.edited.content = 'Edited late'
+            self.edited.save()
+
+        with freeze_time(resync_on):
+            body = self.sync(token)
+
+        self.assertIn('Edited', [entry['title'] for entry in body['entries']])
+
+    def test_hard_delete_records_tombstone(self):
+        with freeze_time(change_on):
+            self.hard_deleted.delete()
+
+        tombstone = EntryTombstone.objects.get()
+        self.assertEqual(self.hard_deleted.uuid, tombstone.uuid)
+        self.assertEqual(change_on, tombstone.deleted_date)
+
+    def test_invalid_token(self):
+        response = self.client.get('/api/entries/changes/', {'since': 'not a token'})
+
+        self.assertEqual(400, response.status_code)
+
+    def test_query_count_independent_of_corpus(self):
+        with freeze_time(sync_on):
+            token = self.sync()['token']
+        with freeze_time(change_on):
+            self.edited.content = 'Edited again'
+            self.edited.save()
+
+        # Changed entries, tombstones, and the three prefetches
+        with freeze_time(resync_on), self.assertNumQueries(5):
+            self.sync(token)
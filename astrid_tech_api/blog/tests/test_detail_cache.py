@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+
+import pytz
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from freezegun import freeze_time
+from rest_framework.test import APITestCase
+
+from blog.models import Entry, Tag, Syndication, Attachment, utc_now
+from blog.visibility import flip_due_entries
+
+create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
+retrieve_on = datetime(2021, 6, 18, 5, 6, tzinfo=pytz.utc)
+
+
+class EntryDetailCacheTests(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        cache.clear()
+        self.tag = Tag.objects.create(id='cached')
+        self.entry = Entry.objects.create(title='Popular', ordinal=0, deleted_date=create_on + timedelta(days=1))
+        self.url = f'/api/entries/{self.entry.uuid}/'
+
+    def get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(200, response.status_code)
+        return response.json()
+
+    @freeze_time(retrieve_on)
+    def test_hit_only_checks_version(self):
+        first = self.get()
+
+        with self.assertNumQueries(1):
+            second = self.get()
+
+        self.assertEqual(first, second)
+
+    @freeze_time(retrieve_on)
+    def test_uuid_case_shares_entry(self):
+        self.get()
+
+        with self.assertNumQueries(1):
+            self.client.get(self.url.upper().replace('/API/ENTRIES/', '/api/entries/'))
+
+    @freeze_time(retrieve_on)
+    def test_query_params_bypass_cache(self):
+        self.get()
+
+        response = self.client.get(self.url, {'year': 2020})
+
+        self.assertEqual(404, response.status_code)
+
+    @freeze_time(retrieve_on)
+    def test_invalidated_by_entry_save(self):
+        self.get()
+        self.entry.title = 'More popular'
+        self.entry.save()
+
+        self.assertEqual('More popular', self.get()['title'])
+
+    def test_outdated_copy_is_not_served(self):
+        with freeze_time(retrieve_on):
+            self.get()
+
+        # Like a write in another process, which can't clear this process's cache
+        with freeze_time(retrieve_on + timedelta(minutes=1)):
+            Entry.objects.filter(pk=self.entry.pk).update(title='Edited elsewhere', updated_date=utc_now())
+            self.assertEqual('Edited elsewhere', self.get()['title'])
+
+    @freeze_time(retrieve_on)
+    def test_hidden_copy_is_not_served(self):
+        self.get()
+
+        Entry.objects.filter(pk=self.entry.pk).update(visible=False)
+
+        self.assertEqual(404, self.client.get(self.url).status_code)
+
+    @freeze_time(retrieve_on)
+    def test_invalidated_by_entry_delete(self):
+        self.get()
+        self.entry.delete()
+
+        self.assertEqual(404, self.client.get(self.url).status_code)
+
+    @freeze_time(retrieve_on)
+    def test_invalidated_by_tagging(self):
+        self.get()
+        self.entry.tags.add(self.tag)
+        self.assertEqual(['cached'], self.get()['tags'])
+
+        self.tag.entry_set.clear()
+        self.assertEqual([], self.get()['tags'])
+
+    @freeze_time(retrieve_on)
+    def test_invalidated_by_tag_delete(self):
+        self.entry.tags.add(self.tag)
+        self.get()
+        self.tag.delete()
+
+        self.assertEqual([], self.get()['tags'])
+
+    @freeze_time(retrieve_on)
+    def test_invalidated_by_syndication(self):
+        self.get()
+        Syndication.objects.create(entry=self.entry, location='https://example.com/1',
+                                   status=Syndication.Status.SYNDICATED)
+
+        self.assertEqual('https://example.com/1', self.get()['syndications'][0]['location'])
+
+    @freeze_time(retrieve_on)
+    def test_invalidated_by_attachment(self):
+        self.get()
+        Attachment.objects.create(entry=self.entry, index=0, url='https://example.com/1.png', content_type='photo')
+
+        self.assertEqual('https://example.com/1.png', self.get()['attachments'][0]['url'])
+
+    def test_invalidated_by_scheduled_delete(self):
+        with freeze_time(retrieve_on):
+            self.get()
+
+        with freeze_time(create_on + timedelta(days=2)):
+            flip_due_entries(utc_now())
+            self.assertEqual(404, self.client.get(self.url).status_code)
+
+    @freeze_time(retrieve_on)
+    def test_stats(self):
+        self.get()
+        self.get()
+        self.get()
+
+        admin = get_user_model().objects.create_superuser(username='admin', password='password')
+        self.client.force_authenticate(admin)
+        response = self.client.get('/api/entries/detail-cache/stats')
+
+        self.assertEqual({'hits': 2, 'misses': 1, 'hit_ratio': 2 / 3}, response.json())
+
+    @freeze_time(retrieve_on)
+    def test_stats_require_admin(self):
+        self.assertIn(self.client.get('/api/entries/detail-cache/stats').status_code, (401, 403))
@@ -1,10 +1,14 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
 
 import pytz
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from freezegun import freeze_time
 from rest_framework.test import APITestCase
 
-from blog.models import Entry, Tag, Syndication
+from blog.models import Entry, Tag, Syndication, Attachment
 from .utils import SyndicationTestMixin
 
 create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
@@ -65,6 +69,20 @@ class EntryRetrieveAPI(APITestCase, SyndicationTestMixin):
         [obj] = response.json()
         self.assertEqual('Entry #4', obj['title'])
 
+    @freeze_time(retrieve_on)
+    def test_can_filter_date_parts(self):
+        response = self.client.get('/api/entries/', {'year': 2021, 'month': 6, 'day': 18})
+        self.assertEqual(20, len(response.json()))
+
+        response = self.client.get('/api/entries/', {'year': 2021, 'month': 5})
+        self.assertEqual(0, len(response.json()))
+
+    @freeze_time(retrieve_on)
+    def test_invalid_date_parts_are_rejected(self):
+        response = self.client.get('/api/entries/', {'year': 2021, 'month': 13})
+
+        self.assertEqual(400, response.status_code)
+
     @freeze_time(retrieve_on)
     def test_tag_filter_is_and(self):
         response = self.client.get('/api/entries/?has_tag=even&has_tag=prime')
@@ -89,3 +107,356 @@ class EntryRetrieveAPI(APITestCase, SyndicationTestMixin):
         obj = response.json()
         [only_syn] = obj['syndications']
         self.assertEqual(self.syn_16_2.location, only_syn['location'])
+
+
+class EntryQueryBudgetTests(APITestCase, SyndicationTestMixin):
+    """Entry endpoints must use a fixed number of queries, no matter how many entries are returned."""
+    QUERY_BUDGET = 5  # Version aggregate, entries, then one prefetch each for syndications, tags, and attachments
+
+    @freeze_time(create_on)
+    def setUp(self):
+        self.set_up_syndication_targets()
+        self.tag = Tag.objects.create(id='budget')
+
+    @freeze_time(create_on)
+    def create_entries(self, count, start=0):
+        for i in range(start, start + count):
+            entry = Entry.objects.create(title=f'Entry #{i}', ordinal=i)
+            entry.tags.add(self.tag)
+            Syndication.objects.create(
+                entry=entry,
+                target=self.syn_target_1,
+                location=f'https://example.com/{i}',
+                status=Syndication.Status.SYNDICATED,
+            )
+            Attachment.objects.create(entry=entry, index=0, url=f'https://example.com/{i}.png', content_type='photo')
+        return Entry.objects.order_by('ordinal').last()
+
+    @freeze_time(retrieve_on)
+    def assert_list_within_budget(self, expected_count, params=None):
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.client.get('/api/entries/', params)
+        self.assertEqual(expected_count, len(response.json()))
+
+    def test_list_query_count_is_constant(self):
+        self.create_entries(5)
+        self.assert_list_within_budget(5)
+
+        self.create_entries(20, start=5)
+        self.assert_list_within_budget(25)
+
+    def test_tag_filtered_list_query_count_is_constant(self):
+        self.create_entries(10)
+        self.assert_list_within_budget(10, {'has_tag': 'budget'})
+
+    @freeze_time(retrieve_on)
+    def test_retrieve_query_count(self):
+        entry = self.create_entries(3)
+
+        with self.assertNumQueries(self.QUERY_BUDGET + 1):  # Plus the first level of the reply thread
+            response = self.client.get(f'/api/entries/{entry.uuid}/')
+
+        obj = response.json()
+        self.assertEqual(['budget'], obj['tags'])
+        [syndication] = obj['syndications']
+        self.assertEqual('https://example.com/2', syndication['location'])
+        [attachment] = obj['attachments']
+        self.assertEqual('https://example.com/2.png', attachment['url'])
+
+
+class EntryPaginationAPI(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        self.entries = []
+        for day in range(1, 6):
+            for ordinal in range(3):
+                entry = Entry(title=f'{day}/{ordinal}', ordinal=ordinal)
+                entry.set_all_dates(datetime(2021, 5, day, tzinfo=pytz.utc))
+                entry.save()
+                self.entries.append(entry)
+
+        # Newest first
+        self.expected_titles = [e.title for e in sorted(self.entries, key=lambda e: (e.date, e.ordinal), reverse=True)]
+
+    def get_page(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(200, response.status_code, msg=response.content)
+        return response.json()
+
+    @freeze_time(retrieve_on)
+    def test_unpaginated_without_params(self):
+        self.assertEqual(15, len(self.get_page('/api/entries/')))
+
+    @freeze_time(retrieve_on)
+    def test_walks_all_pages_in_order(self):
+        page = self.get_page('/api/entries/', {'page_size': 4})
+        self.assertIsNone(page['previous'])
+
+        titles = []
+        while True:
+            titles += [obj['title'] for obj in page['results']]
+            if page['next'] is None:
+                break
+            page = self.get_page(page['next'])
+
+        self.assertEqual(self.expected_titles, titles)
+
+    @freeze_time(retrieve_on)
+    def test_previous_link_returns_previous_page(self):
+        first = self.get_page('/api/entries/', {'page_size': 4})
+        second = self.get_page(first['next'])
+        back = self.get_page(second['previous'])
+
+        self.assertEqual(first['results'], back['results'])
+        self.assertIsNone(back['previous'])
+
+    @freeze_time(retrieve_on)
+    def test_inserts_during_iteration_do_not_shift_pages(self):
+        first = self.get_page('/api/entries/', {'page_size': 4})
+
+        newer = Entry(title='new', ordinal=3).set_all_dates(datetime(2021, 5, 5, tzinfo=pytz.utc))
+        newer.save()
+
+        second = self.get_page(first['next'])
+        self.assertEqual(self.expected_titles[4:8], [obj['title'] for obj in second['results']])
+
+    @freeze_time(retrieve_on)
+    def test_deep_pages_do_not_use_offset(self):
+        page = self.get_page('/api/entries/', {'page_size': 2})
+        for _ in range(5):
+            page = self.get_page(page['next'])
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.get_page(page['next'])
+
+        self.assertFalse(any('OFFSET' in q['sql'] for q in ctx.captured_queries))
+
+    @freeze_time(retrieve_on)
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/api/entries/', {'cursor': 'garbage!'})
+
+        self.assertEqual(404, response.status_code)
+
+
+class EntrySparseFieldsetAPI(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        tag = Tag.objects.create(id='sparse')
+        self.entries = [
+            Entry.objects.create(title=f'Entry #{i}', ordinal=i, content='A very long body ' * 100)
+            for i in range(5)
+        ]
+        for entry in self.entries:
+            entry.tags.add(tag)
+            Syndication.objects.create(entry=entry, location=f'https://example.com/{entry.ordinal}',
+                                       status=Syndication.Status.SYNDICATED)
+
+    def entry_query(self, queries):
+        return next(q['sql'] for q in queries if 'FROM "blog_entry"' in q['sql'] and 'COUNT' not in q['sql'])
+
+    @freeze_time(retrieve_on)
+    def test_fields_limits_output_and_columns(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/entries/', {'fields': 'title,date,tags'})
+
+        self.assertEqual(200, response.status_code)
+        for obj in response.json():
+            self.assertEqual({'title', 'date', 'tags'}, set(obj))
+        self.assertEqual(['sparse'], response.json()[0]['tags'])
+        sql = self.entry_query(ctx.captured_queries)
+        self.assertNotIn('"content"', sql)
+        self.assertNotIn('"content_html"', sql)
+        # Version aggregate, entries, and just the tags prefetch
+        self.assertEqual(3, len(ctx.captured_queries))
+
+    @freeze_time(retrieve_on)
+    def test_omit(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/entries/', {'omit': 'content,content_html,syndications'})
+
+        obj = response.json()[0]
+        self.assertNotIn('content', obj)
+        self.assertNotIn('syndications', obj)
+        self.assertIn('title', obj)
+        self.assertIn('attachments', obj)
+        self.assertNotIn('"content"', self.entry_query(ctx.captured_queries))
+
+    @freeze_time(retrieve_on)
+    def test_detail(self):
+        response = self.client.get(f'/api/entries/{self.entries[0].uuid}/', {'fields': 'uuid,title'})
+
+        self.assertEqual({'uuid': str(self.entries[0].uuid), 'title': 'Entry #0'}, response.json())
+
+    @freeze_time(retrieve_on)
+    def test_paginated_without_date_fields(self):
+        # Version aggregate and entries; the cursor's date and ordinal are always loaded, and nothing is prefetched
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/entries/', {'fields': 'title', 'page_size': 2})
+
+        self.assertEqual([{'title': 'Entry #4'}, {'title': 'Entry #3'}], response.json()['results'])
+        self.assertIsNotNone(response.json()['next'])
+
+    @freeze_time(retrieve_on)
+    def test_unknown_fields(self):
+        response = self.client.get('/api/entries/', {'fields': 'title,password', 'omit': 'deleted_date'})
+
+        self.assertEqual(400, response.status_code)
+        self.assertIn('password', response.json()['fields'])
+        self.assertIn('deleted_date', response.json()['omit'])
+
+
+class EntryConditionalGetAPI(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        self.entries = [Entry.objects.create(title=f'Entry #{i}', ordinal=i) for i in range(5)]
+
+    @freeze_time(retrieve_on)
+    def test_list_has_validators(self):
+        response = self.client.get('/api/entries/')
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn('ETag', response)
+        # A list can lose entries without its newest updated_date moving
+        self.assertNotIn('Last-Modified', response)
+
+    @freeze_time(retrieve_on)
+    def test_list_not_modified_with_one_query(self):
+        etag = self.client.get('/api/entries/')['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/entries/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(etag, response['ETag'])
+        self.assertFalse(response.content)
+
+    @freeze_time(retrieve_on)
+    def test_list_ignores_modified_since(self):
+        last_modified = self.client.get(f'/api/entries/{self.entries[0].uuid}/')['Last-Modified']
+        self.entries[0].delete()
+
+        response = self.client.get('/api/entries/', HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(200, response.status_code)
+
+    @freeze_time(retrieve_on)
+    def test_detail_not_modified_since(self):
+        url = f'/api/entries/{self.entries[1].uuid}/'
+        last_modified = self.client.get(url)['Last-Modified']
+
+        self.assertEqual(304, self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code)
+
+    @freeze_time(retrieve_on)
+    def test_etags_change_on_new_syndication(self):
+        url = f'/api/entries/{self.entries[1].uuid}/'
+        detail_etag = self.client.get(url)['ETag']
+        list_etag = self.client.get('/api/entries/')['ETag']
+
+        with freeze_time(retrieve_on + timedelta(minutes=1)):
+            Syndication.objects.create(entry=self.entries[1], location='https://example.com/1',
+                                       status=Syndication.Status.SYNDICATED)
+
+        self.assertEqual(200, self.client.get(url, HTTP_IF_NONE_MATCH=detail_etag).status_code)
+        self.assertEqual(200, self.client.get('/api/entries/', HTTP_IF_NONE_MATCH=list_etag).status_code)
+
+    @freeze_time(retrieve_on)
+    def test_list_etag_changes_on_update(self):
+        etag = self.client.get('/api/entries/')['ETag']
+
+        self.entries[0].title = 'Changed'
+        self.entries[0].save()
+
+        response = self.client.get('/api/entries/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response['ETag'])
+
+    @freeze_time(retrieve_on)
+    def test_list_etag_changes_on_new_entry(self):
+        etag = self.client.get('/api/entries/')['ETag']
+
+        Entry.objects.create(title='New', ordinal=10).set_all_dates(create_on).save()
+
+        response = self.client.get('/api/entries/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+
+    @freeze_time(retrieve_on)
+    def test_detail_not_modified(self):
+        url = f'/api/entries/{self.entries[1].uuid}/'
+        etag = self.client.get(url)['ETag']
+
+        # Answered from the entry's version alone
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(304, response.status_code)
+
+    @freeze_time(retrieve_on)
+    def test_detail_of_missing_entry_is_not_found(self):
+        self.assertEqual(404, self.client.get('/api/entries/not-a-uuid/').status_code)
+        self.assertEqual(404, self.client.get('/api/entries/00000000-0000-0000-0000-000000000000/').status_code)
+
+
+class EntryFastReadPathAPI(APITestCase, SyndicationTestMixin):
+    """The fast read path must produce the same bytes as the serializer."""
+
+    @freeze_time(datetime(2021, 6, 18, 5, 5, 1, 123456, tzinfo=pytz.utc))
+    def setUp(self):
+        self.set_up_syndication_targets()
+        tags = [Tag.objects.create(id=name) for name in ['zebra', 'apple', 'mango']]
+        for i in range(6):
+            entry = Entry.objects.create(
+                title=f'Entry #{i}   \U0001F600 "quoted"' if i % 2 else None,
+                slug_name=f'entry-{i}' if i % 3 else None,
+                description='Line\nbreak\ttab' if i % 2 else None,
+                reply_to='https://example.com/post' if i == 2 else None,
+                content=f'Content of entry {i}',
+                ordinal=i,
+            )
+            entry.tags.add(*tags[:i % 4])
+            for target, status in [(self.syn_target_2, Syndication.Status.SYNDICATED),
+                                   (self.syn_target_1, Syndication.Status.SYNDICATED),
+                                   (self.syn_target_3, Syndication.Status.SCHEDULED)][:i % 4]:
+                Syndication.objects.create(entry=entry, target=target, location=f'{target.id}/{i}', status=status)
+            for index in range(i % 3):
+                Attachment.objects.create(entry=entry, index=index, url=f'https://example.com/{i}-{index}.png',
+                                          content_type='photo', caption='A caption' if index else None)
+
+    @freeze_time(retrieve_on)
+    def assert_same_bytes(self, params=None, **extra):
+        slow = self.client.get('/api/entries/', params, **extra)
+        with patch('blog.views.rest.FAST_READ_PATH', True):
+            fast = self.client.get('/api/entries/', params, **extra)
+
+        self.assertEqual(200, fast.status_code)
+        self.assertEqual(slow.content, fast.content)
+        self.assertEqual(slow['ETag'], fast['ETag'])
+        return fast
+
+    def test_full_list(self):
+        response = self.assert_same_bytes()
+        self.assertIn(b'\\u2028', response.content)
+        self.assertEqual(6, len(response.json()))
+
+    def test_paginated(self):
+        first = self.assert_same_bytes({'page_size': 4}).json()
+        [cursor] = parse_qs(urlsplit(first['next']).query)['cursor']
+        second = self.assert_same_bytes({'cursor': cursor, 'page_size': 4}).json()
+        self.assertEqual(2, len(second['results']))
+
+    def test_sparse_fieldsets(self):
+        self.assert_same_bytes({'fields': 'title,tags,published_date'})
+        self.assert_same_bytes({'omit': 'content,syndications'})
+
+    def test_filtered(self):
+        self.assert_same_bytes({'has_tag': 'apple'})
+        self.assert_same_bytes({'ordinal': 2})
+
+    def test_indented(self):
+        self.assert_same_bytes(HTTP_ACCEPT='application/json; indent=2')
+
+    @freeze_time(retrieve_on)
+    @patch('blog.views.rest.FAST_READ_PATH', True)
+    def test_query_count(self):
+        # Version aggregate, the rows, then one query each for syndications, attachments, and tags
+        with self.assertNumQueries(5):
+            self.client.get('/api/entries/')
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+import pytz
+from django.db import connection
+from django.test import TestCase
+
+from blog.models import Entry
+from blog.views.rest import filter_date_parts
+
+SYNTHETIC_ENTRIES = 5000
+FIRST_DAY = datetime(2010, 1, 1, tzinfo=pytz.utc)
+
+
+class EntryIndexUsageTests(TestCase):
+    """Make sure the hot entry predicates are answered by index scans rather than full table scans."""
+
+    @classmethod
+    def setUpTestData(cls):
+        entries = []
+        for i in range(SYNTHETIC_ENTRIES):
+            dt = FIRST_DAY + timedelta(hours=6 * i)
+            entry = Entry(title=f'Synthetic #{i}', ordinal=i % 4).set_all_dates(dt)
+            if i % 10 == 0:
+                entry.deleted_date = dt + timedelta(days=30)
+            entries.append(entry)
+        Entry.objects.bulk_create(entries)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assert_uses_index(self, qs, index_name=None):
+        plan = qs.explain()
+        if connection.vendor == 'sqlite':
+            self.assertRegex(plan, r'SEARCH .*USING (COVERING )?INDEX', msg=plan)
+        else:
+            self.assertRegex(plan, r'Index (Only )?Scan', msg=plan)
+        if index_name is not None:
+            self.assertIn(index_name, plan)
+
+    def test_year_filter_uses_index(self):
+        self.assert_uses_index(filter_date_parts(Entry.objects.all(), 2011, None, None))
+
+    def test_month_filter_uses_index(self):
+        self.assert_uses_index(filter_date_parts(Entry.objects.all(), 2011, 4, None))
+
+    def test_day_and_ordinal_lookup_uses_index(self):
+        self.assert_uses_index(filter_date_parts(Entry.objects.all(), 2011, 4, 3).filter(ordinal=2))
+
+    def test_visibility_predicate_uses_index(self):
+        self.assert_uses_index(Entry.objects_visible_at(FIRST_DAY + timedelta(days=7)))
@@ -0,0 +1,69 @@
+import json
+from datetime import datetime
+from math import ceil
+from unittest.mock import patch
+
+import pytz
+from freezegun import freeze_time
+from rest_framework.test import APITestCase
+
+from blog.models import Entry, Tag, Syndication, Attachment
+
+create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
+retrieve_on = datetime(2021, 6, 18, 5, 6, tzinfo=pytz.utc)
+
+
+class EntryExportTests(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        self.tag = Tag.objects.create(id='exported')
+        self.entries = [Entry.objects.create(title=f'Entry #{i}', ordinal=i) for i in range(7)]
+        for entry in self.entries:
+            entry.tags.add(self.tag)
+            Syndication.objects.create(entry=entry, location=f'https://example.com/{entry.ordinal}',
+                                       status=Syndication.Status.SYNDICATED)
+            Attachment.objects.create(entry=entry, index=0, url=f'https://example.com/{entry.ordinal}.png',
+                                      content_type='photo')
+
+    @freeze_time(retrieve_on)
+    def test_exports_every_visible_entry(self):
+        response = self.client.get('/api/entries/export.ndjson')
+
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.streaming)
+        self.assertEqual('application/x-ndjson', response['Content-Type'])
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        objs = [json.loads(line) for line in lines]
+        self.assertEqual([f'Entry #{i}' for i in range(7)], [obj['title'] for obj in objs])
+        self.assertEqual(['exported'], objs[3]['tags'])
+        self.assertEqual('https://example.com/3', objs[3]['syndications'][0]['location'])
+        self.assertEqual('https://example.com/3.png', objs[3]['attachments'][0]['url'])
+
+    @freeze_time(retrieve_on)
+    def test_matches_detail_representation(self):
+        response = self.client.get('/api/entries/export.ndjson')
+        first = json.loads(b''.join(response.streaming_content).decode().splitlines()[0])
+
+        detail = self.client.get(f'/api/entries/{self.entries[0].uuid}/').json()
+        del detail['replies']  # The reply thread is only part of the detail view
+        self.assertEqual(detail, first)
+
+    @freeze_time(retrieve_on)
+    @patch('blog.views.export.EXPORT_CHUNK_SIZE', 3)
+    def test_prefetches_per_chunk(self):
+        # Nothing but the version check runs until the body is consumed
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/entries/export.ndjson')
+
+        chunks = ceil(len(self.entries) / 3)
+        with self.assertNumQueries(1 + 3 * chunks):
+            b''.join(response.streaming_content)
+
+    @freeze_time(retrieve_on)
+    def test_conditional_get(self):
+        etag = self.client.get('/api/entries/export.ndjson')['ETag']
+
+        response = self.client.get('/api/entries/export.ndjson', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(304, response.status_code)
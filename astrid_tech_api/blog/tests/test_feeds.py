@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from xml.etree import ElementTree
+
+import pytz
+from django.core.cache import cache
+from freezegun import freeze_time
+from rest_framework.test import APITestCase
+
+from blog.feeds import RssEntryFeed, AtomEntryFeed, JSONEntryFeed
+from blog.models import Entry, Tag
+
+create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
+retrieve_on = datetime(2021, 6, 18, 5, 6, tzinfo=pytz.utc)
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class EntryFeedTests(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        cache.clear()
+        self.python = Tag.objects.create(id='python')
+        self.entries = []
+        for i in range(5):
+            entry = Entry(title=f'Entry #{i}', slug_name=f'entry-{i}', content=f'Body **{i}**', ordinal=0)
+            entry.set_all_dates(create_on - timedelta(days=5 - i))
+            entry.save()
+            self.entries.append(entry)
+        for entry in self.entries[:2]:
+            entry.tags.add(self.python)
+
+    def get(self, url, status_code=200, **kwargs):
+        response = self.client.get(url, **kwargs)
+        self.assertEqual(status_code, response.status_code, msg=response.content)
+        return response
+
+    @freeze_time(retrieve_on)
+    def test_rss(self):
+        response = self.get('/api/feeds/rss.xml')
+
+        channel = ElementTree.fromstring(response.content).find('channel')
+        items = channel.findall('item')
+        self.assertEqual(5, len(items))
+        self.assertEqual('Entry #4', items[0].findtext('title'))
+        self.assertEqual('https://astrid.tech/2021/06/17/0/entry-4', items[0].findtext('link'))
+        self.assertEqual('<p>Body <strong>4</strong></p>', items[0].findtext('description'))
+
+    @freeze_time(retrieve_on)
+    def test_atom(self):
+        response = self.get('/api/feeds/atom.xml')
+
+        entries = ElementTree.fromstring(response.content).findall(f'{ATOM}entry')
+        self.assertEqual(['Entry #4', 'Entry #3', 'Entry #2', 'Entry #1', 'Entry #0'],
+                         [e.findtext(f'{ATOM}title') for e in entries])
+
+    @freeze_time(retrieve_on)
+    def test_atom_content_and_summary(self):
+        Entry.objects.filter(pk=self.entries[4].pk).update(description='About four')
+
+        first, second = ElementTree.fromstring(self.get('/api/feeds/atom.xml').content).findall(f'{ATOM}entry')[:2]
+
+        self.assertEqual('<p>Body <strong>4</strong></p>', first.find(f'{ATOM}content').text)
+        self.assertEqual('html', first.find(f'{ATOM}content').get('type'))
+        self.assertEqual('About four', first.findtext(f'{ATOM}summary'))
+        self.assertIsNone(second.find(f'{ATOM}summary'))
+
+    @freeze_time(retrieve_on)
+    def test_json_feed(self):
+        data = self.get('/api/feeds/feed.json').json()
+
+        self.assertEqual('https://jsonfeed.org/version/1.1', data['version'])
+        self.assertEqual(5, len(data['items']))
+        self.assertEqual(['python'], data['items'][-1]['tags'])
+
+    @freeze_time(retrieve_on)
+    def test_tag_feed(self):
+        data = self.get('/api/feeds/tags/python/feed.json').json()
+
+        self.assertEqual(['Entry #1', 'Entry #0'], [item['title'] for item in data['items']])
+        self.get('/api/feeds/tags/nonexistent/feed.json', status_code=404)
+
+    @freeze_time(retrieve_on)
+    def test_limit(self):
+        self.assertEqual(2, len(self.get('/api/feeds/feed.json', data={'limit': 2}).json()['items']))
+        self.get('/api/feeds/feed.json', data={'limit': 0}, status_code=400)
+
+    @freeze_time(retrieve_on)
+    def test_limit_is_capped(self):
+        with patch('blog.views.feeds.FEED_MAX_LIMIT', 3):
+            self.assertEqual(3, len(self.get('/api/feeds/feed.json', data={'limit': 50}).json()['items']))
+
+    @freeze_time(retrieve_on)
+    def test_conditional_get(self):
+        etag = self.get('/api/feeds/atom.xml')['ETag']
+
+        with self.assertNumQueries(1):
+            self.get('/api/feeds/atom.xml', status_code=304, HTTP_IF_NONE_MATCH=etag)
+
+    @freeze_time(retrieve_on)
+    def test_rebuild_only_renders_new_entries(self):
+        feeds = [(RssEntryFeed, 'rss.xml'), (AtomEntryFeed, 'atom.xml'), (JSONEntryFeed, 'feed.json')]
+        for i, (feed_class, filename) in enumerate(feeds):
+            url = f'/api/feeds/{filename}'
+            self.get(url)
+
+            new_entry = Entry.objects.create(title=f'New {feed_class.name}', ordinal=10 + i)
+
+            with patch.object(feed_class, 'render_item', autospec=True, side_effect=feed_class.render_item) as render:
+                response = self.get(url)
+
+            [(args, _)] = render.call_args_list
+            self.assertEqual(new_entry.pk, args[1].pk)
+            self.assertIn(f'New {feed_class.name}', response.content.decode())
+
+    @freeze_time(retrieve_on)
+    def test_updated_entry_is_rerendered(self):
+        self.get('/api/feeds/rss.xml')
+
+        self.entries[4].content = 'Edited'
+        self.entries[4].save()
+
+        self.assertIn('Edited', self.get('/api/feeds/rss.xml').content.decode())
+
+    @freeze_time(retrieve_on)
+    def test_retagged_entry_is_rerendered(self):
+        self.get('/api/feeds/feed.json')
+
+        self.entries[4].tags.add(self.python)
+
+        self.assertEqual(['python'], self.get('/api/feeds/feed.json').json()['items'][0]['tags'])
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytz
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from freezegun import freeze_time
+from rest_framework.test import APITestCase
+
+from blog.fingerprint import skipped_save_count
+from blog.models import Entry, Tag
+
+create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
+save_on = datetime(2021, 6, 18, 6, 0, tzinfo=pytz.utc)
+
+
+class EntryFingerprintTests(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        cache.clear()
+        self.tag = Tag.objects.create(id='fingerprinted')
+        self.entry = Entry.objects.create(title='Entry', content='Some *content*', ordinal=0)
+        self.entry.tags.add(self.tag)
+        self.entry = Entry.objects.get(pk=self.entry.pk)
+
+    def reload(self) -> Entry:
+        return Entry.objects.get(pk=self.entry.pk)
+
+    @freeze_time(save_on)
+    def test_noop_save_is_skipped(self):
+        before = self.entry.updated_date
+
+        with self.assertNumQueries(1):  # Just the tags
+            self.entry.save()
+
+        self.assertEqual(before, self.reload().updated_date)
+        self.assertEqual(1, skipped_save_count())
+
+    @freeze_time(save_on)
+    def test_change_is_written(self):
+        self.entry.content = 'Other content'
+        self.entry.save()
+
+        entry = self.reload()
+        self.assertEqual(save_on, entry.updated_date)
+        self.assertEqual('<p>Other content</p>', entry.content_html.strip())
+        self.assertEqual(0, skipped_save_count())
+
+    @freeze_time(save_on)
+    def test_equivalent_values_are_unchanged(self):
+        # The same instant in another timezone, and the date as a datetime, like the field defaults set it
+        self.entry.published_date = self.entry.published_date.astimezone(pytz.timezone('America/Los_Angeles'))
+        self.entry.date = datetime.combine(self.entry.date, datetime.min.time(), tzinfo=pytz.utc)
+        self.entry.save()
+
+        self.assertEqual(1, skipped_save_count())
+
+    @freeze_time(save_on)
+    def test_noop_update_fields_save_is_skipped(self):
+        self.entry.save(update_fields=['title', 'content'])
+
+        self.assertEqual(1, skipped_save_count())
+
+    @freeze_time(save_on)
+    def test_unfingerprinted_update_fields_are_written(self):
+        self.entry.content_html = '<p>Edited by hand</p>'
+        self.entry.save(update_fields=['content_html'])
+
+        self.assertEqual('<p>Edited by hand</p>', self.reload().content_html)
+        self.assertEqual(0, skipped_save_count())
+
+    def test_due_visibility_flip_is_written(self):
+        with freeze_time(create_on):
+            scheduled = Entry.objects.create(title='Scheduled', ordinal=1,
+                                             published_date=create_on + timedelta(minutes=10))
+        self.assertFalse(scheduled.visible)
+
+        with freeze_time(save_on):
+            scheduled.save()
+
+        self.assertTrue(Entry.objects.get(pk=scheduled.pk).visible)
+        self.assertEqual(0, skipped_save_count())
+
+    @freeze_time(save_on)
+    def test_outdated_render_is_written(self):
+        with patch('blog.models.RENDERER_VERSION', self.entry.content_html_version + 1):
+            self.entry.save()
+
+        self.assertEqual(self.entry.content_html_version, self.reload().content_html_version)
+        self.assertEqual(0, skipped_save_count())
+
+    @freeze_time(save_on)
+    def test_fingerprint_is_not_public(self):
+        detail = self.client.get(f'/api/entries/{self.entry.uuid}/').json()
+        [listed] = self.client.get('/api/entries/').json()
+
+        self.assertNotIn('content_fingerprint', detail)
+        self.assertNotIn('content_fingerprint', listed)
+
+    @freeze_time(save_on)
+    def test_skipped_save_keeps_caches(self):
+        self.client.get(f'/api/entries/{self.entry.uuid}/')
+
+        with patch('blog.signals.invalidate_entries') as invalidate:
+            self.entry.save()
+
+        invalidate.assert_not_called()
+
+    @freeze_time(save_on)
+    def test_retagging_refingerprints(self):
+        other = Tag.objects.create(id='other')
+        self.entry.tags.add(other)
+        retagged = self.reload()
+        self.assertEqual(save_on, retagged.updated_date)
+
+        # Saving with the new tags changes nothing anymore
+        retagged.save()
+        self.assertEqual(1, skipped_save_count())
+        self.assertEqual(retagged.compute_fingerprint(), retagged.content_fingerprint)
+
+    @freeze_time(save_on)
+    def test_readding_tags_writes_nothing(self):
+        before = self.entry.updated_date
+
+        with patch('blog.signals.invalidate_entries') as invalidate:
+            self.entry.tags.add(self.tag)
+            self.entry.tags.remove()
+
+        self.assertEqual(before, self.reload().updated_date)
+        invalidate.assert_not_called()
+
+    @freeze_time(save_on)
+    def test_clearing_tag_refingerprints(self):
+        self.tag.entry_set.clear()
+
+        entry = self.reload()
+        self.assertEqual(entry.compute_fingerprint(), entry.content_fingerprint)
+
+    @freeze_time(save_on)
+    def test_stats_are_admin_only(self):
+        self.entry.save()
+
+        self.assertEqual(401, self.client.get('/api/entries/saves/stats').status_code)
+
+        admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_authenticate(admin)
+        self.assertEqual({'skipped': 1}, self.client.get('/api/entries/saves/stats').json())
@@ -252,6 +252,7 @@ class MicropubEndpointTests(TestCase, SyndicationTestMixin):
 
         obj = Entry.objects.get(date=EXPECTED_EMPTY_DATE)
         self.assertEqual('text/html', obj.content_type)
+        self.assertEqual(form['properties']['content'][0]['html'], obj.content_html)
         self.assertFalse(obj.repost_of)
 
     @freeze_time(EMPTY_DATE)
@@ -271,6 +272,7 @@ class MicropubEndpointTests(TestCase, SyndicationTestMixin):
 
         obj = Entry.objects.get(date=EXPECTED_EMPTY_DATE)
         self.assertEqual('text/plain', obj.content_type)
+        self.assertEqual('<p>testing plaintext do it pls</p>', obj.content_html)
 
     @freeze_time(EMPTY_DATE)
     def test_create_json_entry_with_attached_photos(self):
@@ -0,0 +1,141 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date
+from tempfile import TemporaryDirectory
+from typing import List
+from unittest import skipUnless
+
+import pytz
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, OperationalError
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature, RequestFactory
+
+from blog.models import Entry, EntryOrdinalCounter
+from blog.tests.utils import use_database_file, migrate_database_file
+
+day = date(2021, 6, 18)
+other_day = date(2021, 6, 19)
+
+
+class EntryOrdinalCounterTests(TestCase):
+    def test_allocations_count_up(self):
+        self.assertEqual([0, 1, 2], [EntryOrdinalCounter.allocate(day) for _ in range(3)])
+        self.assertEqual(3, Entry.get_next_ordinal(day))
+
+    def test_dates_count_separately(self):
+        EntryOrdinalCounter.allocate(day)
+
+        self.assertEqual(0, EntryOrdinalCounter.allocate(other_day))
+
+    def test_counter_starts_after_existing_entries(self):
+        EntryOrdinalCounter.objects.all().delete()
+        Entry.objects.bulk_create([Entry(title='Imported', date=day, ordinal=4)])
+
+        self.assertEqual(5, EntryOrdinalCounter.allocate(day))
+
+    def test_allocation_is_constant_time(self):
+        for i in range(3):
+            Entry.objects.create(title=f'Entry #{i}', date=day)
+
+        with self.assertNumQueries(2):  # Bump the counter and read it back
+            EntryOrdinalCounter.allocate(day)
+
+    def test_create_allocates_on_entry_date(self):
+        entries = [
+            Entry.objects.create(title=f'Entry #{i}', date=datetime(2021, 6, 18, 23, 0, tzinfo=pytz.utc))
+            for i in range(3)
+        ]
+
+        self.assertEqual([0, 1, 2], [entry.ordinal for entry in entries])
+        self.assertEqual('/2021/06/18/2', entries[2].slug)
+
+    def test_explicit_ordinal_is_skipped(self):
+        EntryOrdinalCounter.allocate(day)
+        Entry.objects.create(title='By hand', date=day, ordinal=5)
+
+        self.assertEqual(6, Entry.objects.create(title='Allocated', date=day).ordinal)
+
+    def test_admin_form_allocates_blank_ordinal(self):
+        EntryOrdinalCounter.allocate(day)
+        request = RequestFactory().get('/admin/blog/entry/add/')
+        request.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        form_class = admin.site._registry[Entry].get_form(request)
+
+        form = form_class({'title': 'From the admin', 'date': '2021-06-18', 'ordinal': '',
+                           'created_date': '2021-06-18 05:05', 'content_type': 'text/markdown'})
+
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(1, form.save().ordinal)
+
+    def test_moving_entry_reserves_its_ordinal(self):
+        EntryOrdinalCounter.allocate(day)
+        entry = Entry.objects.create(title='Moved', date=other_day, ordinal=3)
+
+        entry.date = day
+        entry.save(update_fields=['date'])
+
+        self.assertEqual(4, Entry.objects.create(title='Allocated', date=day).ordinal)
+
+
+class EntryOrdinalStressTests(TransactionTestCase):
+    threads = 8
+    per_thread = 10
+
+    def create_entries(self, worker: int):
+        try:
+            return [
+                Entry.objects.create(title=f'Worker {worker} entry {i}', date=day).ordinal
+                for i in range(self.per_thread)
+            ]
+        finally:
+            connections.close_all()
+
+    @skipUnlessDBFeature('has_select_for_update')  # Otherwise see EntryOrdinalMultiprocessTests
+    def test_parallel_creates_never_collide(self):
+        with ThreadPoolExecutor(self.threads) as pool:
+            ordinals = [o for batch in pool.map(self.create_entries, range(self.threads)) for o in batch]
+
+        total = self.threads * self.per_thread
+        self.assertEqual(list(range(total)), sorted(ordinals))
+        self.assertEqual(total, Entry.objects.filter(date=day).count())
+        self.assertEqual(total, EntryOrdinalCounter.objects.get(date=day).next_ordinal)
+
+
+def create_entries_in_file(path: str, count: int) -> List[int]:
+    use_database_file(path)
+    ordinals = []
+    try:
+        while len(ordinals) < count:
+            try:
+                ordinals.append(Entry.objects.create(title='Created in parallel', date=day).ordinal)
+            except OperationalError:
+                # SQLite gives up at once instead of waiting when a transaction that read can't start writing, which
+                # a client would see as a failed request to retry. Collisions would be an IntegrityError instead.
+                time.sleep(0.01)
+    finally:
+        connections.close_all()
+    return ordinals
+
+
+@skipUnless(connection.vendor == 'sqlite' and 'fork' in multiprocessing.get_all_start_methods(),
+            'Needs SQLite and forking')
+class EntryOrdinalMultiprocessTests(TransactionTestCase):
+    """Creates entries from several processes at once, in a database file they share."""
+    processes = 8
+    per_process = 15
+
+    def test_parallel_creates_never_collide(self):
+        context = multiprocessing.get_context('fork')
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'ordinals.sqlite3')
+            with context.Pool(1) as pool:
+                pool.apply(migrate_database_file, (path,))
+            with context.Pool(self.processes) as pool:
+                batches = pool.starmap(create_entries_in_file, [(path, self.per_process)] * self.processes)
+
+        ordinals = [o for batch in batches for o in batch]
+        self.assertEqual(self.processes * self.per_process, len(ordinals))
+        self.assertEqual(len(ordinals), len(set(ordinals)))
@@ -0,0 +1,97 @@
+from datetime import datetime, date
+
+import pytz
+from django.test import SimpleTestCase
+from freezegun import freeze_time
+from rest_framework.test import APITestCase
+
+from blog.models import Entry
+from blog.permalinks import EntryPath
+
+create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
+retrieve_on = datetime(2021, 6, 18, 5, 6, tzinfo=pytz.utc)
+
+
+class EntryPathTests(SimpleTestCase):
+    def test_parses_paths(self):
+        self.assertEqual(EntryPath(date(2021, 6, 8), 3, 'slug'), EntryPath.parse('2021/06/08/3/slug'))
+        self.assertEqual(EntryPath(date(2021, 6, 8), 3, None), EntryPath.parse('/2021/6/8/3/'))
+        self.assertIsNone(EntryPath.parse('2021/02/30/3'))
+        self.assertIsNone(EntryPath.parse('2021/02/03'))
+
+
+class EntryByPathAPI(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        self.entry = Entry.objects.create(title='Hello', slug_name='hello-world', ordinal=2)
+        self.other = Entry.objects.create(title='Other', ordinal=3)
+
+    def get(self, path):
+        return self.client.get(f'/api/entries/by-path/{path}/')
+
+    @freeze_time(retrieve_on)
+    def test_resolves_path(self):
+        response = self.get('2021/06/18/2/hello-world')
+
+        self.assertEqual(200, response.status_code, msg=response.content)
+        self.assertEqual(str(self.entry.uuid), response.json()['uuid'])
+
+    @freeze_time(retrieve_on)
+    def test_resolves_path_without_slug_name(self):
+        response = self.get('2021/06/18/3')
+
+        self.assertEqual(200, response.status_code, msg=response.content)
+        self.assertEqual(str(self.other.uuid), response.json()['uuid'])
+
+    @freeze_time(retrieve_on)
+    def test_redirects_stale_slug_name(self):
+        response = self.get('2021/06/18/2/old-name')
+
+        self.assertEqual(301, response.status_code)
+        self.assertEqual('/api/entries/by-path/2021/06/18/2/hello-world/', response['Location'])
+
+    @freeze_time(retrieve_on)
+    def test_redirects_missing_slug_name(self):
+        response = self.get('2021/06/18/2')
+
+        self.assertEqual(301, response.status_code)
+        self.assertEqual('/api/entries/by-path/2021/06/18/2/hello-world/', response['Location'])
+
+    @freeze_time(retrieve_on)
+    def test_rename_is_picked_up(self):
+        self.get('2021/06/18/2/hello-world')
+
+        self.entry.slug_name = 'renamed'
+        self.entry.save()
+
+        response = self.get('2021/06/18/2/hello-world')
+        self.assertEqual(301, response.status_code)
+        self.assertEqual('/api/entries/by-path/2021/06/18/2/renamed/', response['Location'])
+
+    @freeze_time(retrieve_on)
+    def test_move_is_picked_up(self):
+        self.get('2021/06/18/2/hello-world')
+
+        Entry.objects.filter(pk=self.entry.pk).update(ordinal=7)
+
+        self.assertEqual(404, self.get('2021/06/18/2/hello-world').status_code)
+        self.assertEqual(200, self.get('2021/06/18/7/hello-world').status_code)
+
+    @freeze_time(retrieve_on)
+    def test_deleted_entry_is_not_found(self):
+        self.get('2021/06/18/2/hello-world')
+
+        self.entry.delete()
+
+        self.assertEqual(404, self.get('2021/06/18/2/hello-world').status_code)
+
+    @freeze_time(retrieve_on)
+    def test_path_lookup_queries(self):
+        with self.assertNumQueries(5):  # The entry, its prefetched relations, then its replies
+            response = self.get('2021/06/18/2/hello-world')
+        self.assertEqual(200, response.status_code)
+
+    @freeze_time(retrieve_on)
+    def test_unknown_path_is_not_found(self):
+        self.assertEqual(404, self.get('2021/06/18/9').status_code)
+        self.assertEqual(404, self.get('2021/13/18/9').status_code)
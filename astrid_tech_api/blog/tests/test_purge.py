@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytz
+from django.test import TestCase
+from freezegun import freeze_time
+
+from blog.models import Entry, EntryTombstone, Attachment, Syndication
+from blog.purge import purge_expired_entries, purge_batch, DELETED_ENTRY_RETENTION
+from blog.tasks import purge_deleted_entries
+
+create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
+delete_on = create_on + timedelta(hours=1)
+expire_on = delete_on + DELETED_ENTRY_RETENTION
+purge_on = expire_on + timedelta(hours=1)
+
+
+class PurgeTests(TestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        self.expired = [
+            Entry.objects.create(title=f'Expired #{i}', ordinal=i, deleted_date=delete_on)
+            for i in range(5)
+        ]
+        Entry.objects.create(title='Recently deleted', ordinal=5, deleted_date=purge_on - timedelta(days=1))
+        Entry.objects.create(title='Scheduled deletion', ordinal=6, deleted_date=purge_on + timedelta(days=1))
+        Entry.objects.create(title='Current', ordinal=7)
+
+        Attachment.objects.create(entry=self.expired[0], index=0, url='https://example.com/0.png', content_type='photo')
+        Syndication.objects.create(entry=self.expired[0], location='https://example.com/0',
+                                   status=Syndication.Status.SYNDICATED)
+
+    def remaining_titles(self):
+        return set(Entry.objects.values_list('title', flat=True))
+
+    @freeze_time(purge_on)
+    def test_purges_only_expired(self):
+        self.assertEqual(5, purge_expired_entries(purge_on))
+
+        self.assertEqual({'Recently deleted', 'Scheduled deletion', 'Current'}, self.remaining_titles())
+
+    @freeze_time(purge_on)
+    def test_cascades(self):
+        purge_expired_entries(purge_on)
+
+        self.assertFalse(Attachment.objects.exists())
+        self.assertFalse(Syndication.objects.exists())
+
+    @freeze_time(purge_on)
+    def test_records_tombstones(self):
+        purge_expired_entries(purge_on)
+
+        self.assertEqual(
+            {entry.uuid for entry in self.expired},
+            set(EntryTombstone.objects.values_list('uuid', flat=True))
+        )
+
+    @freeze_time(purge_on)
+    def test_purges_in_batches(self):
+        with patch('blog.purge.purge_batch', wraps=purge_batch) as batch:
+            self.assertEqual(5, purge_expired_entries(purge_on, batch_size=2))
+
+        # Two full batches, then the one that found fewer than a batch's worth
+        self.assertEqual(3, batch.call_count)
+
+    @freeze_time(purge_on)
+    def test_stops_after_max_batches(self):
+        self.assertEqual(4, purge_expired_entries(purge_on, batch_size=2, max_batches=2))
+
+        self.assertEqual(1, Entry.objects.filter(title__startswith='Expired').count())
+
+    @freeze_time(purge_on)
+    def test_nothing_to_purge_before_retention_ends(self):
+        self.assertEqual(0, purge_expired_entries(expire_on - timedelta(seconds=1)))
+
+    @freeze_time(purge_on)
+    @patch('blog.tasks.PURGE_BATCH_SIZE', 2)
+    @patch('blog.tasks.PURGE_MAX_BATCHES', 2)
+    @patch('blog.purge.PURGE_BATCH_SIZE', 2)
+    @patch('blog.tasks.purge_deleted_entries.apply_async')
+    def test_task_requeues_leftovers(self, apply_async):
+        purge_deleted_entries()
+
+        apply_async.assert_called_once_with()
+        self.assertEqual(1, Entry.objects.filter(title__startswith='Expired').count())
+
+    @freeze_time(purge_on)
+    @patch('blog.tasks.purge_deleted_entries.apply_async')
+    def test_task_leaves_the_rest_to_beat(self, apply_async):
+        purge_deleted_entries()
+
+        apply_async.assert_not_called()
+        self.assertEqual({'Recently deleted', 'Scheduled deletion', 'Current'}, self.remaining_titles())
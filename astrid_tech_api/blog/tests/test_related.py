@@ -0,0 +1,123 @@
+import random
+from datetime import datetime
+from uuid import uuid4
+
+import pytz
+from django.test import SimpleTestCase
+from freezegun import freeze_time
+from rest_framework.test import APITestCase
+
+from blog.models import Entry, Tag
+from blog.related import RelatedIndex, RelatedDocument, tokenize, related_index
+
+create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
+retrieve_on = datetime(2021, 6, 18, 5, 6, tzinfo=pytz.utc)
+
+
+def tagged(*tags):
+    return RelatedDocument(uuid4(), tokenize(''), tags)
+
+
+class RelatedIndexTests(SimpleTestCase):
+    def test_rare_shared_tags_count_more(self):
+        entry, rare, common = tagged('rust', 'blog'), tagged('rust', 'blog'), tagged('blog')
+        crowd = [tagged('blog') for _ in range(5)]
+        index = RelatedIndex(k=2)
+        index.build([entry, rare, common, *crowd])
+
+        related = index.related(entry.uuid)
+
+        self.assertEqual(rare.uuid, related[0][0])
+        self.assertAlmostEqual(1 / 2 + 1 / 8, related[0][1])
+
+    def test_similar_text_is_related(self):
+        docs = [
+            RelatedDocument(uuid4(), tokenize('Soldering a mechanical keyboard with hotswap sockets'), []),
+            RelatedDocument(uuid4(), tokenize('Building a mechanical keyboard, sockets and all'), []),
+            RelatedDocument(uuid4(), tokenize('A recipe for sourdough bread'), []),
+        ]
+        index = RelatedIndex()
+        index.build(docs)
+
+        self.assertEqual([docs[1].uuid], [uuid for uuid, _ in index.related(docs[0].uuid)])
+
+    def test_incremental_updates_match_rebuild(self):
+        rng = random.Random(1)
+        tags = [f'tag{i}' for i in range(8)]
+        docs = {}
+        for _ in range(40):
+            doc = tagged(*rng.sample(tags, rng.randint(1, 3)))
+            docs[doc.uuid] = doc
+
+        index = RelatedIndex(k=5)
+        index.build(docs.values())
+        for _ in range(30):
+            uuid = rng.choice(list(docs))
+            if rng.random() < 0.3:
+                del docs[uuid]
+                index.update(removed=[uuid])
+            else:
+                docs[uuid] = RelatedDocument(uuid, docs[uuid].terms, rng.sample(tags, rng.randint(1, 3)))
+                index.update([docs[uuid]])
+                last_updated = uuid
+
+        rebuilt = RelatedIndex(k=5)
+        rebuilt.build(docs.values())
+        # Other entries' scores drift with tag cardinalities until a rebuild, but the entry just updated is exact
+        self.assertEqual(
+            [round(score, 9) for _, score in rebuilt.related(last_updated)],
+            [round(score, 9) for _, score in index.related(last_updated)]
+        )
+        for uuid in docs:
+            self.assertTrue(all(related in docs for related, _ in index.related(uuid)))
+
+    def test_removed_entries_are_not_related(self):
+        a, b = tagged('x'), tagged('x')
+        index = RelatedIndex()
+        index.build([a, b])
+
+        index.update(removed=[b.uuid])
+
+        self.assertEqual([], index.related(a.uuid))
+        self.assertEqual([], index.related(b.uuid))
+
+
+class RelatedEntriesAPI(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        related_index.clear()
+        self.rust = Tag.objects.create(id='rust')
+        self.cooking = Tag.objects.create(id='cooking')
+        self.entries = [Entry.objects.create(title=f'Entry #{i}', ordinal=i) for i in range(4)]
+        for entry in self.entries[:3]:
+            entry.tags.add(self.rust)
+        self.entries[3].tags.add(self.cooking)
+
+    def get_related(self, entry):
+        response = self.client.get(f'/api/entries/{entry.uuid}/related/')
+        self.assertEqual(200, response.status_code)
+        return [obj['title'] for obj in response.json()]
+
+    @freeze_time(retrieve_on)
+    def test_related(self):
+        self.assertEqual(['Entry #1', 'Entry #2'], self.get_related(self.entries[0]))
+        self.assertEqual([], self.get_related(self.entries[3]))
+
+    @freeze_time(retrieve_on)
+    def test_follows_changes(self):
+        self.get_related(self.entries[0])
+
+        self.entries[3].tags.add(self.rust)
+        self.entries[1].delete()
+
+        self.assertEqual(['Entry #2', 'Entry #3'], self.get_related(self.entries[0]))
+
+    @freeze_time(retrieve_on)
+    def test_sparse_fieldset(self):
+        response = self.client.get(f'/api/entries/{self.entries[0].uuid}/related/', {'fields': 'uuid'})
+
+        self.assertEqual([{'uuid': str(self.entries[1].uuid)}, {'uuid': str(self.entries[2].uuid)}], response.json())
+
+    @freeze_time(retrieve_on)
+    def test_missing_entry(self):
+        self.assertEqual(404, self.client.get('/api/entries/00000000-0000-0000-0000-000000000000/related/').status_code)
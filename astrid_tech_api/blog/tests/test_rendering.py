@@ -0,0 +1,87 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+
+from blog.models import Entry
+from blog.rendering import render_content, RENDERER_VERSION
+
+
+class RenderContentTests(APITestCase):
+    def test_renders_markdown(self):
+        self.assertEqual('<p>some <em>markdown</em></p>', render_content('text/markdown', 'some *markdown*'))
+
+    def test_escapes_plaintext(self):
+        self.assertEqual('<p>1 &lt; 2<br>3 &gt; 2</p>', render_content('text/plain', '1 < 2\n3 > 2'))
+
+    def test_passes_html_through(self):
+        self.assertEqual('<b>bold</b>', render_content('text/html', '<b>bold</b>'))
+
+    def test_sanitizes_html(self):
+        self.assertEqual(
+            '<p>alert(1)<a>link</a></p>',
+            render_content('text/html', '<p onclick="x()"><script>alert(1)</script><a href="javascript:x()">link</a></p>')
+        )
+
+    def test_sanitizes_markdown(self):
+        self.assertEqual(
+            '<p><a href="https://example.com">fine</a> <a>not fine</a></p>',
+            render_content('text/markdown', '[fine](https://example.com) [not fine](javascript:alert(1))<iframe>')
+        )
+
+    def test_entry_is_rendered_on_save(self):
+        entry = Entry.objects.create(content='# Heading', content_type='text/markdown', ordinal=0)
+
+        entry.refresh_from_db()
+        self.assertEqual('<h1>Heading</h1>', entry.content_html)
+        self.assertEqual(RENDERER_VERSION, entry.content_html_version)
+
+    def test_entry_is_rendered_on_partial_save(self):
+        entry = Entry.objects.create(content='# Heading', content_type='text/markdown', ordinal=0)
+        entry.content = '## Subheading'
+        entry.save(update_fields=['content'])
+
+        entry.refresh_from_db()
+        self.assertEqual('<h2>Subheading</h2>', entry.content_html)
+
+    def test_serializer_exposes_html(self):
+        entry = Entry.objects.create(content='**bold**', ordinal=0)
+
+        obj = self.client.get(f'/api/entries/{entry.uuid}/').json()
+
+        self.assertEqual('<p><strong>bold</strong></p>', obj['content_html'])
+        self.assertNotIn('content_html_version', obj)
+
+
+class RerenderEntriesCommandTests(APITestCase):
+    def setUp(self):
+        self.entries = [Entry.objects.create(content=f'*entry {i}*', ordinal=i) for i in range(7)]
+        # Pretend that these were rendered by an older renderer
+        Entry.objects.filter(pk__in=[e.pk for e in self.entries[:5]]).update(content_html='old', content_html_version=0)
+        Entry.objects.filter(pk=self.entries[5].pk).update(content_html='', content_html_version=None)
+
+    def assert_rerendered(self, **options):
+        out = StringIO()
+        call_command('rerender_entries', stdout=out, chunk_size=2, **options)
+
+        self.assertIn('Re-rendered 6 entries', out.getvalue())
+        for i, entry in enumerate(self.entries):
+            entry.refresh_from_db()
+            self.assertEqual(f'<p><em>entry {i}</em></p>', entry.content_html)
+            self.assertEqual(RENDERER_VERSION, entry.content_html_version)
+
+    def test_rerenders_stale_rows_in_process(self):
+        self.assert_rerendered(workers=1)
+
+    def test_rerenders_stale_rows_in_parallel(self):
+        self.assert_rerendered(workers=2)
+
+    def test_drops_cached_details(self):
+        cache.clear()
+        url = f'/api/entries/{self.entries[0].uuid}/'
+        self.assertEqual('old', self.client.get(url).json()['content_html'])
+
+        call_command('rerender_entries', stdout=StringIO(), workers=1)
+
+        self.assertEqual('<p><em>entry 0</em></p>', self.client.get(url).json()['content_html'])
@@ -0,0 +1,192 @@
+from datetime import datetime, timedelta
+
+import pytz
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from freezegun import freeze_time
+from rest_framework.test import APITestCase
+
+from blog.models import Entry
+from blog.replies import reply_thread
+from blog.urlhash import normalize_url, url_hash
+
+create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
+retrieve_on = datetime(2021, 6, 18, 5, 6, tzinfo=pytz.utc)
+
+
+class UrlHashTests(SimpleTestCase):
+    def test_normalizes_trivial_differences(self):
+        for url in [
+            'http://example.com/post/',
+            'https://www.example.com/post',
+            'HTTPS://Example.COM:443/post#comments',
+            '  https://example.com/post/  ',
+        ]:
+            self.assertEqual('https://example.com/post', normalize_url(url), url)
+            self.assertEqual(url_hash('https://example.com/post'), url_hash(url), url)
+
+    def test_keeps_meaningful_differences(self):
+        self.assertNotEqual(url_hash('https://example.com/post'), url_hash('https://example.com/post?page=2'))
+        self.assertNotEqual(url_hash('https://example.com/post'), url_hash('https://example.com:8080/post'))
+        self.assertNotEqual(url_hash('https://example.com/post'), url_hash('https://example.com/Post'))
+
+    def test_no_hash_without_url(self):
+        self.assertIsNone(url_hash(None))
+        self.assertIsNone(url_hash(''))
+
+    def test_fits_signed_bigint(self):
+        h = url_hash('https://example.com/post')
+        self.assertTrue(-2 ** 63 <= h < 2 ** 63)
+
+
+class RepliesAPI(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        cache.clear()
+        self.reply = Entry.objects.create(title='Reply', ordinal=0, reply_to='http://www.example.com/post/')
+        self.repost = Entry.objects.create(title='Repost', ordinal=1, repost_of='https://example.com/post')
+        Entry.objects.create(title='Unrelated', ordinal=2, reply_to='https://example.com/other')
+        Entry.objects.create(title='Hidden', ordinal=3, reply_to='https://example.com/post', published_date=None)
+
+    def get_titles(self, params):
+        response = self.client.get('/api/entries/replies/', params)
+        self.assertEqual(200, response.status_code)
+        return [obj['title'] for obj in response.json()]
+
+    @freeze_time(retrieve_on)
+    def test_finds_replies_and_reposts(self):
+        self.assertEqual(['Reply', 'Repost'], self.get_titles({'to': 'https://example.com/post'}))
+
+    @freeze_time(retrieve_on)
+    def test_matches_url_variants(self):
+        for url in ['http://example.com/post', 'https://www.example.com/post/', 'https://example.com/post#top']:
+            self.assertEqual(['Reply', 'Repost'], self.get_titles({'to': url}), url)
+
+    @freeze_time(retrieve_on)
+    def test_applies_list_filters(self):
+        self.assertEqual(['Reply'], self.get_titles({'to': 'https://example.com/post', 'ordinal': 0}))
+
+    @freeze_time(retrieve_on)
+    def test_paginates(self):
+        response = self.client.get('/api/entries/replies/', {'to': 'https://example.com/post', 'page_size': 1})
+        page = response.json()
+        self.assertEqual(['Repost'], [obj['title'] for obj in page['results']])
+        self.assertIsNotNone(page['next'])
+
+    @freeze_time(retrieve_on)
+    def test_requires_url(self):
+        response = self.client.get('/api/entries/replies/')
+        self.assertEqual(400, response.status_code)
+        self.assertIn('to', response.json())
+
+    @freeze_time(retrieve_on)
+    def test_uses_hash_index(self):
+        with self.assertNumQueries(4):  # The entries, then one prefetch each for syndications, tags, and attachments
+            self.client.get('/api/entries/replies/', {'to': 'https://example.com/post'})
+
+    @freeze_time(retrieve_on)
+    def test_rehashes_on_edit(self):
+        self.reply.reply_to = 'https://example.com/other'
+        self.reply.save()
+
+        self.assertEqual(['Repost'], self.get_titles({'to': 'https://example.com/post'}))
+
+
+class ReplyThreadAPI(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        cache.clear()
+        self.root = Entry.objects.create(title='Root', slug_name='root', ordinal=0)
+        self.root_url = 'https://astrid.tech/2021/06/18/0/root'
+        # Replies can link to the root with or without its slug name
+        self.first = Entry.objects.create(title='First', ordinal=1, reply_to=self.root_url)
+        self.second = Entry.objects.create(title='Second', ordinal=2, reply_to='http://astrid.tech/2021/06/18/0/')
+        self.nested = Entry.objects.create(title='Nested', ordinal=3, reply_to='https://astrid.tech/2021/06/18/1')
+
+    def get_thread(self, entry):
+        return self.client.get(f'/api/entries/{entry.uuid}/').json()['replies']
+
+    @classmethod
+    def titles(cls, thread):
+        return [(node['title'], cls.titles(node['replies'])) for node in thread]
+
+    @freeze_time(retrieve_on)
+    def test_nests_replies(self):
+        self.assertEqual(
+            [('First', [('Nested', [])]), ('Second', [])],
+            self.titles(self.get_thread(self.root))
+        )
+
+    @freeze_time(retrieve_on)
+    def test_one_query_per_level(self):
+        # The version, the entry and its prefetched relations, then three levels of replies, the last one empty
+        with self.assertNumQueries(8):
+            self.client.get(f'/api/entries/{self.root.uuid}/')
+
+    @freeze_time(retrieve_on)
+    def test_depth_is_limited(self):
+        self.assertEqual([('First', []), ('Second', [])], self.titles(reply_thread(self.root, depth=1)))
+
+    @freeze_time(retrieve_on)
+    def test_omitted_from_sparse_fieldsets(self):
+        response = self.client.get(f'/api/entries/{self.root.uuid}/', {'fields': 'title'})
+        self.assertEqual({'title': 'Root'}, response.json())
+
+    @freeze_time(retrieve_on)
+    def test_hidden_replies_are_left_out(self):
+        self.second.published_date = None
+        self.second.save()
+
+        self.assertEqual([('First', [('Nested', [])])], self.titles(self.get_thread(self.root)))
+
+    @freeze_time(retrieve_on)
+    def test_new_reply_invalidates_cached_ancestors(self):
+        self.get_thread(self.root)
+        self.get_thread(self.first)
+
+        Entry.objects.create(title='Deeper', ordinal=4, reply_to='https://astrid.tech/2021/06/18/3')
+
+        self.assertEqual(
+            [('First', [('Nested', [('Deeper', [])])]), ('Second', [])],
+            self.titles(self.get_thread(self.root))
+        )
+        self.assertEqual([('Nested', [('Deeper', [])])], self.titles(self.get_thread(self.first)))
+
+    @freeze_time(retrieve_on)
+    def test_moved_reply_invalidates_old_parent(self):
+        self.get_thread(self.root)
+
+        self.second.reply_to = 'https://example.com/elsewhere'
+        self.second.save()
+
+        self.assertEqual([('First', [('Nested', [])])], self.titles(self.get_thread(self.root)))
+
+    @freeze_time(retrieve_on)
+    def test_deleted_reply_invalidates_parent(self):
+        self.get_thread(self.first)
+
+        self.nested.delete()
+
+        self.assertEqual([], self.get_thread(self.first))
+
+    def test_new_reply_changes_ancestor_validators(self):
+        with freeze_time(retrieve_on):
+            response = self.client.get(f'/api/entries/{self.root.uuid}/')
+            etag, last_modified = response['ETag'], response['Last-Modified']
+
+        with freeze_time(retrieve_on + timedelta(minutes=1)):
+            Entry.objects.create(title='Deeper', ordinal=4, reply_to='https://astrid.tech/2021/06/18/3')
+
+            url = f'/api/entries/{self.root.uuid}/'
+            self.assertEqual(200, self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code)
+            self.assertEqual(200, self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code)
+
+    def test_deleted_reply_changes_parent_validators(self):
+        with freeze_time(retrieve_on):
+            etag = self.client.get(f'/api/entries/{self.first.uuid}/')['ETag']
+
+        with freeze_time(retrieve_on + timedelta(minutes=1)):
+            self.nested.delete()
+
+            response = self.client.get(f'/api/entries/{self.first.uuid}/', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(200, response.status_code)
@@ -0,0 +1,221 @@
+import random
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytz
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, SimpleTestCase
+from freezegun import freeze_time
+from rest_framework.test import APITestCase
+
+from blog.deltas import encode_delta, apply_delta, encode_snapshot
+from blog.models import Entry, EntryRevision
+from blog.revisions import reconstruct_revision, record_revision
+
+create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
+edit_on = create_on + timedelta(hours=1)
+
+
+def make_paragraphs(rng: random.Random):
+    words = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 9))) for _ in range(500)]
+    return [f'Paragraph {i}: ' + ' '.join(rng.choices(words, k=15)) + '.\n\n' for i in range(50)]
+
+
+paragraphs = make_paragraphs(random.Random(0))
+
+
+def edited(rng: random.Random, text: str) -> str:
+    lines = text.splitlines(keepends=True)
+    for _ in range(rng.randint(1, 5)):
+        i = rng.randrange(len(lines) + 1)
+        if lines and rng.random() < 0.5:
+            del lines[min(i, len(lines) - 1)]
+        else:
+            lines.insert(i, rng.choice(['A new line\n', 'Another one', '\n', 'Ünïcode ✓\r\n']))
+    return ''.join(lines)
+
+
+class DeltaTests(SimpleTestCase):
+    def test_round_trips(self):
+        rng = random.Random(0)
+        text = ''.join(paragraphs)
+        for _ in range(200):
+            new_text = edited(rng, text)
+            self.assertEqual(new_text, apply_delta(text, encode_delta(text, new_text)))
+            text = new_text
+
+    def test_round_trips_without_trailing_newline(self):
+        self.assertEqual('a\nc', apply_delta('a\nb\n', encode_delta('a\nb\n', 'a\nc')))
+        self.assertEqual('', apply_delta('a\nb\n', encode_delta('a\nb\n', '')))
+
+    def test_small_edit_is_smaller_than_snapshot(self):
+        text = ''.join(paragraphs)
+        new_text = text.replace('Paragraph 25:', 'Paragraph twenty-five:')
+
+        self.assertLess(len(encode_delta(text, new_text)) * 5, len(encode_snapshot(new_text)))
+
+
+class RevisionRecordingTests(TestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        self.entry = Entry.objects.create(title='Entry', content=''.join(paragraphs), ordinal=0)
+
+    def edit(self, content: str) -> Entry:
+        entry = Entry.objects.get(pk=self.entry.pk)
+        entry.content = content
+        entry.save()
+        return entry
+
+    def revisions(self):
+        return list(EntryRevision.objects.filter(entry=self.entry).order_by('number'))
+
+    def test_create_records_snapshot(self):
+        [revision] = self.revisions()
+
+        self.assertEqual(1, revision.number)
+        self.assertTrue(revision.is_snapshot)
+        self.assertEqual(self.entry.content, reconstruct_revision(self.entry, 1))
+
+    def test_edit_records_delta(self):
+        self.edit(self.entry.content + 'One more paragraph.\n')
+
+        _, revision = self.revisions()
+        self.assertFalse(revision.is_snapshot)
+        self.assertEqual(1, revision.snapshot_number)
+        self.assertEqual(len(self.entry.content) + 20, revision.size)
+
+    def test_saves_that_dont_change_content_record_nothing(self):
+        entry = Entry.objects.get(pk=self.entry.pk)
+        entry.title = 'Retitled'
+        entry.save()
+        entry.save(update_fields=['title'])
+
+        self.assertEqual(1, len(self.revisions()))
+
+    def test_content_type_change_is_recorded(self):
+        entry = Entry.objects.get(pk=self.entry.pk)
+        entry.content_type = 'text/plain'
+        entry.save()
+
+        self.assertEqual(['text/markdown', 'text/plain'], [r.content_type for r in self.revisions()])
+
+    def test_every_revision_reconstructs(self):
+        rng = random.Random(1)
+        contents = [self.entry.content]
+        for _ in range(45):
+            contents.append(edited(rng, contents[-1]))
+            self.edit(contents[-1])
+
+        for number, content in enumerate(contents, start=1):
+            self.assertEqual(content, reconstruct_revision(self.entry, number))
+
+    @patch('blog.revisions.REVISION_SNAPSHOT_INTERVAL', 4)
+    def test_snapshots_are_periodic(self):
+        content = self.entry.content
+        for i in range(9):
+            content += f'Edit {i}\n'
+            self.edit(content)
+
+        self.assertEqual([1, 5, 9], [r.number for r in self.revisions() if r.is_snapshot])
+
+    @patch('blog.revisions.REVISION_SNAPSHOT_INTERVAL', 4)
+    def test_reconstruction_is_two_queries(self):
+        content = self.entry.content
+        for i in range(7):
+            content += f'Edit {i}\n'
+            self.edit(content)
+
+        with self.assertNumQueries(2):  # Find the snapshot, then fetch the chain from it
+            self.assertEqual(content, reconstruct_revision(self.entry, 8))
+
+    def test_rewrite_records_snapshot(self):
+        self.edit('Something else entirely.\n')
+
+        self.assertTrue(self.revisions()[1].is_snapshot)
+
+    def test_content_changed_behind_our_back_records_snapshot(self):
+        Entry.objects.filter(pk=self.entry.pk).update(content='Updated in bulk\n')
+        entry = self.edit('Updated in bulk\nThen edited\n')
+
+        self.assertTrue(self.revisions()[1].is_snapshot)
+        self.assertEqual(entry.content, reconstruct_revision(entry, 2))
+
+    def test_concurrent_save_is_numbered_after_the_other(self):
+        # Both loaded before either saved, so the second save's content isn't what the latest revision holds
+        first, second = Entry.objects.get(pk=self.entry.pk), Entry.objects.get(pk=self.entry.pk)
+        first.content += 'First edit\n'
+        first.save()
+        second.content += 'Second edit\n'
+        second.save()
+
+        self.assertEqual([1, 2, 3], [r.number for r in self.revisions()])
+        self.assertTrue(self.revisions()[2].is_snapshot)
+        self.assertEqual(second.content, reconstruct_revision(self.entry, 3))
+
+    def test_recording_same_content_again_is_a_noop(self):
+        self.assertIsNone(record_revision(self.entry, self.entry.content))
+
+    def test_missing_revision(self):
+        self.assertIsNone(reconstruct_revision(self.entry, 2))
+
+
+class RevisionAPITests(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        cache.clear()
+        self.entry = Entry.objects.create(title='Entry', content=''.join(paragraphs), ordinal=0)
+        with freeze_time(edit_on):
+            entry = Entry.objects.get(pk=self.entry.pk)
+            entry.content += 'One more paragraph.\n'
+            entry.save()
+
+    def test_lists_revisions_newest_first(self):
+        response = self.client.get(f'/api/entries/{self.entry.uuid}/revisions/')
+
+        self.assertEqual(200, response.status_code)
+        second, first = response.json()
+        self.assertEqual(
+            {'number': 1, 'created_date': '2021-06-18T05:05:00Z', 'content_type': 'text/markdown', 'snapshot': True,
+             'size': len(self.entry.content)},
+            {k: first[k] for k in ('number', 'created_date', 'content_type', 'snapshot', 'size')}
+        )
+        self.assertEqual(2, second['number'])
+        self.assertFalse(second['snapshot'])
+        self.assertLess(second['stored_size'], first['stored_size'])
+
+    @patch('blog.deltas.zlib.decompress')
+    def test_listing_does_not_decode(self, decompress):
+        with self.assertNumQueries(2):  # The entry, then its revisions
+            self.client.get(f'/api/entries/{self.entry.uuid}/revisions/')
+
+        decompress.assert_not_called()
+
+    def log_in_as_admin(self):
+        admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_authenticate(admin)
+
+    def test_gets_revision_content(self):
+        self.log_in_as_admin()
+        response = self.client.get(f'/api/entries/{self.entry.uuid}/revisions/1/')
+
+        self.assertEqual({'number': 1, 'content': self.entry.content}, response.json())
+
+    def test_revision_content_is_admin_only(self):
+        self.assertEqual(401, self.client.get(f'/api/entries/{self.entry.uuid}/revisions/1/').status_code)
+
+        user = get_user_model().objects.create_user('someone', 'someone@example.com', 'password')
+        self.client.force_authenticate(user)
+        self.assertEqual(403, self.client.get(f'/api/entries/{self.entry.uuid}/revisions/1/').status_code)
+
+    def test_missing_revision_404(self):
+        self.log_in_as_admin()
+        self.assertEqual(404, self.client.get(f'/api/entries/{self.entry.uuid}/revisions/3/').status_code)
+
+    @freeze_time(edit_on)
+    def test_invisible_entry_404(self):
+        hidden = Entry.objects.create(title='Hidden', content='Draft', published_date=None)
+
+        self.assertEqual(404, self.client.get(f'/api/entries/{hidden.uuid}/revisions/').status_code)
+        self.log_in_as_admin()
+        self.assertEqual(404, self.client.get(f'/api/entries/{hidden.uuid}/revisions/1/').status_code)
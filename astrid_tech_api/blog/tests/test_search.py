@@ -0,0 +1,75 @@
+from unittest.mock import patch
+
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from blog.models import Entry
+from blog.search import to_fts5_query
+
+
+class FTS5QueryTests(APITestCase):
+    def test_quotes_words(self):
+        self.assertEqual('"foo" "bar"', to_fts5_query('foo bar'))
+
+    def test_strips_syntax(self):
+        self.assertEqual('"NEAR" "foo" "bar"', to_fts5_query('NEAR(foo, "bar'))
+
+
+class EntrySearchAPI(APITestCase):
+    def setUp(self):
+        self.title_match = Entry.objects.create(title='Writing a Django search endpoint', content='Lorem ipsum',
+                                                ordinal=0)
+        self.content_match = Entry.objects.create(title='Unrelated', content='I used Django once for a search box',
+                                                  ordinal=1)
+        self.no_match = Entry.objects.create(title='Rust', content='Borrow checker woes', ordinal=2)
+
+    def search(self, q, **params):
+        response = self.client.get('/api/entries/search/', {'q': q, **params})
+        self.assertEqual(200, response.status_code, msg=response.content)
+        return response.json()
+
+    def test_ranks_title_matches_first(self):
+        data = self.search('django search')
+
+        self.assertEqual(2, data['count'])
+        self.assertEqual([str(self.title_match.uuid), str(self.content_match.uuid)],
+                         [obj['uuid'] for obj in data['results']])
+
+    def test_stems_words(self):
+        data = self.search('searching')
+
+        self.assertEqual(2, data['count'])
+
+    def test_paginates(self):
+        first = self.search('django', page_size=1)
+        second = self.client.get(first['next']).json()
+
+        self.assertEqual(1, len(first['results']))
+        self.assertEqual(str(self.content_match.uuid), second['results'][0]['uuid'])
+
+    def test_other_databases_match_every_word(self):
+        with patch.object(connection, 'vendor', 'mysql'):
+            data = self.search('django SEARCH')
+
+        self.assertEqual(2, data['count'])
+        self.assertEqual([str(self.content_match.uuid), str(self.title_match.uuid)],
+                         [obj['uuid'] for obj in data['results']])
+
+    def test_index_follows_updates(self):
+        self.no_match.content = 'Porting my Django app to Rust'
+        self.no_match.save()
+
+        self.assertEqual(3, self.search('django')['count'])
+
+    def test_index_follows_deletes(self):
+        self.title_match.delete()
+
+        self.assertEqual(1, self.search('django')['count'])
+
+    def test_missing_query_is_bad_request(self):
+        response = self.client.get('/api/entries/search/')
+
+        self.assertEqual(400, response.status_code)
+
+    def test_query_without_words_matches_nothing(self):
+        self.assertEqual(0, self.search('"(*)')['count'])
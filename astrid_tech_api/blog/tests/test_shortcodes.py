@@ -0,0 +1,87 @@
+from datetime import datetime, date
+
+import pytz
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from freezegun import freeze_time
+from rest_framework.test import APITestCase
+
+from blog.models import Entry
+from blog.shortcodes import EntryShortCode, entry_short_code
+
+create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
+retrieve_on = datetime(2021, 6, 18, 5, 6, tzinfo=pytz.utc)
+
+
+class ShortCodeTests(SimpleTestCase):
+    def test_matches_shortener(self):
+        # The same cases as aay_tw_shortener's mapper tests
+        self.assertEqual(EntryShortCode(date(2012, 12, 18), 10), EntryShortCode.parse('e4MYA'))
+        self.assertEqual(EntryShortCode(date(2012, 12, 18), 0), EntryShortCode.parse('e4MY0'))
+
+    def test_round_trip(self):
+        for d, ordinal in [(date(1970, 1, 1), 0), (date(2021, 6, 18), 3), (date(2099, 12, 31), 59)]:
+            self.assertEqual((d, ordinal), EntryShortCode.parse(entry_short_code(d, ordinal)))
+
+    def test_corrects_typos(self):
+        self.assertEqual(EntryShortCode.parse('e41'), EntryShortCode.parse('e4l'))
+        self.assertEqual(EntryShortCode.parse('e40'), EntryShortCode.parse('e4O'))
+
+    def test_rejects_invalid_codes(self):
+        for code in ['', 'e', 'p4MYA', 'e4M!A', 'e' + 'z' * 12]:
+            self.assertIsNone(EntryShortCode.parse(code), code)
+
+    def test_no_code_past_sixtieth_ordinal(self):
+        self.assertIsNone(entry_short_code(date(2021, 6, 18), 60))
+
+
+class ShortCodeAPI(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        cache.clear()
+        self.entries = [
+            Entry.objects.create(title=f'Entry #{i}', slug_name=f'entry-{i}', ordinal=i)
+            for i in range(3)
+        ]
+        self.hidden = Entry.objects.create(title='Hidden', ordinal=3, published_date=None)
+        self.code = entry_short_code(self.entries[1].date.date(), 1)
+
+    @freeze_time(retrieve_on)
+    def test_resolves_visible_entry(self):
+        response = self.client.get(f'/api/entries/by-short-code/{self.code}/')
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(str(self.entries[1].uuid), response.json()['uuid'])
+
+    @freeze_time(retrieve_on)
+    def test_missing_and_hidden_entries_are_not_found(self):
+        for code in [entry_short_code(date(2021, 6, 18), 3), entry_short_code(date(2021, 6, 19), 0), 'nope']:
+            self.assertEqual(404, self.client.get(f'/api/entries/by-short-code/{code}/').status_code, code)
+
+    @freeze_time(retrieve_on)
+    def test_manifest(self):
+        response = self.client.get('/api/entries/short-codes.json')
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({
+            entry_short_code(date(2021, 6, 18), i): f'/2021/06/18/{i}/entry-{i}'
+            for i in range(3)
+        }, response.json())
+
+    @freeze_time(retrieve_on)
+    def test_manifest_is_built_once_per_version(self):
+        self.client.get('/api/entries/short-codes.json')
+
+        with self.assertNumQueries(1):
+            self.client.get('/api/entries/short-codes.json')
+
+        Entry.objects.create(title='New', slug_name='new', ordinal=4)
+        self.assertIn(entry_short_code(date(2021, 6, 18), 4), self.client.get('/api/entries/short-codes.json').json())
+
+    @freeze_time(retrieve_on)
+    def test_manifest_conditional_get(self):
+        etag = self.client.get('/api/entries/short-codes.json')['ETag']
+
+        response = self.client.get('/api/entries/short-codes.json', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(304, response.status_code)
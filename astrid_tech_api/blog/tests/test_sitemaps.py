@@ -0,0 +1,105 @@
+import gzip
+from datetime import datetime, date
+from unittest.mock import patch
+from xml.etree import ElementTree
+
+import pytz
+from django.core.cache import cache
+from freezegun import freeze_time
+from rest_framework.test import APITestCase
+
+from blog.models import Entry
+
+create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
+retrieve_on = datetime(2021, 6, 18, 5, 6, tzinfo=pytz.utc)
+
+NS = {'sm': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
+
+
+@patch('blog.sitemaps.SHARD_SIZE', 3)
+class SitemapTests(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        cache.clear()
+        days = [date(2021, 1, 1), date(2021, 1, 1), date(2021, 2, 1), date(2021, 3, 1), date(2021, 3, 2)]
+        self.entries = [
+            Entry.objects.create(title=f'Entry #{i}', slug_name=f'entry-{i}', date=d, ordinal=i)
+            for i, d in enumerate(days)
+        ]
+        Entry.objects.create(title='Hidden', date=date(2021, 1, 1), ordinal=10, published_date=None)
+
+    def get_index(self):
+        response = self.client.get('/api/sitemap.xml')
+        self.assertEqual(200, response.status_code)
+        root = ElementTree.fromstring(response.content)
+        return [
+            (el.find('sm:loc', NS).text, el.find('sm:lastmod', NS).text)
+            for el in root.findall('sm:sitemap', NS)
+        ]
+
+    def get_shard(self, url, **extra):
+        response = self.client.get(url, **extra)
+        self.assertEqual(200, response.status_code)
+        content = response.content
+        if response.get('Content-Encoding') == 'gzip':
+            content = gzip.decompress(content)
+        root = ElementTree.fromstring(content)
+        return [el.find('sm:loc', NS).text for el in root.findall('sm:url', NS)]
+
+    @freeze_time(retrieve_on)
+    def test_index_lists_date_shards(self):
+        self.assertEqual([
+            ('http://testserver/api/sitemaps/entries-2021-01-01.xml', '2021-06-18T05:05:00+00:00'),
+            ('http://testserver/api/sitemaps/entries-2021-03-01.xml', '2021-06-18T05:05:00+00:00'),
+        ], self.get_index())
+
+    @freeze_time(retrieve_on)
+    def test_shards(self):
+        self.assertEqual([
+            'https://astrid.tech/2021/01/01/0/entry-0',
+            'https://astrid.tech/2021/01/01/1/entry-1',
+            'https://astrid.tech/2021/02/01/2/entry-2',
+        ], self.get_shard('/api/sitemaps/entries-2021-01-01.xml'))
+        self.assertEqual([
+            'https://astrid.tech/2021/03/01/3/entry-3',
+            'https://astrid.tech/2021/03/02/4/entry-4',
+        ], self.get_shard('/api/sitemaps/entries-2021-03-01.xml', HTTP_ACCEPT_ENCODING='gzip, deflate'))
+
+    @freeze_time(retrieve_on)
+    def test_gzip_negotiation(self):
+        response = self.client.get('/api/sitemaps/entries-2021-03-01.xml', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual('gzip', response['Content-Encoding'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    @freeze_time(retrieve_on)
+    def test_gzip_has_own_etag(self):
+        url = '/api/sitemaps/entries-2021-03-01.xml'
+        gzipped = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        plain = self.client.get(url)
+
+        self.assertNotEqual(gzipped['ETag'], plain['ETag'])
+        self.assertEqual(304, self.client.get(url, HTTP_ACCEPT_ENCODING='gzip',
+                                              HTTP_IF_NONE_MATCH=gzipped['ETag']).status_code)
+        self.assertEqual(200, self.client.get(url, HTTP_IF_NONE_MATCH=gzipped['ETag']).status_code)
+
+    @freeze_time(retrieve_on)
+    def test_unknown_shard(self):
+        self.assertEqual(404, self.client.get('/api/sitemaps/entries-2021-02-01.xml').status_code)
+        self.assertEqual(404, self.client.get('/api/sitemaps/entries-nope.xml').status_code)
+
+    @freeze_time(retrieve_on)
+    def test_shard_cached_until_its_range_changes(self):
+        self.get_shard('/api/sitemaps/entries-2021-01-01.xml')
+        self.get_shard('/api/sitemaps/entries-2021-03-01.xml')
+
+        # Boundaries and version, but no streaming
+        with self.assertNumQueries(2):
+            self.get_shard('/api/sitemaps/entries-2021-01-01.xml')
+
+        self.entries[4].slug_name = 'renamed'
+        self.entries[4].save()
+
+        with self.assertNumQueries(2):
+            self.get_shard('/api/sitemaps/entries-2021-01-01.xml')
+        self.assertIn('https://astrid.tech/2021/03/02/4/renamed', self.get_shard('/api/sitemaps/entries-2021-03-01.xml'))
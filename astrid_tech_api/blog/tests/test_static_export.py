@@ -0,0 +1,196 @@
+import json
+import multiprocessing
+import os
+from datetime import datetime
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import skipUnless
+from unittest.mock import patch
+
+import pytz
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+from freezegun import freeze_time
+from rest_framework.test import APITestCase
+
+from blog.models import Entry, Tag, Syndication
+from blog.static_export import export_static, ExportStats, write_files
+from blog.tests.utils import use_database_file, migrate_database_file
+
+create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
+update_on = datetime(2021, 6, 18, 5, 6, tzinfo=pytz.utc)
+export_on = datetime(2021, 6, 18, 5, 7, tzinfo=pytz.utc)
+
+# Three entries, a tag index, and the site and tag feeds
+FILE_COUNT = 3 + 1 + 3 + 3
+
+
+class StaticExportTests(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        cache.clear()
+        self.tag = Tag.objects.create(id='exported', name='Exported')
+        self.entries = [Entry.objects.create(title=f'Entry #{i}', ordinal=i) for i in range(3)]
+        self.entries[0].tags.add(self.tag)
+        self.hidden = Entry.objects.create(title='Hidden', ordinal=3, published_date=None)
+
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.out_dir = tmp.name
+
+    def read(self, path):
+        with open(os.path.join(self.out_dir, path), encoding='utf-8') as f:
+            return f.read()
+
+    def mtime(self, path):
+        return os.stat(os.path.join(self.out_dir, path)).st_mtime_ns
+
+    @freeze_time(export_on)
+    def test_writes_layout(self):
+        stats = export_static(self.out_dir)
+
+        self.assertEqual(ExportStats(written=FILE_COUNT, unchanged=0, removed=0), stats)
+        entry = json.loads(self.read('entries/2021/06/18/1.json'))
+        self.assertEqual('Entry #1', entry['title'])
+        self.assertFalse(os.path.exists(os.path.join(self.out_dir, 'entries/2021/06/18/3.json')))
+
+        tag = json.loads(self.read('tags/exported.json'))
+        self.assertEqual('Exported', tag['name'])
+        self.assertEqual([str(self.entries[0].uuid)], [e['uuid'] for e in tag['entries']])
+
+        self.assertIn('Entry #2', self.read('feeds/rss.xml'))
+        self.assertIn('Entry #0', self.read('feeds/tags/exported/atom.xml'))
+        self.assertNotIn('Entry #2', self.read('feeds/tags/exported/atom.xml'))
+        self.assertEqual(3, len(json.loads(self.read('feeds/feed.json'))['items']))
+
+    @freeze_time(export_on)
+    def test_matches_export_endpoint(self):
+        export_static(self.out_dir)
+
+        response = self.client.get('/api/entries/export.ndjson')
+        first = json.loads(b''.join(response.streaming_content).decode().splitlines()[0])
+        self.assertEqual(first, json.loads(self.read('entries/2021/06/18/0.json')))
+
+    @freeze_time(export_on)
+    def test_noop_export_serializes_and_writes_nothing(self):
+        export_static(self.out_dir)
+        before = self.mtime('entries/2021/06/18/0.json')
+
+        # Listing the entries, then the tags, the tag's entries, and the site and tag feed versions
+        with self.assertNumQueries(5):
+            stats = export_static(self.out_dir)
+
+        self.assertEqual(ExportStats(written=0, unchanged=FILE_COUNT, removed=0), stats)
+        self.assertEqual(before, self.mtime('entries/2021/06/18/0.json'))
+
+    @freeze_time(export_on)
+    def test_rewrites_only_changed_entries(self):
+        export_static(self.out_dir)
+        untouched = self.mtime('entries/2021/06/18/2.json')
+
+        with freeze_time(update_on):
+            self.entries[1].title = 'Edited'
+            self.entries[1].save()
+        stats = export_static(self.out_dir)
+
+        self.assertEqual('Edited', json.loads(self.read('entries/2021/06/18/1.json'))['title'])
+        self.assertEqual(untouched, self.mtime('entries/2021/06/18/2.json'))
+        # The entry, and the site feeds it's in. The tag index and feeds don't include it
+        self.assertEqual(1 + 3, stats.written)
+
+    @freeze_time(export_on)
+    def test_rewrites_entries_with_new_syndications(self):
+        export_static(self.out_dir)
+
+        with freeze_time(update_on):
+            Syndication.objects.create(entry=self.entries[1], location='https://example.com/1',
+                                       status=Syndication.Status.SYNDICATED)
+        export_static(self.out_dir)
+
+        entry = json.loads(self.read('entries/2021/06/18/1.json'))
+        self.assertEqual(['https://example.com/1'], [s['location'] for s in entry['syndications']])
+
+    @freeze_time(export_on)
+    def test_noop_export_starts_no_pool(self):
+        export_static(self.out_dir)
+
+        with patch('blog.static_export.ProcessPoolExecutor') as pool:
+            export_static(self.out_dir, workers=2)
+
+        pool.assert_not_called()
+
+    @freeze_time(export_on)
+    def test_removes_entries_no_longer_visible(self):
+        export_static(self.out_dir)
+
+        self.entries[2].delete()
+        stats = export_static(self.out_dir)
+
+        self.assertEqual(1, stats.removed)
+        self.assertFalse(os.path.exists(os.path.join(self.out_dir, 'entries/2021/06/18/2.json')))
+
+    @freeze_time(export_on)
+    def test_full_export_skips_identical_files(self):
+        export_static(self.out_dir)
+
+        stats = export_static(self.out_dir, full=True)
+
+        self.assertEqual(ExportStats(written=0, unchanged=FILE_COUNT, removed=0), stats)
+
+    @freeze_time(export_on)
+    def test_restores_missing_files(self):
+        export_static(self.out_dir)
+        os.remove(os.path.join(self.out_dir, 'entries/2021/06/18/0.json'))
+
+        stats = export_static(self.out_dir)
+
+        self.assertEqual(1, stats.written)
+        self.assertEqual('Entry #0', json.loads(self.read('entries/2021/06/18/0.json'))['title'])
+
+    @freeze_time(export_on)
+    def test_leaves_out_tags_that_arent_file_names(self):
+        for tag_id in ('..', 'a/b', '../escaped'):
+            self.entries[1].tags.add(Tag.objects.create(id=tag_id))
+
+        export_static(self.out_dir)
+
+        self.assertEqual(['exported.json'], os.listdir(os.path.join(self.out_dir, 'tags')))
+        self.assertEqual(['exported'], os.listdir(os.path.join(self.out_dir, 'feeds', 'tags')))
+        self.assertFalse(os.path.exists(os.path.join(self.out_dir, 'escaped')))
+
+    def test_refuses_paths_outside_output_dir(self):
+        with self.assertRaises(ValueError):
+            write_files(self.out_dir, [('../escaped.json', {})], {})
+
+
+def export_database_file(path: str, out_dir: str):
+    use_database_file(path)
+    with freeze_time(create_on):
+        for i in range(3):
+            Entry.objects.create(title=f'Entry #{i}', ordinal=i)
+    with freeze_time(export_on):
+        call_command('export_static', out_dir, workers=2, chunk_size=1, stdout=StringIO())
+
+
+@skipUnless(connection.vendor == 'sqlite' and 'fork' in multiprocessing.get_all_start_methods(),
+            'Needs SQLite and forking')
+class StaticExportProcessPoolTests(TransactionTestCase):
+    """Exports from a database file, since pool workers load their entries through connections of their own."""
+
+    def test_command_in_process_pool(self):
+        context = multiprocessing.get_context('fork')
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'export.sqlite3')
+            out_dir = os.path.join(tmp, 'out')
+            with context.Pool(1) as pool:
+                pool.apply(migrate_database_file, (path,))
+            # Not in a Pool, since its daemonic workers can't start the export's own pool
+            process = context.Process(target=export_database_file, args=(path, out_dir))
+            process.start()
+            process.join()
+
+            self.assertEqual(0, process.exitcode)
+            with open(os.path.join(out_dir, 'entries/2021/06/18/2.json'), encoding='utf-8') as f:
+                self.assertEqual('Entry #2', json.load(f)['title'])
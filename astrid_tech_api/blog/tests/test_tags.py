@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+
+import pytz
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from freezegun import freeze_time
+from rest_framework.test import APITestCase
+
+from blog.facets import TAG_FACETS_MAX_AGE
+from blog.models import Entry, Tag, utc_now
+from blog.visibility import flip_due_entries
+
+create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
+retrieve_on = datetime(2021, 6, 18, 5, 6, tzinfo=pytz.utc)
+
+
+class MultiTagFilterTests(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        self.tags = [Tag.objects.create(id=f'tag-{i}') for i in range(4)]
+        self.entries = [Entry.objects.create(title=f'Entry #{i}', ordinal=i) for i in range(4)]
+        # Entry i has tags 0 through i
+        for i, entry in enumerate(self.entries):
+            entry.tags.add(*self.tags[:i + 1])
+
+    @freeze_time(retrieve_on)
+    def test_filters_on_all_tags(self):
+        response = self.client.get('/api/entries/', {'has_tag': ['tag-1', 'tag-2', 'tag-0']})
+
+        self.assertCountEqual(['Entry #2', 'Entry #3'], [obj['title'] for obj in response.json()])
+
+    @freeze_time(retrieve_on)
+    def test_repeated_tags_count_once(self):
+        response = self.client.get('/api/entries/', {'has_tag': ['tag-3', 'tag-3']})
+
+        self.assertEqual(['Entry #3'], [obj['title'] for obj in response.json()])
+
+    @freeze_time(retrieve_on)
+    def test_unknown_tag_matches_nothing(self):
+        response = self.client.get('/api/entries/', {'has_tag': ['tag-0', 'nonexistent']})
+
+        self.assertEqual([], response.json())
+
+    @freeze_time(retrieve_on)
+    def test_many_tags_use_one_grouped_pass(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/entries/', {'has_tag': [t.id for t in self.tags]})
+
+        [entry_query] = [q['sql'] for q in ctx.captured_queries if '"blog_entry"."title"' in q['sql']]
+        self.assertEqual(1, entry_query.count('blog_entry_tags'))
+        self.assertIn('HAVING', entry_query)
+
+
+class TagFacetTests(APITestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        cache.clear()
+        self.python = Tag.objects.create(id='python')
+        self.rust = Tag.objects.create(id='rust')
+
+        self.entries = [Entry.objects.create(title=f'Entry #{i}', ordinal=i) for i in range(3)]
+        self.entries[0].tags.add(self.python, self.rust)
+        self.entries[1].tags.add(self.python)
+
+        self.future = Entry(title='Future', ordinal=5).set_all_dates(create_on + timedelta(days=1))
+        self.future.save()
+        self.future.tags.add(self.rust)
+
+    def get_facets(self):
+        response = self.client.get('/api/tags/facets')
+        self.assertEqual(200, response.status_code, msg=response.content)
+        return response.json()
+
+    @freeze_time(retrieve_on)
+    def test_counts_visible_entries(self):
+        self.assertEqual([{'tag': 'python', 'count': 2}, {'tag': 'rust', 'count': 1}], self.get_facets())
+
+    @freeze_time(retrieve_on)
+    def test_cached_facets_use_no_queries(self):
+        self.get_facets()
+
+        with self.assertNumQueries(0):
+            self.get_facets()
+
+    def test_expires_after_max_age(self):
+        with freeze_time(retrieve_on):
+            self.get_facets()
+            # Like a write in a process that doesn't share this one's cache
+            Entry.tags.through.objects.create(entry=self.entries[2], tag=self.rust)
+
+        with freeze_time(retrieve_on + TAG_FACETS_MAX_AGE + timedelta(seconds=1)):
+            self.assertIn({'tag': 'rust', 'count': 2}, self.get_facets())
+
+    @freeze_time(retrieve_on)
+    def test_tagging_invalidates(self):
+        self.get_facets()
+
+        self.entries[2].tags.add(self.rust)
+
+        self.assertIn({'tag': 'rust', 'count': 2}, self.get_facets())
+
+    @freeze_time(retrieve_on)
+    def test_entry_deletion_invalidates(self):
+        self.get_facets()
+
+        self.entries[0].delete()
+
+        self.assertEqual([{'tag': 'python', 'count': 1}], self.get_facets())
+
+    def test_invalidated_when_scheduled_entry_is_published(self):
+        with freeze_time(retrieve_on):
+            self.assertIn({'tag': 'rust', 'count': 1}, self.get_facets())
+
+        with freeze_time(create_on + timedelta(days=1, seconds=1)):
+            flip_due_entries(utc_now())
+            self.assertIn({'tag': 'rust', 'count': 2}, self.get_facets())
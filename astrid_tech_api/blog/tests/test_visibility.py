@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytz
+from django.test import TestCase
+from freezegun import freeze_time
+
+from blog.models import Entry
+from blog.tasks import publish_scheduled_entries
+from blog.visibility import flip_due_entries, entry_visibility_changed
+
+create_on = datetime(2021, 6, 18, 5, 5, tzinfo=pytz.utc)
+publish_on = create_on + timedelta(hours=1)
+delete_on = create_on + timedelta(hours=2)
+
+
+class EntryVisibilityTests(TestCase):
+    @freeze_time(create_on)
+    def setUp(self):
+        self.current = Entry.objects.create(title='Current', ordinal=0, deleted_date=delete_on)
+        self.scheduled = Entry.objects.create(title='Scheduled', ordinal=1, published_date=publish_on)
+        self.draft = Entry.objects.create(title='Draft', ordinal=2, published_date=None)
+
+    def visible_titles(self):
+        return set(Entry.objects_visible().values_list('title', flat=True))
+
+    def test_save_sets_flag(self):
+        self.assertEqual({'Current'}, self.visible_titles())
+
+    def test_save_with_update_fields_sets_flag(self):
+        with freeze_time(create_on):
+            self.draft.published_date = create_on
+            self.draft.save(update_fields=['published_date'])
+
+        self.assertEqual({'Current', 'Draft'}, self.visible_titles())
+
+    def test_flips_when_due(self):
+        with freeze_time(publish_on):
+            flipped = flip_due_entries(publish_on)
+        self.assertEqual([self.scheduled.pk], flipped)
+        self.assertEqual({'Current', 'Scheduled'}, self.visible_titles())
+
+        with freeze_time(delete_on):
+            flipped = flip_due_entries(delete_on)
+        self.assertEqual([self.current.pk], flipped)
+        self.assertEqual({'Scheduled'}, self.visible_titles())
+
+    def test_flip_bumps_updated_date(self):
+        flip_due_entries(publish_on)
+
+        self.scheduled.refresh_from_db()
+        self.assertEqual(publish_on, self.scheduled.updated_date)
+
+    def test_flip_sends_signal(self):
+        received = []
+
+        def receiver(sender, pks, dates, **kwargs):
+            received.append((pks, dates))
+
+        entry_visibility_changed.connect(receiver, sender=Entry)
+        try:
+            flip_due_entries(publish_on - timedelta(seconds=1))
+            flip_due_entries(publish_on)
+        finally:
+            entry_visibility_changed.disconnect(receiver, sender=Entry)
+
+        self.assertEqual([([self.scheduled.pk], {create_on.date()})], received)
+
+    @patch('blog.tasks.publish_scheduled_entries.apply_async')
+    def test_task_queues_run_for_imminent_change(self, apply_async):
+        with freeze_time(publish_on - timedelta(seconds=10)):
+            publish_scheduled_entries()
+
+        apply_async.assert_called_once_with(eta=publish_on)
+
+    @patch('blog.tasks.publish_scheduled_entries.apply_async')
+    def test_task_leaves_distant_changes_to_beat(self, apply_async):
+        with freeze_time(create_on):
+            publish_scheduled_entries()
+
+        apply_async.assert_not_called()
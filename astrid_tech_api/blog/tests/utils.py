@@ -1,6 +1,22 @@
+from django.core.management import call_command
+from django.db import connection, connections
+
 from blog.models import SyndicationTarget
 
 
+def use_database_file(path: str):
+    """Point this forked process's default connection at the SQLite database in the given file."""
+    # Dropped rather than closed, since the connection still belongs to the parent process
+    connection.connection = None
+    connection.settings_dict.update(NAME=path, OPTIONS={'timeout': 60})
+
+
+def migrate_database_file(path: str):
+    use_database_file(path)
+    call_command('migrate', verbosity=0)
+    connections.close_all()
+
+
 # noinspection PyAttributeOutsideInit
 class SyndicationTestMixin:
     def set_up_syndication_targets(self):
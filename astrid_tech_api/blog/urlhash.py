@@ -0,0 +1,36 @@
+"""
+Normalizing URLs so that trivially different spellings of the same URL compare equal, and hashing them into compact
+integers that are cheap to index.
+"""
+from hashlib import sha256
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+
+def normalize_url(url: str) -> str:
+    """
+    Lowercase the scheme and host, treat http as https, drop www., default ports, fragments and trailing slashes.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or 'https'
+    if scheme == 'http':
+        scheme = 'https'
+
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, 80, 443) else f'{host}:{port}'
+
+    return urlunsplit((scheme, netloc, parts.path.rstrip('/'), parts.query, ''))
+
+
+def url_hash(url: Optional[str]) -> Optional[int]:
+    """A signed 64-bit hash of the normalized URL, to fit in a BigIntegerField, or None if there is no URL."""
+    if not url:
+        return None
+    digest = sha256(normalize_url(url).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big', signed=True)
@@ -0,0 +1,23 @@
+from django.urls import path
+
+from blog.feeds import RssEntryFeed, AtomEntryFeed, JSONEntryFeed
+from blog.views.export import export_entries
+from blog.views.feeds import entry_feed
+from blog.views.rest import entry_detail_cache_stats, entry_save_stats
+from blog.views.shortcodes import short_code_manifest
+from blog.views.sitemaps import sitemap_index, sitemap_shard
+
+urlpatterns = [
+    path('entries/export.ndjson', export_entries, name='entries-export'),
+    path('entries/short-codes.json', short_code_manifest, name='entries-short-codes'),
+    path('entries/detail-cache/stats', entry_detail_cache_stats, name='entry-detail-cache-stats'),
+    path('entries/saves/stats', entry_save_stats, name='entry-save-stats'),
+    path('sitemap.xml', sitemap_index, name='sitemap-index'),
+    path('sitemaps/entries-<start>.xml', sitemap_shard, name='sitemap-entries'),
+    path('feeds/rss.xml', entry_feed, {'feed_class': RssEntryFeed}, name='feed-rss'),
+    path('feeds/atom.xml', entry_feed, {'feed_class': AtomEntryFeed}, name='feed-atom'),
+    path('feeds/feed.json', entry_feed, {'feed_class': JSONEntryFeed}, name='feed-json'),
+    path('feeds/tags/<tag>/rss.xml', entry_feed, {'feed_class': RssEntryFeed}, name='tag-feed-rss'),
+    path('feeds/tags/<tag>/atom.xml', entry_feed, {'feed_class': AtomEntryFeed}, name='tag-feed-atom'),
+    path('feeds/tags/<tag>/feed.json', entry_feed, {'feed_class': JSONEntryFeed}, name='tag-feed-json'),
+]
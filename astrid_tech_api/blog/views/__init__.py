@@ -1,2 +1,2 @@
 from .micropub import micropub, upload_media
-from .rest import PublicEntriesViewSet
+from .rest import PublicEntriesViewSet, tag_facets, entry_detail_cache_stats
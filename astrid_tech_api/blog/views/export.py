@@ -0,0 +1,49 @@
+import json
+from itertools import islice
+from typing import Iterator, Iterable, List
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.db.models import prefetch_related_objects
+from django.http import StreamingHttpResponse, HttpResponse
+from django.views.decorators.http import require_http_methods
+from rest_framework.utils.encoders import JSONEncoder
+
+from blog.conditional import EntryVersion
+from blog.models import Entry
+from blog.serializer import PublicEntrySerializer, public_entry_prefetches
+
+EXPORT_CHUNK_SIZE = 500
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def export_entry_lines(qs, chunk_size: int) -> Iterator[str]:
+    """
+    Serialize entries as newline-delimited JSON, one chunk at a time.
+
+    Entries are streamed off the database with iterator(), which uses a server-side cursor where the database supports
+    it, so only one chunk of entries and their relations is ever held in memory.
+    """
+    entries = qs.order_by('date', 'ordinal').iterator(chunk_size=chunk_size)
+    for chunk in chunked(entries, chunk_size):
+        # iterator() doesn't do prefetch_related, so prefetch each chunk ourselves.
+        prefetch_related_objects(chunk, *public_entry_prefetches())
+        for entry in chunk:
+            yield json.dumps(PublicEntrySerializer(entry).data, cls=JSONEncoder, ensure_ascii=False) + '\n'
+
+
+@require_http_methods(['GET', 'HEAD'])
+def export_entries(request: WSGIRequest) -> HttpResponse:
+    qs = Entry.objects_visible()
+
+    version = EntryVersion.of(qs)
+    not_modified = version.not_modified_response(request)
+    if not_modified is not None:
+        return not_modified
+
+    response = StreamingHttpResponse(export_entry_lines(qs, EXPORT_CHUNK_SIZE), content_type='application/x-ndjson')
+    return version.apply_headers(response)
@@ -0,0 +1,52 @@
+from typing import Type, Optional
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db.models import Prefetch
+from django.http import HttpResponse, Http404, HttpResponseBadRequest
+from django.views.decorators.http import require_http_methods
+
+from blog.conditional import EntryVersion
+from blog.feeds import EntryFeed, FEED_TITLE
+from blog.models import Entry, Tag
+from blog.site import SITE_URL
+
+FEED_LIMIT = getattr(settings, 'BLOG_FEED_LIMIT', 20)
+"""How many entries feeds contain by default."""
+FEED_MAX_LIMIT = getattr(settings, 'BLOG_FEED_MAX_LIMIT', 100)
+"""The most entries a client may ask a feed for with ?limit=."""
+
+
+@require_http_methods(['GET', 'HEAD'])
+def entry_feed(request: WSGIRequest, feed_class: Type[EntryFeed], tag: Optional[str] = None) -> HttpResponse:
+    try:
+        limit = min(int(request.GET.get('limit', FEED_LIMIT)), FEED_MAX_LIMIT)
+    except ValueError:
+        return HttpResponseBadRequest('limit must be an integer')
+    if limit < 1:
+        return HttpResponseBadRequest('limit must be positive')
+
+    qs = Entry.objects_visible()
+    link = SITE_URL
+    title = FEED_TITLE
+    if tag is not None:
+        if not Tag.objects.filter(id=tag).exists():
+            raise Http404(f'No such tag {tag}')
+        qs = qs.filter(tags__id=tag)
+        link = f'{SITE_URL}/t/{tag}'
+        title = f'{FEED_TITLE} #{tag}'
+
+    version = EntryVersion.of(qs)
+    not_modified = version.not_modified_response(request)
+    if not_modified is not None:
+        return not_modified
+
+    # Bodies are only needed for items that aren't cached yet, and the feed fetches those itself.
+    entries = qs \
+        .defer('content', 'content_html') \
+        .prefetch_related(Prefetch('tags', queryset=Tag.objects.only('id'))) \
+        .order_by('-date', '-ordinal')[:limit]
+
+    feed = feed_class(feed_url=request.build_absolute_uri(request.path), link=link, title=title)
+    response = HttpResponse(feed.render(entries), content_type=feed.content_type)
+    return version.apply_headers(response)
@@ -116,7 +116,6 @@ def create_entry_from_query(query: QueryDict):
         published_date=published,
 
         date=created,
-        ordinal=Entry.get_next_ordinal(created),
 
         reply_to=query.get('in-reply-to', ''),
         location=query.get('location', ''),
@@ -158,7 +157,6 @@ def create_entry_from_json(properties: dict):
         published_date=created,
 
         date=created,
-        ordinal=Entry.get_next_ordinal(created),
 
         reply_to=get_microformat_str(properties, 'in-reply-to'),
         location=get_microformat_str(properties, 'location'),
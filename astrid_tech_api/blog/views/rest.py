@@ -1,42 +1,349 @@
-from datetime import datetime
+from datetime import datetime, date, timedelta
+from typing import Optional, Iterable, Set, List
+from uuid import UUID
 
 import pytz
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from django.conf import settings
+from django.db.models import QuerySet, Count
+from django.http import HttpResponsePermanentRedirect
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError, NotFound
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny, IsAdminUser, SAFE_METHODS
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
+from astrid_tech.renderers import use_orjson
+from blog.archive import get_archive_calendar
+from blog.changes import SyncToken, InvalidSyncToken, get_entry_changes
+from blog.conditional import EntryVersion
+from blog.detail_cache import get_cached_entry, cache_entry, entry_cache_stats
+from blog.facets import get_tag_facets
+from blog.fingerprint import skipped_save_count
 from blog.models import Entry
-from blog.serializer import PublicEntrySerializer
+from blog.permalinks import EntryPath, resolve_entry_path
+from blog.pagination import EntryKeysetPagination, EntrySearchPagination
+from blog.related import related_index
+from blog.replies import reply_thread, entries_referencing
+from blog.revisions import list_revisions, reconstruct_revision
+from blog.search import search_entries
+from blog.shortcodes import EntryShortCode
+from blog.serializer import PublicEntrySerializer, public_entry_prefetches, public_entry_columns, ReplySerializer, \
+    fast_entry_columns, fast_public_entries, EntryRevisionSerializer
+
+FAST_READ_PATH = getattr(settings, 'BLOG_FAST_READ_PATH', False)
+"""Serve entry lists from .values() rows rendered with orjson rather than through the serializer."""
+
+
+def get_int_param(params, name) -> Optional[int]:
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: 'Must be an integer.'})
+
+
+def get_list_param(params, name) -> Optional[List[str]]:
+    """A comma-separated list parameter, or None if it wasn't given."""
+    value = params.get(name)
+    if value is None:
+        return None
+    return [item for item in (item.strip() for item in value.split(',')) if item]
+
+
+def filter_date_parts(qs: QuerySet, year: Optional[int], month: Optional[int], day: Optional[int]) -> QuerySet:
+    """
+    Filter entries by parts of their date.
+
+    Whenever the parts describe a contiguous span of days, this becomes a half-open [start, end) range on Entry.date
+    so that the (date, ordinal) index can be used. Parts that don't (e.g. a month with no year) fall back to EXTRACT.
+    """
+    if year is None:
+        if month is not None:
+            qs = qs.filter(date__month=month)
+        if day is not None:
+            qs = qs.filter(date__day=day)
+        return qs
+
+    try:
+        if month is None:
+            start, end = date(year, 1, 1), date(year + 1, 1, 1)
+        elif day is None:
+            start = date(year, month, 1)
+            end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        else:
+            start = date(year, month, day)
+            end = start + timedelta(days=1)
+    except (ValueError, OverflowError) as e:
+        raise ValidationError({'date': str(e)})
+
+    qs = qs.filter(date__gte=start, date__lt=end)
+    if month is None and day is not None:
+        qs = qs.filter(date__day=day)
+    return qs
+
+
+def filter_has_all_tags(qs: QuerySet, tags: Iterable[str]) -> QuerySet:
+    """
+    Filter entries to those that have every one of the given tags.
+
+    Rather than joining the tag table once per tag, this finds the matching entries in a single pass over the M2M
+    table, grouping by entry and keeping the groups that matched as many tags as were asked for.
+    """
+    tags = set(tags)
+    if not tags:
+        return qs
+
+    matching = Entry.tags.through.objects \
+        .filter(tag_id__in=tags) \
+        .values('entry_id') \
+        .annotate(matched=Count('tag_id')) \
+        .filter(matched=len(tags)) \
+        .values('entry_id')
+    return qs.filter(pk__in=matching)
 
 
 class PublicEntriesViewSet(ModelViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
     serializer_class = PublicEntrySerializer
     lookup_field = 'uuid'
+    pagination_class = EntryKeysetPagination
 
     def get_queryset(self):
-        qs = Entry.objects_visible_at(datetime.now(pytz.utc))
+        qs = Entry.objects_visible()
 
         params = self.request.query_params
 
-        year = params.get('year')
-        if year is not None:
-            qs = qs.filter(date__year=year)
-
-        month = params.get('month')
-        if month is not None:
-            qs = qs.filter(date__month=month)
-
-        day = params.get('day')
-        if day is not None:
-            qs = qs.filter(date__day=day)
+        qs = filter_date_parts(
+            qs,
+            year=get_int_param(params, 'year'),
+            month=get_int_param(params, 'month'),
+            day=get_int_param(params, 'day'),
+        )
 
         ordinal = params.get('ordinal')
         if ordinal is not None:
             qs = qs.filter(ordinal=ordinal)
 
-        tags = params.getlist('has_tag')
-        for tag in tags:
-            qs = qs.filter(tags__id=tag)
+        qs = filter_has_all_tags(qs, params.getlist('has_tag'))
+
+        return self.load_fieldset(qs)
+
+    def get_fieldset(self) -> Optional[Set[str]]:
+        """The sparse fieldset asked for with ?fields= and ?omit=, or None for every field."""
+        if not hasattr(self, '_fieldset'):
+            params = self.request.query_params
+            self._fieldset = None
+            if self.request.method in SAFE_METHODS:
+                self._fieldset = PublicEntrySerializer.sparse_fieldset(
+                    fields=get_list_param(params, 'fields'),
+                    omit=get_list_param(params, 'omit'),
+                )
+        return self._fieldset
+
+    def load_fieldset(self, qs: QuerySet) -> QuerySet:
+        """Load only the columns and relations the sparse fieldset needs."""
+        fields = self.get_fieldset()
+        if fields is not None:
+            qs = qs.only(*public_entry_columns(fields))
+        return qs.prefetch_related(*public_entry_prefetches(fields))
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        return use_orjson(renderers) if FAST_READ_PATH else renderers
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_fieldset())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_bare_object(self) -> Entry:
+        """The entry get_object() would return, with only its primary key loaded."""
+        qs = self.filter_queryset(self.get_queryset()).prefetch_related(None).only('pk')
+        entry = get_object_or_404(qs, **{self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]})
+        self.check_object_permissions(self.request, entry)
+        return entry
+
+    def get_detail_data(self, entry: Entry):
+        """An entry's representation, plus the thread of local replies to it if every field was asked for."""
+        data = self.get_serializer(entry).data
+        if self.get_fieldset() is None:
+            data['replies'] = ReplySerializer(reply_thread(entry), many=True).data
+        return data
+
+    def list(self, request, *args, **kwargs):
+        version = EntryVersion.of(self.filter_queryset(self.get_queryset()))
+        not_modified = version.not_modified_response(request)
+        if not_modified is not None:
+            return not_modified
+
+        if FAST_READ_PATH:
+            return version.apply_headers(self.fast_list())
+        return version.apply_headers(super().list(request, *args, **kwargs))
+
+    def fast_list(self):
+        """The same response as list(), built from .values() rows instead of through the serializer."""
+        fields = self.get_fieldset()
+        rows = self.filter_queryset(self.get_queryset()).prefetch_related(None).values(*fast_entry_columns(fields))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast_public_entries(page, fields))
+        return Response(fast_public_entries(list(rows), fields))
+
+    def retrieve(self, request, *args, **kwargs):
+        uuid = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            uuid = UUID(uuid)
+        except ValueError:  # Let the usual lookup produce the 404
+            return super().retrieve(request, *args, **kwargs)
+
+        version = EntryVersion.of(
+            self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: uuid}), single=True
+        )
+        if version.count == 0:
+            return super().retrieve(request, *args, **kwargs)
+
+        not_modified = version.not_modified_response(request)
+        if not_modified is not None:
+            return not_modified
+
+        # Query parameters can filter the entry out, so only the plain lookup goes through the cache. Another process
+        # may have changed the entry without clearing this process's copy, so a hit only counts if it's up to date.
+        cacheable = not request.query_params
+        if cacheable:
+            cached = get_cached_entry(uuid, version.last_modified)
+            if cached is not None:
+                return version.apply_headers(Response(cached.data))
+
+        response = Response(self.get_detail_data(self.get_object()))
+        if cacheable:
+            cache_entry(uuid, response.data, version.last_modified)
+        return version.apply_headers(response)
+
+    @action(detail=False, methods=['get'], pagination_class=EntrySearchPagination)
+    def search(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This parameter is required.'})
+
+        qs = search_entries(self.filter_queryset(self.get_queryset()), query)
+        page = self.paginate_queryset(qs)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def changes(self, request):
+        """
+        Entries that changed since the given sync token, plus the UUIDs of entries that went away and a token for the
+        next sync. Without a token, this returns every visible entry.
+        """
+        since = request.query_params.get('since')
+        try:
+            token = SyncToken.decode(since) if since else None
+        except InvalidSyncToken:
+            raise ValidationError({'since': 'Invalid sync token.'})
+
+        changes = get_entry_changes(token, datetime.now(pytz.utc))
+        updated = self.load_fieldset(changes.updated.order_by('updated_date', 'pk'))
+        return Response({
+            'token': changes.token.encode(),
+            'entries': self.get_serializer(updated, many=True).data,
+            'deleted': changes.deleted,
+        })
+
+    @action(detail=False, methods=['get'])
+    def replies(self, request):
+        """Visible entries that reply to or repost the URL given as ?to=."""
+        to = request.query_params.get('to', '').strip()
+        if not to:
+            raise ValidationError({'to': 'This parameter is required.'})
+
+        qs = entries_referencing(self.filter_queryset(self.get_queryset()), to).order_by('date', 'ordinal')
+        page = self.paginate_queryset(qs)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(qs, many=True).data)
+
+    @action(detail=False, methods=['get'], url_path=r'by-short-code/(?P<code>[^/.]+)')
+    def by_short_code(self, request, code):
+        """Resolve a link shortener code to the entry at its (date, ordinal), if there is a visible one."""
+        parsed = EntryShortCode.parse(code)
+        if parsed is None:
+            raise NotFound('Not an entry short code')
+
+        entry = self.get_queryset().filter(date=parsed.date, ordinal=parsed.ordinal).first()
+        if entry is None:
+            raise NotFound()
+        return Response(self.get_serializer(entry).data)
+
+    @action(detail=True, methods=['get'], pagination_class=None)
+    def related(self, request, uuid):
+        """The visible entries most related to this one by shared tags and similar text, most related first."""
+        entry = self.get_object()
+        ranked = [related_uuid for related_uuid, _ in related_index.related(entry.uuid)]
+        if not ranked:
+            return Response([])
+
+        entries = {e.uuid: e for e in self.load_fieldset(Entry.objects_visible().filter(uuid__in=ranked))}
+        return Response(self.get_serializer([entries[u] for u in ranked if u in entries], many=True).data)
+
+    @action(detail=True, methods=['get'], pagination_class=None)
+    def revisions(self, request, uuid):
+        """The revisions of this entry's content, newest first, without the content itself."""
+        return Response(EntryRevisionSerializer(list_revisions(self.get_bare_object()), many=True).data)
+
+    @action(detail=True, methods=['get'], url_path=r'revisions/(?P<number>[0-9]+)', permission_classes=[IsAdminUser])
+    def revision(self, request, uuid, number):
+        """
+        This entry's content as of the given revision. Admin only, since it includes whatever was edited out since.
+        """
+        content = reconstruct_revision(self.get_bare_object(), int(number))
+        if content is None:
+            raise NotFound()
+        return Response({'number': int(number), 'content': content})
+
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def archive(self, request):
+        """How many visible entries there are per year, month and day."""
+        return Response(get_archive_calendar())
+
+    @action(detail=False, methods=['get'], url_path=r'by-path/(?P<path>[0-9]+/.+)')
+    def by_path(self, request, path):
+        """Look up an entry by its permalink, redirecting to the canonical permalink if the slug name is stale."""
+        parsed = EntryPath.parse(path)
+        if parsed is None:
+            raise NotFound('Not an entry path')
+
+        entry = resolve_entry_path(self.get_queryset(), parsed)
+        if entry is None:
+            raise NotFound()
+
+        if parsed.slug_name != (entry.slug_name or None):
+            location = reverse('entries-by-path', kwargs={'path': entry.slug.lstrip('/')})
+            if request.META.get('QUERY_STRING'):
+                location += '?' + request.META['QUERY_STRING']
+            return HttpResponsePermanentRedirect(location)
+
+        return Response(self.get_detail_data(entry))
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def tag_facets(request):
+    """How many visible entries each tag has."""
+    return Response(get_tag_facets())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def entry_detail_cache_stats(request):
+    """Hit and miss counts of the entry detail cache."""
+    return Response(entry_cache_stats())
 
-        return qs
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def entry_save_stats(request):
+    """How many entry saves were skipped because they changed nothing."""
+    return Response({'skipped': skipped_save_count()})
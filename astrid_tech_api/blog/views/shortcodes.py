@@ -0,0 +1,19 @@
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_http_methods
+
+from blog.conditional import EntryVersion
+from blog.models import Entry
+from blog.shortcodes import get_short_code_manifest
+
+
+@require_http_methods(['GET', 'HEAD'])
+def short_code_manifest(request: WSGIRequest) -> HttpResponse:
+    """Every visible entry's short code mapped to its slug, for the link shortener to resolve codes locally."""
+    version = EntryVersion.of(Entry.objects_visible())
+    not_modified = version.not_modified_response(request)
+    if not_modified is not None:
+        return not_modified
+
+    response = JsonResponse(get_short_code_manifest(version), json_dumps_params={'separators': (',', ':')})
+    return version.apply_headers(response)
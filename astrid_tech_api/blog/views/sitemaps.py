@@ -0,0 +1,54 @@
+import gzip
+from datetime import date
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import HttpResponse, Http404
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_http_methods
+
+from blog.conditional import EntryVersion
+from blog.models import Entry
+from blog.sitemaps import sitemap_shards, find_shard, get_shard_gzipped, shard_versions, render_index
+
+
+@require_http_methods(['GET', 'HEAD'])
+def sitemap_index(request: WSGIRequest) -> HttpResponse:
+    version = EntryVersion.of(Entry.objects_visible())
+    not_modified = version.not_modified_response(request)
+    if not_modified is not None:
+        return not_modified
+
+    shard_urls = [
+        (request.build_absolute_uri(reverse('sitemap-entries', kwargs={'start': shard.start.isoformat()})), lastmod)
+        for shard, lastmod in shard_versions(sitemap_shards())
+    ]
+    response = HttpResponse(render_index(shard_urls), content_type='application/xml')
+    return version.apply_headers(response)
+
+
+@require_http_methods(['GET', 'HEAD'])
+def sitemap_shard(request: WSGIRequest, start: str) -> HttpResponse:
+    try:
+        shard = find_shard(date.fromisoformat(start))
+    except ValueError:
+        shard = None
+    if shard is None:
+        raise Http404('No such sitemap')
+
+    version = shard.version()
+    gzipped = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+    representation = version._replace(encoding='gzip') if gzipped else version
+    not_modified = representation.not_modified_response(request)
+    if not_modified is not None:
+        patch_vary_headers(not_modified, ['Accept-Encoding'])
+        return not_modified
+
+    content = get_shard_gzipped(shard, version)
+    if gzipped:
+        response = HttpResponse(content, content_type='application/xml')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(content), content_type='application/xml')
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return representation.apply_headers(response)
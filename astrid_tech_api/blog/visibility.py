@@ -0,0 +1,53 @@
+"""
+Keeping Entry.visible in step with published_date and deleted_date.
+
+Saving an entry sets its flag, but scheduled publishes and deletes pass without anything being written, so the
+publish_scheduled_entries task flips the flags of entries whose time came. Flipping bumps updated_date, since the
+entry's public representation did change, and sends entry_visibility_changed so that caches and summaries derived from
+visibility can be invalidated right away rather than on a timer. Hidden entries also get a tombstone for clients
+syncing changes.
+"""
+from datetime import datetime
+from typing import Optional, List
+
+from django.db import transaction
+from django.db.models import Min, Q
+from django.dispatch import Signal
+
+from blog.changes import record_tombstones
+from blog.models import Entry
+
+entry_visibility_changed = Signal()
+"""Sent with the pks and dates of entries whose visible flag was flipped."""
+
+
+def next_visibility_change(now: datetime) -> Optional[datetime]:
+    """When the next entry is scheduled to be published or deleted, if at all."""
+    result = Entry.objects.aggregate(
+        next_publish=Min('published_date', filter=Q(published_date__gt=now)),
+        next_delete=Min('deleted_date', filter=Q(deleted_date__gt=now)),
+    )
+    upcoming = [dt for dt in result.values() if dt is not None]
+    return min(upcoming, default=None)
+
+
+def flip_due_entries(now: datetime) -> List[int]:
+    """Flip the visible flag of every entry whose scheduled publish or delete passed. Returns the flipped pks."""
+    visible_q = Entry.visible_at_q(now)
+    with transaction.atomic():
+        shown = list(Entry.objects.filter(visible=False).filter(visible_q).values_list('pk', 'date'))
+        hidden = list(Entry.objects.filter(visible=True).exclude(visible_q).values_list('pk', 'date', 'uuid'))
+        if shown:
+            Entry.objects.filter(pk__in=[pk for pk, _ in shown]).update(visible=True, updated_date=now)
+        if hidden:
+            Entry.objects.filter(pk__in=[pk for pk, _, _ in hidden]).update(visible=False, updated_date=now)
+            record_tombstones([uuid for _, _, uuid in hidden], now)
+
+    flipped = shown + [(pk, d) for pk, d, _ in hidden]
+    if flipped:
+        entry_visibility_changed.send(
+            sender=Entry,
+            pks=[pk for pk, _ in flipped],
+            dates={d for _, d in flipped},
+        )
+    return [pk for pk, _ in flipped]
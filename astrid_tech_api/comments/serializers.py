@@ -1,7 +1,13 @@
+from functools import lru_cache
+from typing import List, Dict
+
 from rest_framework.serializers import ModelSerializer
 
+from astrid_tech.fast_read import representation_plan, represent_row, RepresentationPlan
 from comments.models import Comment, Report
 
+REMOVED_HTML = '<p>[removed]</p>'
+
 
 class CommentSerializer(ModelSerializer):
     class Meta:
@@ -29,10 +35,27 @@ class CommentSerializer(ModelSerializer):
     def to_representation(self, instance: Comment):
         result = super().to_representation(instance)
         if instance.removed:
-            result['content_html'] = '<p>[removed]</p>'
+            result['content_html'] = REMOVED_HTML
         return result
 
 
+@lru_cache(maxsize=None)
+def fast_comment_plan() -> RepresentationPlan:
+    return representation_plan(CommentSerializer().fields)
+
+
+def fast_comments(qs) -> List[Dict]:
+    """Exactly what CommentSerializer would output for the comments, but built from .values() rows."""
+    plan = fast_comment_plan()
+    results = []
+    for row in qs.values('removed', *(name for name, _ in plan)):
+        result = represent_row(row, plan)
+        if row['removed']:
+            result['content_html'] = REMOVED_HTML
+        results.append(result)
+    return results
+
+
 class ReportSerializer(ModelSerializer):
     class Meta:
         model = Report
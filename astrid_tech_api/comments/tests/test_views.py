@@ -1,5 +1,6 @@
 import json
 from unittest import skip
+from unittest.mock import patch
 
 from rest_framework.test import APITestCase
 
@@ -202,3 +203,32 @@ class CommentViewsTestCase(APITestCase):
         self.assertEqual(202, response.status_code)
         comment = Comment.objects.get(pk=5)
         self.assertFalse(comment.mod_approved)
+
+
+class FastReadPathTests(APITestCase):
+    """The fast read path must produce the same bytes as the serializer."""
+
+    def setUp(self):
+        a, b, c, d = setup_comment_tree()
+        c.removed = True
+        c.save()
+        create_comment(author_name='Ünïcode  ', author_website='https://example.com', content_md='a **b** c')
+        create_comment(mod_approved=False, content_md='not approved')
+
+    def assert_same_bytes(self, params=None):
+        slow = self.client.get('/api/comments/', params)
+        with patch('comments.views.FAST_READ_PATH', True):
+            fast = self.client.get('/api/comments/', params)
+
+        self.assertEqual(200, fast.status_code)
+        self.assertEqual(slow.content, fast.content)
+        return fast
+
+    def test_list(self):
+        response = self.assert_same_bytes()
+        self.assertEqual(5, len(response.json()))
+        self.assertIn(b'<p>[removed]</p>', response.content)
+
+    def test_filtered_by_slug(self):
+        response = self.assert_same_bytes({'slug': '/test'})
+        self.assertEqual(4, len(response.json()))
@@ -1,5 +1,6 @@
 from typing import Union
 
+from django.conf import settings
 from django.forms import model_to_dict
 from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied, ValidationError
@@ -9,12 +10,16 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from structlog import get_logger
 
+from astrid_tech.renderers import use_orjson
 from comments.models import Comment, BannedIP, Report
-from comments.serializers import CommentSerializer, ReportSerializer
+from comments.serializers import CommentSerializer, ReportSerializer, fast_comments
 from comments.suspicious import too_many_newlines, contains_url
 
 logger = get_logger(__name__)
 
+FAST_READ_PATH = getattr(settings, 'COMMENTS_FAST_READ_PATH', False)
+"""Serve comment lists from .values() rows rendered with orjson rather than through the serializer."""
+
 suspiscion_validators = [
     too_many_newlines(20),
     contains_url
@@ -33,6 +38,10 @@ class CommentViewSet(ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = [AllowAny]
 
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        return use_orjson(renderers) if FAST_READ_PATH else renderers
+
     def get_queryset(self):
         queryset = Comment.objects.all()\
             .exclude(mod_approved=False)\
@@ -67,6 +76,8 @@ class CommentViewSet(ModelViewSet):
         queryset = self.get_queryset()
         if slug_filter is not None:
             queryset = queryset.filter(slug=slug_filter)
+        if FAST_READ_PATH:
+            return Response(fast_comments(queryset))
         return Response(CommentSerializer(queryset, many=True).data)
 
     def create(self, request: Request, pk=None, *args, **kwargs):